@@ -0,0 +1,64 @@
+""" Per user versioned caching of rendered pages and fragments.
+
+Every user has a version stamp in the default cache. It is part of the key of everything cached for the user, so
+bumping it (when the user, their roles or groups change) invalidates all their entries at once, without having to
+know or delete them: the stale entries expire on their own.
+
+Functions:
+    get_user_cache_version: return the current version stamp of a user
+    bump_user_cache_version: invalidate everything cached for a user
+    bump_user_cache_versions_on_commit: invalidate everything cached for some users, once the transaction commits
+    page_cache_key: return the cache key of a page rendered for a user
+"""
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_TIMEOUT = None  # Version stamps never expire, a reset would resurrect stale entries
+
+
+def user_version_key(user_id) -> str:
+    return f'user-cache-version:{user_id}'
+
+
+def get_user_cache_version(user) -> int:
+    """ Return the version stamp of the user (anonymous users share one). """
+    key = user_version_key(user.pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, VERSION_TIMEOUT)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_user_cache_version(user_id):
+    """ Invalidate the pages, fragments and permissions cached for the user.
+
+    :param user_id: the primary key of the user
+    """
+    key = user_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No stamp yet: start above the implicit version 1 that concurrent readers may have used
+        cache.set(key, 2, VERSION_TIMEOUT)
+
+
+def bump_user_cache_versions_on_commit(user_ids: Iterable, using: Optional[str] = None):
+    """ Invalidate the pages, fragments and permissions cached for the users once the current transaction commits.
+
+    Bumped before, the version of a user could be read by a concurrent request, which would cache under it the data
+    the transaction is replacing.
+
+    :param user_ids: the primary keys of the users, read right away
+    :param using: the database of the transaction
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: [bump_user_cache_version(user_id) for user_id in user_ids], using=using)
+
+
+def page_cache_key(user, template_name: str) -> str:
+    """ Return the key of the template rendered for the user, changing with the user's version stamp. """
+    return f'page:{template_name}:{user.pk}:{get_user_cache_version(user)}'
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .caching import get_user_cache_version
+
+
+def user_cache_version(request):
+    """ Provide what the {% cache %} fragments of the layout need.
+
+    user_cache_version: the version stamp of the user, only read from the cache when a template uses it
+    fragments_cache_timeout: the lifetime of the fragments, in seconds
+    """
+    return {
+        'user_cache_version': SimpleLazyObject(lambda: get_user_cache_version(request.user)),
+        'fragments_cache_timeout': settings.TEMPLATE_FRAGMENTS_CACHE_TIMEOUT,
+    }
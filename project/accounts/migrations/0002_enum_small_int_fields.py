@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from appsutils.fields import convert_to_enum_small_int, EnumSmallIntField
+from appsutils.models import Gender, RecordStatus
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        *convert_to_enum_small_int(
+            'accounts.CustomUser', 'record_status',
+            EnumSmallIntField(RecordStatus, blank=True, default=RecordStatus.ACTIVE, null=True),
+        ),
+        *convert_to_enum_small_int(
+            'accounts.CustomUser', 'gender', EnumSmallIntField(Gender, blank=True, default=None, null=True),
+        ),
+    ]
@@ -6,14 +6,18 @@ from django.contrib.auth.models import PermissionsMixin
 
 from django.db import models
 
-from appsutils.models import Gender, BaseEntity
+from appsutils.fields import EnumSmallIntField
+from appsutils.models import Gender, BaseEntity, BaseEntityQuerySet
+
+from .permissions import get_user_permissions
 
 
 # Create your domain models here.
-class AccountManager(BaseUserManager):
+class AccountManager(BaseUserManager.from_queryset(BaseEntityQuerySet)):
     """ Extend BaseUserManager to cater for the custom user model.
 
     Define 3 methods: create_user(), create_superuser(), validate_user_details()
+    The querysets are BaseEntityQuerySet, like for every other model inheriting from BaseEntity.
 
     Ref: https://docs.djangoproject.com/en/3.2/topics/auth/customizing/
     Ref: for link specific to the manager for a custom user model:
@@ -150,11 +154,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin, BaseEntity):
 
     first_name = models.CharField(max_length=255, null=True, blank=True)
     last_name = models.CharField(max_length=255, null=True, blank=True)
-    gender = models.CharField(
+    gender = EnumSmallIntField(
+        Gender,
         null=True, blank=True,
-        max_length=255,
         default=None,
-        choices=[(record.name, record.value) for record in Gender]
     )
     phone_number = models.CharField(max_length=255, null=True, blank=True)
 
@@ -166,17 +169,42 @@ class CustomUser(AbstractBaseUser, PermissionsMixin, BaseEntity):
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
-    def has_perm(self, perm, obj=None):
-        return self.is_admin
+    def has_perm(self, perm: str, obj=None) -> bool:
+        """ Tell whether the user has the permission, answered from the cached permission set.
+
+        Active admins and superusers have every permission, inactive users none. Object permissions are not
+        supported: a permission on an object is the permission on its model.
 
-    def has_module_perms(self, app_label):
+        :param perm: the permission, as 'app_label.codename'
+        :param obj: ignored
+        :return: True when the permission is granted
         """
-        Default to True so that every yser has access to this module.
+        if not self.is_active:
+            return False
+        if self.is_admin or self.is_superuser:
+            return True
+        return perm in get_user_permissions(self)
 
-        :param app_label:
-        :return:
+    def has_perms(self, perm_list, obj=None) -> bool:
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label: str) -> bool:
+        """ Tell whether the user has any permission in the app, answered from the cached permission set.
+
+        :param app_label: the label of the app
+        :return: True when at least one permission of the app is granted
         """
-        return True
+        if not self.is_active:
+            return False
+        if self.is_admin or self.is_superuser:
+            return True
+        prefix = f'{app_label}.'
+        return any(perm.startswith(prefix) for perm in get_user_permissions(self))
+
+    def get_all_permissions(self, obj=None) -> set:
+        if not self.is_active:
+            return set()
+        return set(get_user_permissions(self))
 
     class Meta:
         db_table = 'users'
@@ -0,0 +1,49 @@
+""" Cached resolution of the effective permissions of the users.
+
+Django's ModelBackend resolves the permissions of a user with a query on the user permissions and another one on
+the group permissions, once per request. Here the effective permission set is resolved with a single query and kept
+in the shared cache under the user's version stamp (see accounts.caching), which is bumped whenever the user, their
+permissions, their auth groups or their group memberships change.
+
+Functions:
+    get_user_permissions: return the effective permissions of a user, as a frozenset of 'app_label.codename'
+    permissions_cache_key: return the cache key of the permissions of a user
+"""
+from typing import FrozenSet
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+
+from .caching import get_user_cache_version
+
+
+def permissions_cache_key(user) -> str:
+    """ Return the key of the user's permissions, changing with the user's version stamp. """
+    return f'permissions:{user.pk}:{get_user_cache_version(user)}'
+
+
+def get_user_permissions(user) -> FrozenSet[str]:
+    """ Return the permissions granted to the user directly or through their auth groups.
+
+    The set is memoized on the user instance for the rest of the request, read from the cache otherwise, and only
+    resolved from the database on a cache miss.
+
+    :param user: an active, saved user
+    :returns: the permissions, as 'app_label.codename' strings
+    """
+    permissions = getattr(user, '_effective_permissions', None)
+    if permissions is not None:
+        return permissions
+    key = permissions_cache_key(user)
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = frozenset(
+            f'{app_label}.{codename}' for app_label, codename in
+            Permission.objects.filter(Q(user=user) | Q(group__user=user))
+            .values_list('content_type__app_label', 'codename').distinct()
+        )
+        cache.set(key, permissions, settings.PERMISSIONS_CACHE_TIMEOUT)
+    user._effective_permissions = permissions
+    return permissions
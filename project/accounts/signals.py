@@ -0,0 +1,84 @@
+""" Signal receivers of the accounts app, connected in AccountsConfig.ready().
+
+The cache versions are bumped once the change commits: bumped before, they could be read by a concurrent request,
+which would cache under them the permissions the transaction is replacing (see accounts.caching).
+
+Receivers:
+    invalidate_user_cache: bump the cache version of a user when the user is saved
+    invalidate_user_permissions: bump the cache version of the users whose permissions or auth groups change
+    invalidate_group_permissions: bump the cache version of the members of an auth group whose permissions change
+    invalidate_deleted_group: bump the cache version of the members of a deleted auth group
+    invalidate_deleted_permission: bump the cache version of the users holding a deleted permission
+"""
+from django.contrib.auth.models import Group as AuthGroup, Permission
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caching import bump_user_cache_versions_on_commit
+from .models import CustomUser
+
+M2M_CHANGES = ('post_add', 'post_remove', 'post_clear')
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_cache(
+    sender, instance: CustomUser, created: bool, raw: bool = False, update_fields=None, using=None, **kwargs
+):
+    # The layout displays the user (name, menus depending on the permissions), but not the last login date
+    if created or raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    bump_user_cache_versions_on_commit([instance.pk], using=using)
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def invalidate_user_permissions(sender, instance, action: str, reverse: bool, pk_set=None, using=None, **kwargs):
+    if not reverse:
+        if action in M2M_CHANGES:
+            bump_user_cache_versions_on_commit([instance.pk], using=using)
+        return
+    # Changed from the auth group or permission side: instance is the group or permission, pk_set the users
+    if action == 'pre_clear':
+        # The users are unknown once cleared
+        instance._cleared_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        user_ids = instance.__dict__.pop('_cleared_user_ids', ())
+    elif action in M2M_CHANGES:
+        user_ids = pk_set
+    else:
+        return
+    bump_user_cache_versions_on_commit(user_ids, using=using)
+
+
+@receiver(m2m_changed, sender=AuthGroup.permissions.through)
+def invalidate_group_permissions(sender, instance, action: str, reverse: bool, pk_set=None, using=None, **kwargs):
+    # instance is the auth group, or the permission when reverse, and pk_set the permissions or the groups
+    if reverse and action == 'pre_clear':
+        # The groups of the permission, and their users, are unknown once cleared
+        members = CustomUser.objects.filter(groups__permissions=instance).values_list('pk', flat=True).distinct()
+        instance._cleared_member_ids = list(members)
+        return
+    if reverse and action == 'post_clear':
+        user_ids = instance.__dict__.pop('_cleared_member_ids', ())
+    elif action in M2M_CHANGES:
+        groups = AuthGroup.objects.filter(pk__in=pk_set) if reverse else [instance]
+        user_ids = CustomUser.objects.filter(groups__in=groups).values_list('pk', flat=True).distinct()
+    else:
+        return
+    bump_user_cache_versions_on_commit(user_ids, using=using)
+
+
+# The deletions cascade to the user_groups and group_permissions rows without sending m2m_changed: the users are
+# collected while the rows exist, and invalidated once the deletion is committed
+
+@receiver(pre_delete, sender=AuthGroup)
+def invalidate_deleted_group(sender, instance: AuthGroup, using=None, **kwargs):
+    bump_user_cache_versions_on_commit(instance.user_set.values_list('pk', flat=True), using=using)
+
+
+@receiver(pre_delete, sender=Permission)
+def invalidate_deleted_permission(sender, instance: Permission, using=None, **kwargs):
+    holders = CustomUser.objects.filter(Q(user_permissions=instance) | Q(groups__permissions=instance))
+    bump_user_cache_versions_on_commit(holders.values_list('pk', flat=True).distinct(), using=using)
@@ -3,6 +3,138 @@
 Copyright (c) 2019 - present AppSeed.us
 """
 
+from unittest import mock
+
+from django.contrib.auth.models import Group as AuthGroup, Permission
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .caching import bump_user_cache_version, get_user_cache_version
+from groups.models import Group, GroupMember
+
+from .models import CustomUser
+
+
+class PageCacheTests(TestCase):
+    """ Static pages and layout fragments cached per user version stamp. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_static_page_is_rendered_once_per_user_version(self):
+        with mock.patch('accounts.views.loader.render_to_string', return_value='<html>icons</html>') as render:
+            self.client.get('/icons.html')
+            response = self.client.get('/icons.html')
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(response.content, b'<html>icons</html>')
+
+            bump_user_cache_version(self.user.pk)
+            self.client.get('/icons.html')
+            self.assertEqual(render.call_count, 2)
+
+    def test_saving_the_user_invalidates_its_cache(self):
+        version = get_user_cache_version(self.user)
+        self.user.last_name = 'Smith'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            self.assertEqual(get_user_cache_version(self.user), version)     # Not before the commit
+        self.assertEqual(get_user_cache_version(self.user), version + 1)
+
+    def test_layout_fragments_follow_the_user_version(self):
+        self.assertContains(self.client.get('/maps.html'), 'agent')
+        self.user.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertContains(self.client.get('/tickets/list/'), 'renamed')
+
+
+class PermissionCacheTests(TestCase):
+    """ Effective permissions resolved once, then answered from the cache until a change. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        cls.view_users = Permission.objects.get(codename='custom_view_users')
+        cls.add_user = Permission.objects.get(codename='custom_add_user')
+        cls.role = AuthGroup.objects.create(name='Operators')
+
+    def setUp(self):
+        cache.clear()
+
+    def fresh_user(self) -> CustomUser:
+        # A new instance, like the one loaded by every request
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def test_warm_permission_checks_run_no_query(self):
+        self.user.user_permissions.add(self.view_users)
+        self.assertTrue(self.fresh_user().has_perm('accounts.custom_view_users'))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('accounts.custom_view_users'))
+            self.assertFalse(user.has_perm('accounts.custom_add_user'))
+            self.assertTrue(user.has_module_perms('accounts'))
+            self.assertFalse(user.has_module_perms('tickets'))
+
+    def test_role_changes_invalidate_the_permissions(self):
+        self.assertFalse(self.fresh_user().has_perm('accounts.custom_add_user'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.role)
+            self.role.permissions.add(self.add_user)
+        self.assertTrue(self.fresh_user().has_perm('accounts.custom_add_user'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.user_set.clear()
+        self.assertFalse(self.fresh_user().has_perm('accounts.custom_add_user'))
+
+    def test_clearing_the_roles_of_a_permission_invalidates_the_permissions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.role)
+            self.role.permissions.add(self.add_user)
+        self.assertTrue(self.fresh_user().has_perm('accounts.custom_add_user'))
+        version = get_user_cache_version(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_user.group_set.clear()
+        self.assertEqual(get_user_cache_version(self.user), version + 1)
+        self.assertFalse(self.fresh_user().has_perm('accounts.custom_add_user'))
+
+    def test_deleting_a_role_or_a_permission_invalidates_the_permissions(self):
+        self.user.groups.add(self.role)
+        self.role.permissions.add(self.add_user)
+        self.user.user_permissions.add(self.view_users)
+        self.assertTrue(self.fresh_user().has_perm('accounts.custom_add_user'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.delete()
+        self.assertFalse(self.fresh_user().has_perm('accounts.custom_add_user'))
+
+        self.assertTrue(self.fresh_user().has_perm('accounts.custom_view_users'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.view_users.delete()
+        self.assertFalse(self.fresh_user().has_perm('accounts.custom_view_users'))
+
+    def test_group_membership_changes_bump_the_user_version(self):
+        group = Group.objects.create(name='Support')
+        version = get_user_cache_version(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            membership = GroupMember.objects.create(group=group, user=self.user)
+            # Not before the commit: a concurrent request would cache the memberships being replaced
+            self.assertEqual(get_user_cache_version(self.user), version)
+        self.assertEqual(get_user_cache_version(self.user), version + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.delete()
+            group.members.add(self.user)
+        self.assertEqual(get_user_cache_version(self.user), version + 3)
+
+    def test_admins_have_every_permission_and_inactive_users_none(self):
+        self.user.is_admin = True
+        self.assertTrue(self.user.has_perm('accounts.custom_add_role'))
+        self.user.is_active = False
+        self.assertFalse(self.user.has_perm('accounts.custom_add_role'))
+        self.assertFalse(self.user.has_module_perms('accounts'))
@@ -1,6 +1,8 @@
 from django.contrib.auth.views import LogoutView
 from django.urls import path, re_path
 
+from appsutils.asynchronous import asgi_view
+
 from .views import login_view, register_user
 from . import views
 
@@ -11,6 +13,6 @@ urlpatterns = [
     path('register/', register_user, name="register"),
     path("logout/", LogoutView.as_view(), name="logout"),
 
-    path('', views.index, name='home'),  # The home page
+    path('', asgi_view(views.index), name='home'),  # The home page
     re_path(r'^.*\.*', views.pages, name='pages'),  # Matches any html file
 ]
\ No newline at end of file
@@ -1,11 +1,15 @@
 # -*- encoding: utf-8 -*-
 from django import template
+from django.conf import settings
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 from django.shortcuts import render, redirect
+from django.core.cache import cache
 from django.template import loader
 
+from groups.models import GroupTicketStats
+from .caching import page_cache_key
 from .forms import LoginForm, SignUpForm
 
 
@@ -62,6 +66,8 @@ def register_user(request):
 @login_required(login_url="/login/")
 def index(request):
     context = {'segment': 'index'}
+    # One row per group and status, maintained incrementally, instead of counting the tickets table
+    context['group_ticket_stats'] = GroupTicketStats.objects.histograms()
 
     # Replacing these two lines with shortcut 'render'
     # html_template = loader.get_template( 'index.html' )
@@ -79,6 +85,15 @@ def pages(request):
         load_template = request.path.split('/')[-1]
         context['segment'] = load_template
 
+        # Static pages are rendered once per user (and version stamp of the user)
+        if load_template in settings.CACHED_PAGES:
+            key = page_cache_key(request.user, load_template)
+            html = cache.get(key)
+            if html is None:
+                html = loader.render_to_string(load_template, context, request)
+                cache.set(key, html)
+            return HttpResponse(html)
+
         # html_template = loader.get_template(load_template)
         # return HttpResponse(html_template.render(context, request))
         return render(request, load_template, context)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class AppsutilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'appsutils'
+
+    def ready(self):
+        from . import checks  # noqa: F401 Registers the system checks
+        from .db import check_persistent_connections, configure_sqlite
+        connection_created.connect(configure_sqlite)
+        request_started.connect(check_persistent_connections)
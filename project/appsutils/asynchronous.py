@@ -0,0 +1,142 @@
+""" Async variants of the synchronous views, for the ASGI deployment profile.
+
+Django 3.2 has no async ORM: an async view still runs its queries in a thread. Wrapping every query in
+sync_to_async() would pay a thread hop per query (and per lazy relation in the templates), so the async views
+run the whole synchronous view, queries and template rendering included, in a single hop to a bounded thread pool.
+The event loop keeps the connections of the clients, slow ones included, while the pool threads (each holding at
+most one database connection per alias) produce the responses.
+
+The streaming responses are iterated in the pool too, by StreamingASGIHandler: Django 3.2 iterates them on the event
+loop, where the queries are not allowed.
+
+Classes:
+    StreamingASGIHandler: Django's ASGI handler, iterating the streaming responses in the views thread pool
+
+Functions:
+    get_asgi_application: return the ASGI application of the project, a StreamingASGIHandler
+    async_view: return an async view running a synchronous view in the views thread pool
+    asgi_view: return the async variant of a view when ASYNC_VIEWS is set, else the view itself
+    run_in_pool: run a synchronous function in the views thread pool, e.g. from an ASGI application
+    wait_disconnect: wait for the client of an ASGI connection to leave
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+
+from .db import refresh_connections
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """ Return the thread pool of the async views, of ASYNC_VIEWS_THREADS threads, created on first use. """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_VIEWS_THREADS, thread_name_prefix='async-view')
+    return _executor
+
+
+def call(func: Callable, *args, **kwargs):
+    """ Call the function in a thread of the pool. """
+    # Django only closes the obsolete connections of its own thread around a request
+    refresh_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        refresh_connections()
+
+
+def respond(view: Callable, request, *args, **kwargs):
+    """ Run the view and render its response, in a thread of the pool. """
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    return response
+
+
+def async_view(view: Callable) -> Callable:
+    """ Return an async view running the synchronous view, and rendering its response, in the views thread pool.
+
+    The pool is not thread sensitive: the view must not rely on running in the thread of the synchronous
+    middleware, e.g. on a transaction opened by them (ATOMIC_REQUESTS is not supported).
+
+    :param view: a function view or the result of as_view()
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_pool(respond, view, request, *args, **kwargs)
+    return wrapper
+
+
+def asgi_view(view: Callable) -> Callable:
+    """ Return the async variant of the view (see async_view) when ASYNC_VIEWS is set, else the view unchanged.
+
+    Used in the URL configurations for the views which hold the most client connections under the ASGI profile.
+    """
+    return async_view(view) if settings.ASYNC_VIEWS else view
+
+
+async def run_in_pool(func: Callable, *args, **kwargs):
+    """ Run the synchronous function in the views thread pool and return its result, the obsolete database
+    connections of the thread being closed around it as around a request.
+    """
+    return await sync_to_async(call, thread_sensitive=False, executor=get_executor())(func, *args, **kwargs)
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+_receive = ContextVar('receive')    # The receive callable of the connection handled by StreamingASGIHandler
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ Django's ASGI handler, iterating the streaming responses in the views thread pool.
+
+    The requests go through the whole middleware chain like with ASGIHandler, but the parts of the streaming
+    responses, e.g. the pages of tickets.views.TicketExportView, are produced in the pool, where they can query the
+    database, then sent from the event loop. The iteration stops once the client is gone.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = _receive.set(receive)
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _receive.reset(token)
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [(name.encode('ascii'), value.encode('latin1')) for name, value in response.items()]
+        headers += [(b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+                    for cookie in response.cookies.values()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        # The body of the request was read by the handler: the next message is the disconnection
+        disconnected = asyncio.ensure_future(wait_disconnect(_receive.get()))
+        parts = iter(response)
+        try:
+            while not disconnected.done():
+                part = await run_in_pool(next, parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body'})
+        finally:
+            disconnected.cancel()
+            await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application() -> StreamingASGIHandler:
+    """ Set up Django and return its ASGI application, like django.core.asgi.get_asgi_application(). """
+    django.setup(set_prefix=False)
+    return StreamingASGIHandler()
@@ -0,0 +1,24 @@
+""" System checks of the deployments, run by `manage.py check --deploy`.
+
+Functions:
+    check_shared_cache: warn when the default cache is local to each process
+"""
+from django.conf import settings
+from django.core import checks
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """ Warn when the default cache is local to each process: the invalidations of the entries cached per user (see
+    accounts.caching) would not reach the other workers, which would serve them stale until they expire.
+    """
+    if settings.CACHES['default']['BACKEND'] != LOCAL_CACHE_BACKEND:
+        return []
+    return [checks.Warning(
+        'The default cache is local to each process: the pages, permissions and group ids invalidated by one worker '
+        'stay cached by the others until they expire.',
+        hint='Unless a single process serves the requests, set CACHE_BACKEND to file, memcached or redis.',
+        id='appsutils.W001',
+    )]
@@ -0,0 +1,153 @@
+""" Database connections: read replicas routing, SQLite tuning and persistent connections health checks.
+
+Classes:
+    ReplicaRouter: database router sending the reads to the replicas inside use_replicas() blocks
+    ReplicaReadMixin: class based view mixin serving GET and HEAD requests from the replicas
+    use_replicas: context manager routing the reads of the enclosed code to the replicas
+
+Functions:
+    replica_aliases: return the aliases of the configured read replicas
+    configure_sqlite: connection_created receiver enabling WAL and a busy timeout on SQLite
+    check_persistent_connections: request_started receiver closing broken persistent connections
+    refresh_connections: close the obsolete or broken connections of the current thread, outside a request
+    table_storage: the rows and the bytes of a table and of its indexes
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+REPLICA_PREFIX = 'replica'
+
+reads_from_replicas: ContextVar[bool] = ContextVar('reads_from_replicas', default=False)
+
+
+def replica_aliases() -> List[str]:
+    """ Return the aliases of the databases declared as read replicas (named replica_<n> in DATABASES). """
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+@contextmanager
+def use_replicas():
+    """ Route the reads of the enclosed code to a read replica, when any is configured.
+
+    Replicas lag behind the primary: do not use it for reads which must see a write made just before.
+    """
+    token = reads_from_replicas.set(True)
+    try:
+        yield
+    finally:
+        reads_from_replicas.reset(token)
+
+
+class ReplicaRouter:
+    """ Send the writes and migrations to the primary ('default') and, inside use_replicas(), the reads to a
+    randomly chosen replica. Without replicas everything goes to the primary.
+    """
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if self.replicas and reads_from_replicas.get():
+            return random.choice(self.replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """ Serve the safe requests (GET, HEAD) of a class based view from the read replicas.
+
+    The response is rendered inside the replica block, so that the queries run by the template go to the replicas
+    as well.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with use_replicas():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """ Tune every new SQLite connection for concurrent workers.
+
+    WAL lets the readers work while a writer commits, busy_timeout makes a writer wait for the lock instead of
+    failing with 'database is locked', and synchronous=NORMAL is safe with WAL while sparing an fsync per commit.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = WAL')
+        cursor.execute(f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}')
+        cursor.execute('PRAGMA synchronous = NORMAL')
+
+
+def check_persistent_connections(**kwargs):
+    """ Close, before the request uses them, the persistent connections which the database server dropped.
+
+    Only done for the databases with CONN_HEALTH_CHECKS set (Django 3.2 does not support this setting natively):
+    a new connection is then opened on first use instead of the request failing.
+    """
+    for connection in connections.all():
+        if connection.connection is None or not connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def refresh_connections():
+    """ Close the obsolete or broken database connections of the current thread, as Django does around every
+    request. For the threads which Django does not manage: job workers, async views' thread pool.
+    """
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+def table_storage(table: str, using: str = DEFAULT_DB_ALIAS) -> Dict[str, int]:
+    """ Return the storage of a table: rows, table and index bytes (pages), and row bytes (the payload of the rows
+    on SQLite; the pages on PostgreSQL, whose figures are estimates until the next ANALYZE).
+
+    :raises NotImplementedError: on the other databases
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # dbstat, compiled in the SQLite of the Python builds, reads the pages of every table and index
+            cursor.execute(
+                'SELECT SUM(pgsize), SUM(payload) FROM dbstat WHERE name = %s', [table],
+            )
+            table_bytes, row_bytes = cursor.fetchone()
+            cursor.execute(
+                "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)", [table],
+            )
+            index_bytes = cursor.fetchone()[0]
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            rows = cursor.fetchone()[0]
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT GREATEST(reltuples, 0)::bigint, pg_table_size(oid), pg_indexes_size(oid) FROM pg_class '
+                'WHERE oid = %s::regclass', [connection.ops.quote_name(table)],
+            )
+            rows, table_bytes, index_bytes = cursor.fetchone()
+            row_bytes = table_bytes
+        else:
+            raise NotImplementedError(f'No storage statistics on {connection.vendor}.')
+    return {'rows': rows, 'table_bytes': table_bytes or 0, 'index_bytes': index_bytes, 'row_bytes': row_bytes or 0}
@@ -0,0 +1,102 @@
+""" Model fields shared by the apps.
+
+Classes:
+    EnumSmallIntField: a Python enum stored as a small integer
+
+Functions:
+    convert_to_enum_small_int: migration operations converting a column of enum names to an EnumSmallIntField
+"""
+import enum
+from typing import List, Type
+
+from django.core import exceptions
+from django.db import migrations, models
+from django.db.models import Case, Max, Min, Value, When
+
+
+class EnumSmallIntField(models.PositiveSmallIntegerField):
+    """ Store the members of a Python enum as small integers (2 bytes on PostgreSQL, 1 on SQLite), instead of their
+    names in a CharField, while the model attribute holds the enum member.
+
+    The code of a member is its position in the enum definition, from 1: new members must be appended, never
+    inserted nor reordered, and members never removed (their code would be reused).
+    The lookups accept members, names and codes alike, e.g. filter(record_status='DELETED').
+
+    :param enum: the Enum class of the values
+    """
+    description = 'Enum member stored as a small integer'
+
+    def __init__(self, enum: Type[enum.Enum], *args, **kwargs):
+        self.enum = enum
+        self.codes = {member: code for code, member in enumerate(enum, 1)}
+        self.members = {code: member for member, code in self.codes.items()}
+        kwargs['choices'] = [(member, member.value) for member in enum]
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['choices']   # Derived from the enum
+        return name, path, [self.enum] + args, kwargs
+
+    def to_python(self, value):
+        if value is None or isinstance(value, self.enum):
+            return value
+        try:
+            if isinstance(value, int):
+                return self.members[value]
+            return self.enum[value] if value in self.enum.__members__ else self.enum(value)
+        except (KeyError, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                f'“{value}” is not a {self.enum.__name__}.', code='invalid', params={'value': value},
+            )
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.members[value]
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)     # Not IntegerField's, which casts to int
+        return None if value is None else self.codes[self.to_python(value)]
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return '' if value is None else value.name
+
+
+def convert_to_enum_small_int(model: str, name: str, field: EnumSmallIntField,
+                              batch_size: int = 10000) -> List[migrations.operations.base.Operation]:
+    """ Return the operations of a migration replacing a column of enum names (a CharField) by the field.
+
+    The codes are written to a new column by batches of primary keys, one UPDATE each, then the new column replaces
+    the old one. The operations are reversible. The indexes using the column must be removed before, and added back
+    after.
+
+    :param model: the model, as 'app_label.ModelName'
+    :param name: the name of the column
+    :param field: the EnumSmallIntField replacing it
+    :param batch_size: the number of primary keys per UPDATE
+    """
+    app_label, model_name = model.split('.')
+    temporary = f'{name}_code'
+
+    def copy(apps, source: str, target: str, mapping: dict):
+        model_class = apps.get_model(app_label, model_name)
+        manager = model_class._base_manager
+        bounds = manager.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return
+        value = Case(*(When(**{source: old}, then=Value(new)) for old, new in mapping.items()), default=None)
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            manager.filter(pk__gte=start, pk__lt=start + batch_size).update(**{target: value})
+
+    def forward(apps, schema_editor):
+        copy(apps, name, temporary, {member.name: code for member, code in field.codes.items()})
+
+    def backward(apps, schema_editor):
+        copy(apps, temporary, name, {code: member.name for member, code in field.codes.items()})
+
+    return [
+        migrations.AddField(model_name=model_name.lower(), name=temporary, field=field.clone()),
+        migrations.RunPython(forward, backward),
+        migrations.RemoveField(model_name=model_name.lower(), name=name),
+        migrations.RenameField(model_name=model_name.lower(), old_name=temporary, new_name=name),
+    ]
@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import ProtectedError, RestrictedError
+from django.utils import timezone
+
+from appsutils.models import BaseEntity, DELETED_RECORDS
+
+
+class Command(BaseCommand):
+    """ Delete the rows of the records soft-deleted more than SOFT_DELETE_RETENTION_DAYS ago, to be run
+    periodically (e.g. daily from cron).
+
+    The rows are deleted by batches, each in its own transaction, so that the locks are held briefly and the
+    purge of a large backlog does not stall the application; --pause spaces the batches further. The deletion
+    cascades like a regular delete(), e.g. to the comments of the tickets, and to the tickets of a group.
+    The users are not purged: the audit trail of every table refers to them.
+    """
+    help = 'Delete the rows of the expired soft-deleted records, by batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=settings.SOFT_DELETE_RETENTION_DAYS,
+                            help='Days a soft-deleted record is kept before being purged.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of records deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to wait between two batches.')
+
+    def handle(self, *args, days: float, batch_size: int, pause: float, **options):
+        before = timezone.now() - timedelta(days=days)
+        user_model = get_user_model()
+        for model in apps.get_models():
+            if not issubclass(model, BaseEntity) or issubclass(model, user_model):
+                continue
+            expired = model.all_objects.filter(DELETED_RECORDS, changed_on__lt=before).order_by()
+            purged, kept = 0, set()     # kept: the records still referenced, e.g. a workflow state of tickets
+            while True:
+                ids = list(expired.exclude(pk__in=kept).values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                try:
+                    with transaction.atomic():
+                        model.all_objects.filter(pk__in=ids).delete()
+                    purged += len(ids)
+                except (ProtectedError, RestrictedError):
+                    # Retried record by record: the referenced ones stay until unreferenced, the others are purged
+                    for pk in ids:
+                        try:
+                            with transaction.atomic():
+                                model.all_objects.filter(pk=pk).delete()
+                            purged += 1
+                        except (ProtectedError, RestrictedError) as error:
+                            kept.add(pk)
+                            self.stderr.write(f'{model._meta.label} {pk}: {error.args[0]}')
+                if pause:
+                    time.sleep(pause)
+            if purged:
+                self.stdout.write(f'{model._meta.label}: {purged} records purged.')
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from appsutils.staticfiles import asset_sizes, template_static_paths
+
+
+class Command(BaseCommand):
+    """ Report the bytes a page load transfers for the assets of a template, and those saved by the compression and
+    the immutable caching of STATIC_COMPRESSED, from the files collected in STATIC_ROOT, e.g.:
+
+        STATIC_COMPRESSED=True manage.py collectstatic --noinput
+        STATIC_COMPRESSED=True manage.py static_report layouts/base.html
+
+    The first visit transfers the smallest copy of every asset (Brotli, else gzip, else the original); the repeat
+    visits transfer nothing for the hashed assets, served from the browser cache without revalidation.
+    """
+    help = 'Report the bytes saved per page load by the compressed and immutable static files of a template.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('template', nargs='?', default='layouts/base.html', help='Template of the page.')
+
+    def handle(self, *args, template: str, **options):
+        rows = []
+        for path in template_static_paths(template):
+            try:
+                rows.append((path, asset_sizes(path)))
+            except (FileNotFoundError, ValueError):
+                raise CommandError(f'{path} is not collected, run collectstatic first.')
+
+        original = transferred = immutable = 0
+        for path, sizes in rows:
+            smallest = min(size for size in (sizes['size'], sizes['gzip'], sizes['brotli']) if size is not None)
+            hashed = sizes['name'] != path
+            original += sizes['size']
+            transferred += smallest
+            immutable += hashed
+            gzip = sizes['gzip'] if sizes['gzip'] is not None else '-'
+            brotli = sizes['brotli'] if sizes['brotli'] is not None else '-'
+            self.stdout.write(
+                f'{path}: {sizes["size"]} B, gzip {gzip} B, brotli {brotli} B, '
+                f'{"immutable" if hashed else "revalidated"}'
+            )
+
+        saved = original - transferred
+        percent = saved / original * 100 if original else 0.0
+        self.stdout.write(
+            f'First visit: {transferred} B transferred instead of {original} B, {saved} B saved ({percent:.0f}%).'
+        )
+        self.stdout.write(
+            f'Repeat visits: {immutable} of {len(rows)} assets served from the browser cache without a request.'
+        )
+        if not settings.STATIC_COMPRESSED:
+            self.stdout.write(self.style.WARNING('STATIC_COMPRESSED is not set: the assets are served uncompressed.'))
@@ -0,0 +1,65 @@
+import json
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from appsutils.db import table_storage
+
+
+class Command(BaseCommand):
+    """ Report the storage of the tables and of their indexes, and compare it with a previous report, e.g. around a
+    migration:
+
+        manage.py storage_report tickets_ticket --output before.json
+        manage.py migrate
+        manage.py storage_report tickets_ticket --compare before.json
+
+    On SQLite, run VACUUM before each report for the figures to exclude the free pages.
+    """
+    help = 'Report the rows and bytes of the tables and of their indexes, and compare them with a previous report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help='Tables to report, those of the installed models by default.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to report.')
+        parser.add_argument('--output', help='File to write the report to, as JSON.')
+        parser.add_argument('--compare', help='Previous report (JSON) to compare with.')
+
+    def handle(self, *args, tables, database: str, output: str, compare: str, **options):
+        tables = tables or sorted({model._meta.db_table for model in apps.get_models() if model._meta.managed})
+        baseline = {}
+        if compare:
+            with open(compare) as file:
+                baseline = json.load(file)
+        try:
+            report = {table: table_storage(table, database) for table in tables}
+        except NotImplementedError as error:
+            raise CommandError(error)
+
+        for table, storage in report.items():
+            line = (
+                f'{table}: {storage["rows"]} rows, table {storage["table_bytes"]} B, '
+                f'indexes {storage["index_bytes"]} B, {self.per_row(storage):.1f} B per row'
+            )
+            previous = baseline.get(table)
+            if previous:
+                line += ' (' + ', '.join(
+                    f'{label} {self.change(current, before)}' for label, current, before in (
+                        ('table', storage['table_bytes'], previous['table_bytes']),
+                        ('indexes', storage['index_bytes'], previous['index_bytes']),
+                        ('per row', self.per_row(storage), self.per_row(previous)),
+                    )
+                ) + ')'
+            self.stdout.write(line)
+
+        if output:
+            with open(output, 'w') as file:
+                json.dump(report, file, indent=2)
+
+    @staticmethod
+    def per_row(storage: dict) -> float:
+        return storage['row_bytes'] / storage['rows'] if storage['rows'] else 0.0
+
+    @staticmethod
+    def change(current: float, before: float) -> str:
+        return f'{(current - before) / before * 100:+.1f}%' if before else 'new'
@@ -0,0 +1,36 @@
+""" Middleware shared by the apps.
+
+Classes:
+    StaticFilesMiddleware: WhiteNoise middleware usable in the async middleware chain of the ASGI profile
+"""
+import asyncio
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """ Serve the static files with WhiteNoise, under WSGI as well as under ASGI.
+
+    WhiteNoiseMiddleware is synchronous only: under ASGI, Django would run the rest of the middleware chain and the
+    view through async_to_sync(), blocking a thread per request and defeating the async views. The static files
+    are indexed at startup (outside DEBUG), so looking a request up does not block the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the instance as a coroutine function, like django.utils.deprecation.MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
@@ -4,6 +4,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from .fields import EnumSmallIntField
+
 # Create your models here.
 
 User = settings.AUTH_USER_MODEL
@@ -23,6 +25,14 @@ class RecordStatus(enum.Enum):
         return self.name
 
 
+# Condition of the records listed by the default managers (all but DELETED, NULL included) and of the partial indexes
+# serving them: the queries repeat it as is, so that the database can prove that the index covers them. An IN list of
+# the live statuses would not do: SQLite does not match its bound parameters against the index condition.
+LIVE_RECORDS = ~models.Q(record_status=RecordStatus.DELETED)
+# Condition of the partial indexes serving the purge of the soft-deleted records
+DELETED_RECORDS = models.Q(record_status=RecordStatus.DELETED)
+
+
 class Gender(enum.Enum):
     """
     This enum class represents the gender of users.
@@ -36,6 +46,75 @@ class Gender(enum.Enum):
         return self.name
 
 
+class AuditedQuerySet(models.QuerySet):
+    """ QuerySet loading on request the audit trail foreign keys of BaseEntity (created_by, changed_by).
+
+    Public methods:
+        with_audit(): join the audit users so that accessing them does not issue one query per row
+    """
+    audit_fields = ('created_by', 'changed_by')
+
+    def with_audit(self):
+        """ Return a queryset fetching the created_by and changed_by users in the same query. """
+        return self.select_related(*self.audit_fields)
+
+
+class BaseEntityQuerySet(AuditedQuerySet):
+    """ QuerySet shared by all the models inheriting from BaseEntity.
+
+    Models can declare, as class attributes, what a listing of their records needs:
+        listing_deferred_fields: large columns not displayed in lists (e.g. TextField)
+        listing_related_fields: foreign keys displayed in lists, loaded with a join
+    """
+
+    def for_listing(self):
+        """ Return a queryset suited for list pages.
+
+        The audit foreign keys and the model's listing_related_fields are loaded with select_related() and the
+        listing_deferred_fields of the model and of the related models are deferred, so that rendering a list
+        neither pulls large text columns nor issues one query per row.
+        """
+        model = self.model
+        related_fields = getattr(model, 'listing_related_fields', ())
+        deferred_fields = list(getattr(model, 'listing_deferred_fields', ()))
+        for related_field in related_fields:
+            related_model = model._meta.get_field(related_field).related_model
+            deferred_fields += [
+                f'{related_field}__{field}' for field in getattr(related_model, 'listing_deferred_fields', ())
+            ]
+        # select_related() without arguments would replace the audit joins by all the non null foreign keys
+        queryset = self.with_audit().select_related(*related_fields) if related_fields else self.with_audit()
+        return queryset.defer(*deferred_fields)
+
+    def live(self):
+        """ Return the records not soft-deleted, with the condition of the LIVE_RECORDS partial indexes. """
+        return self.filter(LIVE_RECORDS)
+
+    def soft_delete(self, user=None) -> int:
+        """ Mark the records DELETED with one UPDATE: the default managers hide them, and `manage.py purge_deleted`
+        deletes them once expired.
+
+        Like any UPDATE, it bypasses the save() methods and the signals of the records.
+
+        :param user: the user deleting the records, recorded as changed_by
+        :returns: the number of records deleted
+        """
+        return self.filter(LIVE_RECORDS).update(
+            record_status=RecordStatus.DELETED, changed_on=timezone.now(), changed_by=user,
+        )
+
+
+class LiveManager(models.Manager):
+    """ Manager hiding the soft-deleted records, the default manager of the BaseEntity models. """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(LIVE_RECORDS)
+
+
+BaseEntityManager = LiveManager.from_queryset(BaseEntityQuerySet)
+AllBaseEntityManager = models.Manager.from_queryset(BaseEntityQuerySet)
+
+
 class BaseEntity(models.Model):
     """
     This is the base class from which all database models inherit from.
@@ -45,7 +124,14 @@ class BaseEntity(models.Model):
     changed_on
     changed_by
     record_status
+
+    The default manager `objects` provides the BaseEntityQuerySet methods, e.g. for_listing(), and hides the
+    soft-deleted records (see soft_delete()): `all_objects` returns every record. The foreign keys pointing to a
+    soft-deleted record still load it (the base manager is not filtered), the reverse relations do not list it.
     """
+    listing_deferred_fields = ()
+    listing_related_fields = ()
+
     created_on = models.DateTimeField(
         default=timezone.now,
         null=False,
@@ -69,17 +155,28 @@ class BaseEntity(models.Model):
         related_name="%(app_label)s_%(class)s_changed_by",
         related_query_name="%(app_label)s_%(class)ss_changed_by",
     )
-    record_status = models.CharField(
+    record_status = EnumSmallIntField(
+        RecordStatus,
         null=True,
         blank=True,
-        max_length=255,
-        default=RecordStatus.ACTIVE.name,
-        choices=[(record.name, record.value) for record in RecordStatus],
-    )  # Record Status is a list of Tuple
+        default=RecordStatus.ACTIVE,
+    )  # A RecordStatus member, stored as a small integer
+
+    objects = BaseEntityManager()
+    all_objects = AllBaseEntityManager()
+
+    def soft_delete(self, user=None) -> bool:
+        """ Mark the record DELETED with one UPDATE, see BaseEntityQuerySet.soft_delete().
+
+        :returns: whether the record was deleted, False when it already was
+        """
+        deleted = type(self).all_objects.filter(pk=self.pk).soft_delete(user)
+        self.record_status = RecordStatus.DELETED
+        return bool(deleted)
 
     @property
     def __view_edit__(self):
         return 'View/Edit'
 
     class Meta:
-        abstract = True  # Indicates that this is an abstract class inherited by other classes
\ No newline at end of file
+        abstract = True  # Indicates that this is an abstract class inherited by other classes
@@ -0,0 +1,129 @@
+""" Keyset (cursor) pagination for class based list views.
+
+Classes:
+    KeysetPage: one page of results and the opaque cursor to the next page
+    KeysetPaginationMixin: ListView mixin paginating on an ordered, unique key instead of OFFSET
+"""
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+class KeysetPage:
+    """ A page of objects returned by the KeysetPaginationMixin.
+
+    Attributes:
+        object_list: the objects of the page
+        next_cursor: the opaque token to request the next page, None on the last page
+        cursor: the token which was used to request this page, None on the first page
+    """
+
+    def __init__(self, object_list: List[Any], next_cursor: Optional[str], cursor: Optional[str]):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin:
+    """ Paginate a MultipleObjectMixin view (e.g. ListView) with a keyset instead of LIMIT/OFFSET.
+
+    The queryset is ordered by `keyset_ordering` (which must end with a unique field) and the page following
+    a cursor is selected with a WHERE clause on the keyset values of the last row of the previous page.
+    With an index matching `keyset_ordering`, every page costs the same as the first one.
+
+    The cursor is read from the `cursor_param` query parameter (`?after=<token>` by default).
+
+    Attributes for subclasses:
+        paginate_by: number of objects per page
+        keyset_ordering: field names, optionally prefixed with '-', defining the order of the pages
+        cursor_param: name of the query parameter holding the cursor
+    """
+    paginate_by = 25
+    keyset_ordering: Sequence[str] = ('-created_on', '-id')
+    cursor_param = 'after'
+
+    def get_ordering(self) -> Sequence[str]:
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> Tuple[None, KeysetPage, List[Any], bool]:
+        """ Return the page of the queryset following the cursor found in the request.
+
+        :param queryset: the queryset to paginate
+        :param page_size: the maximum number of objects in the page
+        :returns: a (paginator, page, object_list, is_paginated) tuple as expected by MultipleObjectMixin,
+        the paginator being always None as the total number of pages is never computed
+        :raises Http404: when the cursor is not a valid token for this view
+        """
+        cursor = self.request.GET.get(self.cursor_param) or None
+        queryset = queryset.order_by(*self.keyset_ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(self.decode_cursor(queryset, cursor)))
+
+        # One extra row tells whether there is a next page without a COUNT query
+        object_list = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(object_list) > page_size:
+            object_list = object_list[:page_size]
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        page = KeysetPage(object_list, next_cursor, cursor)
+        return None, page, object_list, page.has_other_pages()
+
+    def encode_cursor(self, obj: Any) -> str:
+        """ Return the opaque token pointing right after the given object. """
+        values = [getattr(obj, field.lstrip('-')) for field in self.keyset_ordering]
+        # isoformat() keeps the microseconds, which DjangoJSONEncoder would truncate
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        payload = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, queryset: QuerySet, cursor: str) -> List[Any]:
+        """ Return the keyset values held by the token.
+
+        :raises Http404: when the token cannot be decoded
+        """
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(payload)
+            if not isinstance(values, list) or len(values) != len(self.keyset_ordering):
+                raise ValueError
+            return [
+                queryset.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.keyset_ordering, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise Http404('Invalid cursor.')
+
+    def keyset_filter(self, values: List[Any]) -> Q:
+        """ Return the condition selecting the rows strictly after the given keyset values.
+
+        For an ordering (a, -b) and values (x, y): a > x OR (a = x AND b < y).
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.keyset_ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
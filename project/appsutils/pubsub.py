@@ -0,0 +1,130 @@
+""" Publish/subscribe of events, between the code changing the data and the event streams of the clients.
+
+The synchronous code (views, signal receivers, in any thread) publishes messages to named channels; the ASGI
+applications subscribe to channels from their event loop and receive the messages in order. The broker is chosen by
+EVENTS_BROKER: LocalBroker delivers the messages published in its own process only, which suits a single ASGI
+worker. Several workers need a broker relaying the messages between the processes (e.g. over Redis pub/sub),
+implementing the Broker interface.
+
+Classes:
+    Subscription: the messages of some channels, received by an event loop
+    Broker: the interface of the brokers
+    LocalBroker: in-process broker
+
+Functions:
+    get_broker: return the broker of EVENTS_BROKER
+"""
+import asyncio
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """ The messages published to some channels, queued for the event loop which subscribed.
+
+    When the subscriber falls behind by more than queue_size messages, the queued messages are dropped and get()
+    returns None: the subscriber has to reload the state the messages were updating.
+    """
+
+    def __init__(self, broker: 'Broker', channels: Iterable[str], queue_size: int):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.lost = False
+
+    def deliver(self, message: dict):
+        """ Queue the message, from any thread. """
+        try:
+            self.loop.call_soon_threadsafe(self.put, message)
+        except RuntimeError:
+            pass    # The event loop is closed: the subscriber is gone
+
+    def put(self, message: dict):
+        if self.lost:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.lost = True
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[dict]:
+        """ Return the next message, waiting for it, or None when messages were lost since the previous one. """
+        message = await self.queue.get()
+        if message is None:
+            self.lost = False
+        return message
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """ Interface of the brokers: publish() is called by synchronous code, subscribe() from an event loop. """
+
+    def publish(self, channel: str, message: dict):
+        """ Send the message (JSON serializable) to the subscribers of the channel. """
+        raise NotImplementedError
+
+    def has_subscribers(self, channel: str) -> bool:
+        """ Return whether the channel may have subscribers, to skip building messages nobody receives. """
+        return True
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """ Return a subscription to the channels, to be closed when done. """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    """ Broker delivering the messages to the subscribers of its process, without serializing them. """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.EVENTS_QUEUE_SIZE
+        self.lock = threading.Lock()
+        self.subscriptions: Dict[str, Set[Subscription]] = {}
+
+    def publish(self, channel: str, message: dict):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def has_subscribers(self, channel: str) -> bool:
+        return channel in self.subscriptions
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(self, channels, self.queue_size)
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscriptions.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self.subscriptions.pop(channel, None)
+
+
+_broker: Optional[Broker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    """ Return the broker of the process, of the EVENTS_BROKER class, created on first use. """
+    global _broker
+    with _broker_lock:     # Publishers and subscribers must share the same broker
+        if _broker is None:
+            _broker = import_string(settings.EVENTS_BROKER)()
+        return _broker
@@ -0,0 +1,75 @@
+""" Production static files: what collectstatic collects, and what the pages load.
+
+With STATIC_COMPRESSED set, collectstatic stores every asset under a content hashed name (e.g.
+argon-dashboard.3f2c1a9b4e5d.css), next to its Brotli (.br) and gzip (.gz) compressed copies. WhiteNoise serves the
+smallest copy the browser accepts, and the hashed names with `Cache-Control: max-age=315360000, public, immutable`:
+a changed asset gets a new name, so the browsers never need to revalidate them. The templates must refer to the
+assets through {% static %} to get the hashed names.
+
+Classes:
+    StaticFilesConfig: the staticfiles app, leaving the source-only files out of collectstatic
+
+Functions:
+    template_static_paths: the assets a template loads through {% static %}
+    asset_sizes: the sizes of a collected asset and of its compressed copies
+"""
+import os
+from typing import Dict, List, Optional
+
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import loader
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.templatetags.static import StaticNode
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    """ The staticfiles app (installed in place of django.contrib.staticfiles), ignoring at collectstatic:
+        - the SCSS/Sass sources of the theme and plugins, compiled to the CSS files which are served
+        - the demo assets of the theme and the source maps, used by no page
+    The files are still served by the development server (DEBUG), which finds them in STATICFILES_DIRS.
+    """
+    ignore_patterns = BaseStaticFilesConfig.ignore_patterns + ['scss', 'sass', '*.scss', 'demo', '*.map']
+
+
+def template_static_paths(template_name: str) -> List[str]:
+    """ Return the paths of the assets loaded by a template through {% static %}, in the included and parent
+    templates as well (those named by a constant), without duplicates.
+    """
+    paths = []
+    templates = [template_name]
+    seen = set()
+    while templates:
+        name = templates.pop(0)
+        if name in seen:
+            continue
+        seen.add(name)
+        nodelist = loader.get_template(name).template.nodelist
+        for node in nodelist.get_nodes_by_type(StaticNode):
+            path = node.path.var
+            if isinstance(path, str) and path not in paths:   # A constant, not a variable
+                paths.append(path)
+        for node in nodelist.get_nodes_by_type(IncludeNode):
+            if isinstance(node.template.var, str):
+                templates.append(node.template.var)
+        for node in nodelist.get_nodes_by_type(ExtendsNode):
+            if isinstance(node.parent_name.var, str):
+                templates.append(node.parent_name.var)
+    return paths
+
+
+def asset_sizes(path: str) -> Dict[str, Optional[int]]:
+    """ Return the sizes of a collected asset (STATIC_ROOT), the compressed ones being None when missing (files
+    which compress badly, e.g. images, are not compressed).
+
+    :returns: name (hashed with STATIC_COMPRESSED), size, gzip and brotli
+    :raises FileNotFoundError: the asset was not collected
+    :raises ValueError: the asset is missing from the manifest of STATIC_COMPRESSED
+    """
+    name = staticfiles_storage.stored_name(path) if hasattr(staticfiles_storage, 'stored_name') else path
+    full_path = staticfiles_storage.path(name)
+    sizes = {'name': name, 'size': os.path.getsize(full_path)}
+    for encoding, extension in (('gzip', '.gz'), ('brotli', '.br')):
+        compressed = full_path + extension
+        sizes[encoding] = os.path.getsize(compressed) if os.path.exists(compressed) else None
+    return sizes
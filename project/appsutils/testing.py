@@ -0,0 +1,53 @@
+""" Test runner of the project (TEST_RUNNER).
+
+Classes:
+    TestRunner: DiscoverRunner removing the journal files of the SQLite test databases
+"""
+import os
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """ DiscoverRunner removing the -wal and -shm files of the SQLite test databases (see configure_sqlite in
+    appsutils.db), which Django leaves behind when it deletes the databases: a new test database must not start
+    next to the journal of a previous one.
+
+    The tests run in a single process, which forgets its transition table on every commit of a workflow change (see
+    workflows.table): the periodic readings of the version are disabled, they would add queries at random to the
+    counted ones.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.single_process_settings = override_settings(WORKFLOWS_CHECK_SECONDS=float('inf'))
+        self.single_process_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.single_process_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        for connection in connections.all():
+            if connection.vendor == 'sqlite':
+                self.remove_journal(connection, connection.creation._get_test_db_name())
+        return super().setup_databases(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        databases = [
+            (connection, connection.settings_dict['NAME']) for connection in connections.all()
+            if connection.vendor == 'sqlite'
+        ]
+        super().teardown_databases(old_config, **kwargs)
+        for connection, name in databases:
+            self.remove_journal(connection, name)
+
+    @staticmethod
+    def remove_journal(connection, name: str):
+        if connection.creation.is_in_memory_db(name):
+            return
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(name + suffix):
+                os.remove(name + suffix)
@@ -1,3 +1,332 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import serializers
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.forms import modelform_factory
+from django.http import HttpResponse
+from django.test import override_settings, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.views import generic
+
+from appsutils.asynchronous import async_view
+from appsutils.checks import check_shared_cache
+from appsutils.db import reads_from_replicas, ReplicaReadMixin, ReplicaRouter, table_storage, use_replicas
+from appsutils.models import Gender, RecordStatus
+from appsutils.pubsub import LocalBroker
+from appsutils.staticfiles import asset_sizes, template_static_paths
+
+from groups.models import Group, GroupMember
+from tickets.models import Ticket
+from workflows.models import State, Workflow
+
+
+class AuditedQuerySetTests(TestCase):
+    """ Loading the audit foreign keys of BaseEntity models in constant queries. """
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user{i}', first_name=f'User {i}') for i in range(10)
+        )
+        users = list(get_user_model().objects.all())
+        Ticket.objects.bulk_create(
+            Ticket(summary=f'Ticket {i}', created_by=users[i % 10], changed_by=users[(i + 1) % 10])
+            for i in range(500)
+        )
+        group = Group.objects.create(name='Support')
+        GroupMember.objects.bulk_create(GroupMember(group=group, user=user, created_by=user) for user in users)
+
+    def test_with_audit_loads_500_tickets_and_their_audit_users_in_one_query(self):
+        with self.assertNumQueries(1):
+            names = [(str(ticket.created_by), str(ticket.changed_by)) for ticket in Ticket.objects.with_audit()]
+        self.assertEqual(len(names), 500)
+
+    def test_group_member_listing_renders_in_one_query(self):
+        with self.assertNumQueries(1):
+            members = [(str(member), member.group.name) for member in GroupMember.objects.for_listing()]
+        self.assertEqual(len(members), 10)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """ Routing of the reads to the replicas. """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.router.replicas = ['replica_0', 'replica_1']
+
+    def test_reads_go_to_replicas_inside_use_replicas_only(self):
+        self.assertEqual(self.router.db_for_read(Ticket), 'default')
+        with use_replicas():
+            self.assertIn(self.router.db_for_read(Ticket), ['replica_0', 'replica_1'])
+            self.assertEqual(self.router.db_for_write(Ticket), 'default')
+        self.assertEqual(self.router.db_for_read(Ticket), 'default')
+
+    def test_reads_stay_on_primary_without_replicas(self):
+        self.router.replicas = []
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Ticket), 'default')
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'tickets'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'tickets'))
+
+    def test_views_render_their_safe_requests_inside_use_replicas(self):
+        seen = []
+
+        class View(ReplicaReadMixin, generic.TemplateView):
+            def get(self, request, *args, **kwargs):
+                seen.append(reads_from_replicas.get())
+                return HttpResponse()
+
+            def post(self, request, *args, **kwargs):
+                return self.get(request, *args, **kwargs)
+
+        View.as_view()(RequestFactory().get('/'))
+        View.as_view()(RequestFactory().post('/'))
+        self.assertEqual(seen, [True, False])
+
+
+class SoftDeleteTests(TestCase):
+    """ Soft-deleted records: hidden by the default managers, then purged once expired. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        Ticket.objects.bulk_create(Ticket(summary=f'Ticket {i}') for i in range(10))
+
+    def test_soft_delete_is_one_update(self):
+        with self.assertNumQueries(1):
+            count = Ticket.objects.filter(summary__in=['Ticket 1', 'Ticket 2']).soft_delete(self.user)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(Ticket.objects.count(), 8)
+        self.assertEqual(Ticket.all_objects.count(), 10)
+        deleted = Ticket.all_objects.filter(record_status=RecordStatus.DELETED)
+        self.assertEqual(set(deleted.values_list('changed_by', flat=True)), {self.user.pk})
+
+    def test_records_without_status_are_live(self):
+        Ticket.objects.update(record_status=None)
+        self.assertEqual(Ticket.objects.count(), 10)
+
+    def test_purge_deletes_the_expired_records_by_batches(self):
+        now = timezone.now()
+        group = Group.objects.create(name='Support')
+        Ticket.objects.update(group=group)
+        Ticket.objects.filter(summary__in=['Ticket 1', 'Ticket 2', 'Ticket 3']).soft_delete()
+        Ticket.all_objects.filter(summary='Ticket 3').update(changed_on=now - timedelta(days=1))
+        Ticket.all_objects.filter(record_status=RecordStatus.DELETED).exclude(summary='Ticket 3').update(
+            changed_on=now - timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS + 1),
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            call_command('purge_deleted', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(Ticket.all_objects.count(), 8)
+        self.assertTrue(Ticket.all_objects.filter(summary='Ticket 3').exists())
+        self.assertTrue(Group.objects.exists())
+        deletes = [query for query in context.captured_queries if query['sql'].startswith('DELETE FROM "tickets')]
+        self.assertEqual(len(deletes), 2)   # One batch per ticket
+
+    def test_purge_keeps_the_referenced_records_and_purges_the_others(self):
+        workflow = Workflow.objects.create(name='Network')
+        states = [State.objects.create(workflow=workflow, name=name, label=name) for name in 'abcd']
+        Ticket.objects.filter(summary='Ticket 1').update(status=states[0])     # Protects the state
+        State.objects.filter(workflow=workflow).soft_delete()
+        State.all_objects.filter(workflow=workflow).update(
+            changed_on=timezone.now() - timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS + 1),
+        )
+
+        stderr = StringIO()
+        call_command('purge_deleted', batch_size=2, stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(list(State.all_objects.filter(workflow=workflow)), [states[0]])
+        self.assertIn(f'workflows.State {states[0].pk}:', stderr.getvalue())
+
+    def test_admin_lists_the_deleted_records(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        Ticket.objects.filter(summary='Ticket 1').soft_delete()
+
+        response = self.client.get(reverse('admin:tickets_ticket_changelist'), {'record_status__exact': 'DELETED'})
+
+        self.assertEqual([ticket.summary for ticket in response.context['cl'].result_list], ['Ticket 1'])
+
+
+class EnumSmallIntFieldTests(TestCase):
+    """ Enums stored as small integers, used as enum members. """
+
+    def test_members_are_stored_as_their_code(self):
+        ticket = Ticket.objects.create(summary='Printer')
+        ticket.soft_delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT record_status FROM tickets_ticket WHERE id = %s', [ticket.pk])
+            self.assertEqual(cursor.fetchone()[0], 2)
+        self.assertIs(Ticket.all_objects.get(pk=ticket.pk).record_status, RecordStatus.DELETED)
+        for value in (RecordStatus.DELETED, 'DELETED', 2):
+            self.assertEqual(list(Ticket.all_objects.filter(record_status=value)), [ticket])
+
+    def test_forms_and_serialization_use_the_names(self):
+        form = modelform_factory(get_user_model(), fields=['gender', 'record_status'])({
+            'gender': 'FEMALE', 'record_status': 'ACTIVE_LOCKED',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.instance.gender, Gender.FEMALE)
+        self.assertEqual(form.instance.record_status, RecordStatus.ACTIVE_LOCKED)
+        self.assertIn('<option value="MALE">Male</option>', str(form['gender']))
+
+        self.assertFalse(modelform_factory(Ticket, fields=['record_status'])({'record_status': 'LOST'}).is_valid())
+        data = serializers.serialize('json', [Ticket(pk=1, summary='Printer')], fields=['record_status'])
+        self.assertEqual(next(serializers.deserialize('json', data)).object.record_status, RecordStatus.ACTIVE)
+        self.assertIn('"record_status": "ACTIVE"', data)
+
+    def test_invalid_values_are_rejected(self):
+        field = Ticket._meta.get_field('record_status')
+        for value in ('LOST', 9):
+            with self.assertRaises(ValidationError):
+                field.to_python(value)
+
+
+class SqliteConfigurationTests(TestCase):
+
+    def test_connections_wait_for_the_lock(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT_MS)
+
+    def test_storage_report(self):
+        Ticket.objects.bulk_create(Ticket(summary=f'Ticket {i}') for i in range(50))
+        storage = table_storage('tickets_ticket')
+
+        self.assertEqual(storage['rows'], 50)
+        self.assertGreater(storage['index_bytes'], 0)
+        self.assertGreater(storage['table_bytes'], storage['row_bytes'])
+        output = StringIO()
+        call_command('storage_report', 'tickets_ticket', stdout=output)
+        self.assertIn('tickets_ticket: 50 rows', output.getvalue())
+
+
+class AsyncViewTests(TransactionTestCase):
+    """ Synchronous views served as async views, in the views thread pool (TransactionTestCase: the pool threads
+    have their own database connections).
+    """
+
+    def test_view_is_run_and_rendered_in_the_pool(self):
+        Ticket.objects.create(summary='Printer')
+        threads = []
+
+        class View(generic.ListView):
+            model = Ticket
+            template_name = 'tickets/ticket_list.html'
+
+            def get(self, request, *args, **kwargs):
+                threads.append(threading.current_thread().name)
+                return super().get(request, *args, **kwargs)
+
+        view = async_view(View.as_view())
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        response = async_to_sync(view)(request)
+        self.assertTrue(response.is_rendered)
+        self.assertContains(response, 'Printer')
+        self.assertTrue(threads[0].startswith('async-view'))
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """ In-process publish/subscribe, from the threads to the event loops. """
+
+    def test_messages_published_from_threads_are_received_in_order(self):
+        broker = LocalBroker(queue_size=3)
+
+        async def receive():
+            subscription = broker.subscribe(['a', 'b'])
+            publisher = threading.Thread(target=lambda: [broker.publish(channel, {'n': n}) for n, channel in (
+                (1, 'a'), (2, 'other'), (3, 'b'),
+            )])
+            publisher.start()
+            received = [await subscription.get(), await subscription.get()]
+            publisher.join()
+            subscription.close()
+            return received
+
+        self.assertEqual(async_to_sync(receive)(), [{'n': 1}, {'n': 3}])
+        self.assertFalse(broker.has_subscribers('a'))
+
+    def test_lagging_subscribers_are_told_about_the_lost_messages(self):
+        broker = LocalBroker(queue_size=2)
+
+        async def receive():
+            subscription = broker.subscribe(['a'])
+            for n in range(5):
+                broker.publish('a', {'n': n})
+            await asyncio.sleep(0)  # The deliveries are scheduled on the loop
+            received = [await subscription.get()]
+            broker.publish('a', {'n': 5})
+            received.append(await subscription.get())
+            return received
+
+        self.assertEqual(async_to_sync(receive)(), [None, {'n': 5}])
+
+
+class StaticFilesTests(SimpleTestCase):
+    """ Collection of the production static files, and the assets loaded by the pages. """
+
+    def test_template_static_paths_follow_the_includes(self):
+        paths = template_static_paths('layouts/base.html')
+
+        self.assertIn('assets/css/argon-dashboard.css', paths)
+        self.assertIn('assets/js/plugins/jquery/dist/jquery.min.js', paths)    # From includes/scripts.html
+        self.assertEqual(len(paths), len(set(paths)))
+
+    def test_collectstatic_compresses_hashes_and_prunes(self):
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as root:
+            for name, content in (
+                ('assets/css/theme.css', 'body { color: red; }\n' * 100),
+                ('assets/scss/theme.scss', '$red: red;'),
+                ('assets/demo/demo.js', 'demo();'),
+                ('assets/js/theme.js.map', '{}'),
+            ):
+                os.makedirs(os.path.join(source, os.path.dirname(name)), exist_ok=True)
+                with open(os.path.join(source, name), 'w') as file:
+                    file.write(content)
+
+            with override_settings(
+                STATICFILES_DIRS=[source], STATIC_ROOT=root,
+                STATICFILES_STORAGE='whitenoise.storage.CompressedManifestStaticFilesStorage',
+            ):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                sizes = asset_sizes('assets/css/theme.css')
+
+            self.assertRegex(sizes['name'], r'^assets/css/theme\.[0-9a-f]{12}\.css$')
+            self.assertLess(sizes['brotli'], sizes['gzip'])
+            self.assertLess(sizes['gzip'], sizes['size'])
+            self.assertEqual(sorted(os.listdir(os.path.join(root, 'assets'))), ['css'])
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """ The deployments are warned about a default cache local to each process. """
+
+    def check(self, backend: str) -> list:
+        with override_settings(CACHES={'default': {'BACKEND': backend}}):
+            return [warning.id for warning in check_shared_cache(None)]
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual(self.check('django.core.cache.backends.locmem.LocMemCache'), ['appsutils.W001'])
+        self.assertEqual(self.check('django.core.cache.backends.filebased.FileBasedCache'), [])
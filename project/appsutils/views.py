@@ -1,3 +1,22 @@
-from django.shortcuts import render
+""" Views shared by the apps.
 
-# Create your views here.
+Classes:
+    SoftDeleteView: DeleteView marking the object DELETED instead of deleting its row
+"""
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponseRedirect
+from django.views import generic
+
+
+class SoftDeleteView(LoginRequiredMixin, generic.DeleteView):
+    """ Confirm (GET) then soft-delete (POST) a BaseEntity object with one UPDATE, see BaseEntity.soft_delete().
+
+    The object disappears from the default managers, its row and related rows are deleted by `manage.py
+    purge_deleted` once expired.
+    """
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        self.object.soft_delete(request.user)
+        return HttpResponseRedirect(success_url)
@@ -0,0 +1,125 @@
+""" Synthetic data sets for the benchmarks, inserted with bulk_create at any scale.
+
+Every generated user logs in with the password BENCHMARK_PASSWORD, under a username starting with
+BENCHMARK_USER_PREFIX, so that the scenarios (see benchmarks.scenarios) can log in as any of them.
+
+Classes:
+    Scale: the number of records to generate of every kind
+
+Functions:
+    generate: insert a data set of the given scale
+"""
+import random
+from dataclasses import dataclass
+from io import StringIO
+from typing import Dict
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Max
+
+from comments.models import Comment
+from groups.models import Group, GroupMember
+from tickets.models import Ticket
+from tickets.rendering import description_digest, render_markdown
+from workflows.table import get_transition_table
+
+BENCHMARK_USER_PREFIX = 'bench-user-'
+BENCHMARK_PASSWORD = 'benchmark'
+
+WORDS = (
+    'printer network password email laptop screen keyboard vpn access account server disk backup license '
+    'install update crash slow error timeout login folder share phone badge meeting room projector cable wifi'
+).split()
+
+
+@dataclass
+class Scale:
+    users: int = 100
+    groups: int = 10
+    memberships: int = 3     # Groups per user, at most the number of groups
+    tickets: int = 10000
+    comments: int = 30000
+    batch_size: int = 2000
+
+
+def generate(scale: Scale, seed: int = 0) -> Dict[str, int]:
+    """ Insert users, groups, memberships, tickets and comments, by batches of scale.batch_size.
+
+    The records are inserted with bulk_create(), which bypasses the signals: the group ticket counters are rebuilt
+    at the end. The descriptions are drawn from a small pool of Markdown texts, each rendered once.
+
+    :param scale: the number of records of every kind
+    :param seed: the seed of the random choices, the same seed generating the same data set
+    :returns: the number of records inserted, by kind
+    """
+    rng = random.Random(seed)
+    batch_size = scale.batch_size
+    with transaction.atomic():
+        User = get_user_model()
+        first = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).count()
+        last_id = User.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        password = make_password(BENCHMARK_PASSWORD)    # Hashed once: hashing is designed to be slow
+        users = User.objects.bulk_create((
+            User(username=f'{BENCHMARK_USER_PREFIX}{i}', email=f'{BENCHMARK_USER_PREFIX}{i}@example.com',
+                 first_name='Bench', phone_number='0000', password=password)
+            for i in range(first, first + scale.users)
+        ), batch_size=batch_size)
+        user_ids = list(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).values_list('id', flat=True))
+
+        first = Group.objects.filter(name__startswith='Benchmark group ').count()
+        # The slugs are allocated by the bulk_create() of the groups, at once
+        groups = Group.objects.bulk_create((
+            Group(name=f'Benchmark group {i}')
+            for i in range(first, first + scale.groups)
+        ), batch_size=batch_size)
+        group_ids = list(Group.objects.filter(name__startswith='Benchmark group ').values_list('id', flat=True))
+
+        # bulk_create() does not set the primary keys on every database: the new users are those after last_id
+        memberships = GroupMember.objects.bulk_create((
+            GroupMember(group_id=group_id, user_id=user_id)
+            for user_id in User.objects.filter(id__gt=last_id).values_list('id', flat=True)
+            for group_id in rng.sample(group_ids, min(scale.memberships, len(group_ids)))
+        ), batch_size=batch_size)
+
+        table = get_transition_table()
+        descriptions = [
+            f'# {" ".join(rng.choices(WORDS, k=3))}\n\n{" ".join(rng.choices(WORDS, k=40))}\n\n'
+            f'* **{rng.choice(WORDS)}**'
+            for _ in range(50)
+        ]
+        rendered = [(text, render_markdown(text), description_digest(text)) for text in descriptions]
+        ticket_count = 0
+        for start in range(0, scale.tickets, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, scale.tickets)):
+                group_id = rng.choice(group_ids) if group_ids else None
+                text, html, digest = rng.choice(rendered)
+                batch.append(Ticket(
+                    summary=f'{rng.choice(WORDS)} {rng.choice(WORDS)} {i}', description=text, description_html=html,
+                    description_digest=digest, group_id=group_id, status_id=table.initial_state(group_id),
+                    created_by_id=rng.choice(user_ids) if user_ids else None,
+                ))
+            ticket_count += len(Ticket.objects.bulk_create(batch))
+
+        ticket_ids = list(Ticket.objects.values_list('id', flat=True))
+        ticket_type = ContentType.objects.get_for_model(Ticket)
+        comment_count = 0
+        for start in range(0, scale.comments if ticket_ids else 0, batch_size):
+            comment_count += len(Comment.objects.bulk_create(
+                Comment(
+                    target_type=ticket_type, target_id=rng.choice(ticket_ids), author='bench',
+                    text=' '.join(rng.choices(WORDS, k=12)), approved_comment=rng.random() < 0.9,
+                    created_by_id=rng.choice(user_ids) if user_ids else None,
+                )
+                for _ in range(start, min(start + batch_size, scale.comments))
+            ))
+        call_command('rebuild_group_stats', stdout=StringIO())
+
+    return {
+        'users': len(users), 'groups': len(groups), 'memberships': len(memberships), 'tickets': ticket_count,
+        'comments': comment_count,
+    }
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.data import generate, Scale
+
+
+class Command(BaseCommand):
+    """ Insert a synthetic data set for the benchmarks (see benchmarks.data), e.g. on a scratch database:
+
+        DATABASE_URL=sqlite:////tmp/bench.sqlite3 manage.py generate_benchmark_data --tickets 100000
+
+    Running it again adds another data set of the same scale.
+    """
+    help = 'Insert users, groups, memberships, tickets and comments for the benchmarks.'
+
+    def add_arguments(self, parser):
+        defaults = Scale()
+        parser.add_argument('--users', type=int, default=defaults.users, help='Number of users.')
+        parser.add_argument('--groups', type=int, default=defaults.groups, help='Number of groups.')
+        parser.add_argument('--memberships', type=int, default=defaults.memberships, help='Groups per user.')
+        parser.add_argument('--tickets', type=int, default=defaults.tickets, help='Number of tickets.')
+        parser.add_argument('--comments', type=int, default=defaults.comments, help='Number of ticket comments.')
+        parser.add_argument('--batch-size', type=int, default=defaults.batch_size, help='Rows per INSERT.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random data.')
+
+    def handle(self, *args, users: int, groups: int, memberships: int, tickets: int, comments: int,
+               batch_size: int, seed: int, **options):
+        scale = Scale(users, groups, memberships, tickets, comments, batch_size)
+        counts = generate(scale, seed)
+        self.stdout.write(self.style.SUCCESS(
+            'Inserted ' + ', '.join(f'{count} {kind}' for kind, count in counts.items()) + '.'
+        ))
@@ -0,0 +1,106 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from benchmarks.micro import MICRO_BENCHMARKS, run_micro_benchmarks
+from benchmarks.scenarios import default_tasks, ScenarioRunner
+from tickets.models import Ticket
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class Command(BaseCommand):
+    """ Run the micro-benchmarks and, with --url, the load scenario, and write the results as JSON for comparison
+    across commits, e.g.:
+
+        manage.py generate_benchmark_data --tickets 100000
+        gunicorn core.wsgi:application -w 1 &
+        manage.py run_benchmarks --url http://127.0.0.1:8000 --output after.json --compare before.json
+
+    The server must use the same database as the command, and allow the command's address in
+    MONITORING_METRICS_ALLOWED_IPS for the query counts.
+    """
+    help = 'Run the micro-benchmarks and the load scenario, output the results as JSON and compare them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--micro', nargs='*', choices=sorted(MICRO_BENCHMARKS), help='Micro-benchmarks to run, '
+                            'all by default, none when the option has no value.')
+        parser.add_argument('--rounds', type=int, default=20, help='Rounds of every micro-benchmark.')
+        parser.add_argument('--url', help='Base URL of the server to load, the scenario is skipped when omitted.')
+        parser.add_argument('--users', type=int, default=10, help='Number of virtual users of the scenario.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds of the scenario.')
+        parser.add_argument('--output', help='File to write the results to, as JSON.')
+        parser.add_argument('--compare', help='Results of a previous run (JSON) to compare with.')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Slowdown, in percent, reported as a regression by --compare.')
+
+    def handle(self, *args, micro, rounds: int, url: str, users: int, duration: float, output: str, compare: str,
+               threshold: float, **options):
+        baseline = None
+        if compare:
+            with open(compare) as file:
+                baseline = json.load(file)
+
+        results = {
+            'commit': current_commit(), 'date': timezone.now().isoformat(), 'database': connection.vendor,
+            'micro': {}, 'scenario': {},
+        }
+        if micro != []:
+            results['micro'] = run_micro_benchmarks(micro, rounds=rounds)
+            for name, stats in results['micro'].items():
+                self.stdout.write(
+                    f'{name}: median {stats["median"] * 1e6:.1f} µs, iqr {stats["iqr"] * 1e6:.1f} µs, '
+                    f'{stats["ops"]:.0f} ops/s ({stats["rounds"]} rounds of {stats["iterations"]})'
+                )
+        if url:
+            ticket_ids = list(Ticket.objects.values_list('id', flat=True)[:1000])
+            if not ticket_ids:
+                raise CommandError('No ticket to request, see generate_benchmark_data.')
+            results['scenario'] = ScenarioRunner(url, default_tasks(ticket_ids), users, duration).run()
+            results['scenario_settings'] = {'url': url, 'users': users, 'duration': duration}
+            for name, stats in results['scenario'].items():
+                queries = f', {stats["queries"]:.1f} queries' if stats['queries'] is not None else ''
+                self.stdout.write(
+                    f'{name}: {stats["requests"]} requests ({stats["failures"]} failures), {stats["rps"]:.1f}/s, '
+                    f'p50 {stats["p50"]:.1f} ms, p95 {stats["p95"]:.1f} ms, p99 {stats["p99"]:.1f} ms{queries}'
+                )
+
+        if output:
+            with open(output, 'w') as file:
+                json.dump(results, file, indent=2)
+        if baseline:
+            self.compare(baseline, results, threshold)
+
+    def compare(self, baseline: dict, results: dict, threshold: float):
+        """ Print the change of every measure present in both runs, flagging the slowdowns above threshold. """
+        self.stdout.write(f'Compared with {baseline.get("commit") or "the baseline"}:')
+        regressions = 0
+        rows = [
+            (f'{name} median', stats['median'], baseline['micro'][name]['median'])
+            for name, stats in results['micro'].items() if name in baseline.get('micro', {})
+        ]
+        for name, stats in results['scenario'].items():
+            previous = baseline.get('scenario', {}).get(name)
+            if previous:
+                rows += [(f'{name} {measure}', stats[measure], previous[measure]) for measure in ('p50', 'p95', 'p99')]
+                if stats['queries'] is not None and previous.get('queries') is not None:
+                    rows.append((f'{name} queries', stats['queries'], previous['queries']))
+        for label, value, previous in rows:
+            change = (value - previous) / previous * 100 if previous else 0.0
+            regression = change > threshold
+            regressions += regression
+            line = f'  {label}: {previous:.4g} -> {value:.4g} ({change:+.1f}%)'
+            self.stdout.write(self.style.ERROR(line + ' REGRESSION') if regression else line)
+        if regressions:
+            self.stdout.write(self.style.ERROR(f'{regressions} regressions above {threshold:g}%.'))
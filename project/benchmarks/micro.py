@@ -0,0 +1,119 @@
+""" Micro-benchmarks of the model save paths, timed the way pytest-benchmark does.
+
+A benchmark is a setup function, registered with @micro_benchmark, returning the callable to time: the setup
+(creating the records the callable needs) is not timed. Every benchmark runs in a transaction rolled back at the
+end, so the database is left unchanged (and the on_commit callbacks, e.g. the jobs enqueued by Ticket.save, are
+never run nor timed).
+
+Functions:
+    micro_benchmark: decorator registering a benchmark
+    time_callable: time a callable over calibrated rounds and return its statistics
+    run_micro_benchmarks: run the registered benchmarks
+"""
+import itertools
+import statistics
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from django.db import transaction
+
+from groups.models import Group
+from tickets.models import Ticket
+
+MICRO_BENCHMARKS: Dict[str, Callable[[], Callable[[], None]]] = {}
+
+
+def micro_benchmark(name: str):
+    """ Register the decorated setup function as the benchmark `name`. """
+    def register(setup):
+        MICRO_BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def time_callable(function: Callable[[], None], rounds: int = 20, min_time: float = 0.005,
+                  warmup: int = 1) -> Dict[str, float]:
+    """ Time the function over rounds of calls, each round lasting at least min_time.
+
+    As with pytest-benchmark, the number of calls per round is calibrated so that every round is long enough for
+    the timer resolution, and the statistics are those of the time per call over the rounds.
+
+    :returns: min, max, mean, stddev, median and iqr of the time per call in seconds, ops (calls per second of the
+        median), rounds and iterations (calls per round)
+    """
+    for _ in range(warmup):
+        function()
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        if time.perf_counter() - start >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        timings.append((time.perf_counter() - start) / iterations)
+    quartiles = statistics.quantiles(timings, n=4) if len(timings) > 1 else [timings[0]] * 3
+    median = statistics.median(timings)
+    return {
+        'min': min(timings), 'max': max(timings), 'mean': statistics.mean(timings),
+        'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0, 'median': median,
+        'iqr': quartiles[2] - quartiles[0], 'ops': 1 / median if median else 0.0,
+        'rounds': rounds, 'iterations': iterations,
+    }
+
+
+def run_micro_benchmarks(names: Optional[Iterable[str]] = None, rounds: int = 20) -> Dict[str, Dict[str, float]]:
+    """ Run the registered benchmarks, all of them when names is None, and return their statistics by name. """
+    results = {}
+    for name in names or MICRO_BENCHMARKS:
+        with transaction.atomic():
+            results[name] = time_callable(MICRO_BENCHMARKS[name](), rounds=rounds)
+            transaction.set_rollback(True)
+    return results
+
+
+@micro_benchmark('ticket_create')
+def ticket_create():
+    group = Group.objects.create(name='Micro benchmark group')
+    numbers = itertools.count()
+
+    def create():
+        number = next(numbers)
+        Ticket(summary=f'Ticket {number}', description=f'Ticket *{number}*', group=group).save()
+    return create
+
+
+@micro_benchmark('ticket_update')
+def ticket_update():
+    ticket = Ticket.objects.create(summary='Ticket', description='Unchanged *description*')
+    numbers = itertools.count()
+
+    def update():
+        ticket.summary = f'Ticket {next(numbers)}'
+        ticket.save()
+    return update
+
+
+@micro_benchmark('group_create')
+def group_create():
+    numbers = itertools.count()
+
+    def create():
+        Group(name=f'Micro benchmark group {next(numbers)}').save()   # save() slugifies the name
+    return create
+
+
+@micro_benchmark('group_rename')
+def group_rename():
+    group = Group.objects.create(name='Micro benchmark group')
+    numbers = itertools.count()
+
+    def rename():
+        group.name = f'Micro benchmark group {next(numbers)}'
+        group.save()
+    return rename
@@ -0,0 +1,193 @@
+""" Load scenarios run against a server, in the manner of locust: virtual users, each in its own thread, log in then
+pick weighted tasks until the end of the run.
+
+The latencies are measured per endpoint by the clients, and the number of database queries per request is read
+from the /monitoring/metrics endpoint of the server (see monitoring.middleware) at the end of the run. Being
+aggregated per process since its start, the query counts are exact with a single process server started for the
+run, e.g. `gunicorn core.wsgi:application -w 1` (or `manage.py runserver --noreload`).
+
+Classes:
+    Session: HTTP client of a virtual user, keeping its cookies
+    Task: a weighted request of the scenario
+    ScenarioRunner: run the virtual users and collect the latencies
+
+Functions:
+    percentile: nearest-rank percentile of sorted values
+    parse_query_counts: read the queries per request of every view from the Prometheus metrics
+    default_tasks: the tasks of the default scenario
+"""
+import http.client
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from .data import BENCHMARK_PASSWORD, BENCHMARK_USER_PREFIX
+
+METRIC_LINE = re.compile(r'^django_http_request_db_queries_(sum|count)\{view="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """ Return the nearest-rank q-th percentile (0 < q <= 100) of the values, which must be sorted. """
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * q // 100))  # Ceiling
+    return values[int(rank) - 1]
+
+
+def parse_query_counts(metrics: str) -> Dict[str, float]:
+    """ Return the mean number of queries per request of every view found in the Prometheus metrics text. """
+    totals: Dict[str, Dict[str, float]] = {}
+    for kind, view, value in METRIC_LINE.findall(metrics):
+        totals.setdefault(view, {})[kind] = float(value)
+    return {view: total['sum'] / total['count'] for view, total in totals.items() if total.get('count')}
+
+
+class Session:
+    """ HTTP client of a virtual user, reusing its connection and sending back the cookies the server set. """
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.netloc, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.origin = f'{url.scheme}://{url.netloc}'
+        self.cookies = SimpleCookie()
+
+    def request(self, method: str, path: str, data: Optional[dict] = None) -> Tuple[int, bytes]:
+        """ Send the request (data being form encoded) and return the status and body of the response. """
+        headers = {'Host': self.connection.host}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={morsel.value}' for name, morsel in self.cookies.items())
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Referer'] = self.origin + self.prefix + path     # Checked by the CSRF protection over HTTPS
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()     # Reopened by the next request
+            raise
+        for header in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(header)
+        return response.status, content
+
+    def close(self):
+        self.connection.close()
+
+
+@dataclass
+class Task:
+    name: str                               # Endpoint name in the results, e.g. 'tickets:list'
+    weight: int                             # Relative frequency of the task
+    path: Callable[[random.Random], str]    # Return the path to request, e.g. a random ticket
+
+
+class ScenarioRunner:
+    """ Run virtual users against a server for a given duration.
+
+    Every user logs in (timed as the 'login' endpoint) with one of the generated benchmark accounts, then requests
+    the tasks, chosen at random according to their weights, back to back.
+    """
+
+    def __init__(self, base_url: str, tasks: List[Task], users: int = 10, duration: float = 30.0, seed: int = 0,
+                 usernames: Optional[List[str]] = None):
+        self.base_url = base_url
+        self.tasks = tasks
+        self.users = users
+        self.duration = duration
+        self.seed = seed
+        self.usernames = usernames or [f'{BENCHMARK_USER_PREFIX}{i}' for i in range(users)]
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+
+    def record(self, name: str, latency: Optional[float]):
+        with self.lock:
+            self.latencies.setdefault(name, [])
+            self.failures.setdefault(name, 0)
+            if latency is None:
+                self.failures[name] += 1
+            else:
+                self.latencies[name].append(latency)
+
+    def timed(self, session: Session, name: str, method: str, path: str, data=None, expected=(200,)) -> bool:
+        start = time.perf_counter()
+        try:
+            status, content = session.request(method, path, data)
+        except (OSError, http.client.HTTPException):
+            status = None
+        self.record(name, time.perf_counter() - start if status in expected else None)
+        return status in expected
+
+    def user(self, index: int, deadline: float):
+        rng = random.Random(self.seed + index)
+        session = Session(self.base_url)
+        try:
+            try:
+                session.request('GET', '/login/')   # Sets the CSRF cookie
+            except (OSError, http.client.HTTPException):
+                self.record('login', None)
+                return
+            logged_in = self.timed(session, 'login', 'POST', '/login/', {
+                'username': self.usernames[index % len(self.usernames)], 'password': BENCHMARK_PASSWORD,
+                'csrfmiddlewaretoken': session.cookies['csrftoken'].value if 'csrftoken' in session.cookies else '',
+            }, expected=(302,))
+            if not logged_in:
+                return
+            weights = [task.weight for task in self.tasks]
+            while time.perf_counter() < deadline:
+                task = rng.choices(self.tasks, weights)[0]
+                self.timed(session, task.name, 'GET', task.path(rng))
+        finally:
+            session.close()
+
+    def run(self) -> Dict[str, Dict[str, float]]:
+        """ Run the users and return, per endpoint: requests, failures, requests per second, p50, p95 and p99 (in
+        milliseconds), and queries (per request, when the metrics of the server are readable).
+        """
+        deadline = time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self.user, args=(index, deadline)) for index in range(self.users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        queries = self.query_counts()
+        results = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            results[name] = {
+                'requests': len(latencies), 'failures': self.failures[name],
+                'rps': len(latencies) / self.duration,
+                'p50': percentile(latencies, 50) * 1000, 'p95': percentile(latencies, 95) * 1000,
+                'p99': percentile(latencies, 99) * 1000,
+                'queries': queries.get(name),
+            }
+        return results
+
+    def query_counts(self) -> Dict[str, float]:
+        session = Session(self.base_url)
+        try:
+            status, content = session.request('GET', '/monitoring/metrics')
+        except (OSError, http.client.HTTPException):
+            return {}
+        finally:
+            session.close()
+        return parse_query_counts(content.decode()) if status == 200 else {}
+
+
+def default_tasks(ticket_ids: List[int]) -> List[Task]:
+    """ Return the tasks of the default scenario: browsing the tickets list, tickets and groups. """
+    return [
+        Task('tickets:list', 5, lambda rng: '/tickets/list/'),
+        Task('tickets:detail', 4, lambda rng: f'/tickets/{rng.choice(ticket_ids)}/'),
+        Task('groups:list', 1, lambda rng: '/groups/'),
+    ]
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase
+
+from comments.models import Comment
+from groups.models import Group, GroupMember
+from tickets.models import Ticket
+from workflows.models import State, Workflow
+from workflows.table import invalidate_transition_tables
+from .data import BENCHMARK_PASSWORD, BENCHMARK_USER_PREFIX, generate, Scale
+from .micro import run_micro_benchmarks, time_callable
+from .scenarios import default_tasks, parse_query_counts, percentile, ScenarioRunner
+
+
+class GenerateTests(TestCase):
+    """ Synthetic data sets. """
+
+    def test_generates_the_scale(self):
+        counts = generate(Scale(users=5, groups=3, memberships=2, tickets=25, comments=40, batch_size=10))
+
+        self.assertEqual(counts, {'users': 5, 'groups': 3, 'memberships': 10, 'tickets': 25, 'comments': 40})
+        self.assertEqual(Ticket.objects.count(), 25)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertFalse(Ticket.objects.filter(description_html='').exists())
+        self.assertEqual(set(Group.objects.values_list('slug', flat=True)), {f'benchmark-group-{i}' for i in range(3)})
+        for user in get_user_model().objects.all():
+            self.assertEqual(GroupMember.objects.filter(user=user).count(), 2)
+        self.assertTrue(self.client.login(username=f'{BENCHMARK_USER_PREFIX}4', password=BENCHMARK_PASSWORD))
+
+    def test_generates_new_records_on_every_run(self):
+        generate(Scale(users=2, groups=1, tickets=0, comments=0))
+        counts = generate(Scale(users=2, groups=1, memberships=1, tickets=0, comments=0))
+
+        self.assertEqual(counts['memberships'], 2)
+        self.assertEqual(get_user_model().objects.filter(username__startswith=BENCHMARK_USER_PREFIX).count(), 4)
+        self.assertEqual(Group.objects.count(), 2)
+
+
+class MicroBenchmarkTests(TestCase):
+    """ Timing of the model save paths. """
+
+    def test_time_callable(self):
+        calls = []
+        stats = time_callable(lambda: calls.append(1), rounds=5, min_time=0.0001)
+
+        # Warmup, calibration doubling the iterations up to the final count, then the rounds
+        self.assertEqual(len(calls), 1 + (2 * stats['iterations'] - 1) + 5 * stats['iterations'])
+        self.assertEqual(stats['rounds'], 5)
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertLessEqual(stats['median'], stats['max'])
+
+    def test_benchmarks_leave_the_database_unchanged(self):
+        results = run_micro_benchmarks(rounds=2)
+
+        self.assertEqual(set(results), {'ticket_create', 'ticket_update', 'group_create', 'group_rename'})
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(Group.objects.exists())
+
+
+class ScenarioTests(SimpleTestCase):
+    """ Statistics of the load scenarios. """
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 95), 3)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_parse_query_counts(self):
+        metrics = (
+            '# TYPE django_http_request_db_queries summary\n'
+            'django_http_request_db_queries_count{view="tickets:list"} 4.0\n'
+            'django_http_request_db_queries_sum{view="tickets:list"} 12.0\n'
+            'django_http_request_db_queries_count{view="login"} 0.0\n'
+        )
+
+        self.assertEqual(parse_query_counts(metrics), {'tickets:list': 3.0})
+
+
+class ScenarioRunnerTests(LiveServerTestCase):
+    """ A short run of the default scenario against the test server. """
+
+    def setUp(self):
+        # The previous transaction tests flushed the default workflow of the migrations, and the rows cached
+        ContentType.objects.clear_cache()
+        invalidate_transition_tables()
+        workflow, created = Workflow.objects.get_or_create(name='Default', group=None)
+        State.objects.get_or_create(workflow=workflow, name='new', defaults={'label': 'New', 'is_initial': True})
+
+    def test_run(self):
+        generate(Scale(users=2, groups=2, tickets=10, comments=10))
+        ticket_ids = list(Ticket.objects.values_list('id', flat=True))
+
+        results = ScenarioRunner(self.live_server_url, default_tasks(ticket_ids), users=2, duration=1.0).run()
+
+        self.assertEqual(results['login']['requests'], 2)
+        for name in ('tickets:list', 'tickets:detail'):
+            self.assertEqual(results[name]['failures'], 0)
+            self.assertGreater(results[name]['requests'], 0)
+            self.assertLessEqual(results[name]['p50'], results[name]['p99'])
@@ -1,3 +1,20 @@
 from django.contrib import admin
 
+from appsutils.admin import AuditedAdminMixin
+from . import models
+
+
 # Register your models here.
+@admin.register(models.Comment)
+class CommentAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = (
+        '__str__', 'target_type', 'target_id', 'author', 'approved_comment', 'created_date', 'changed_by', 'changed_on',
+    )
+    list_filter = ('approved_comment', 'target_type', 'record_status')
+    list_select_related = ('target_type',)
+    actions = ('approve',)
+
+    @admin.action(description='Approve the selected comments', permissions=('change',))
+    def approve(self, request, queryset):
+        count = queryset.approve(request.user)
+        self.message_user(request, f'{count} comments approved.')
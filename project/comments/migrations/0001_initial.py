@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_on', models.DateTimeField(default=django.utils.timezone.now, null=True)),
+                ('record_status', models.CharField(blank=True, choices=[('ACTIVE', 'Active'), ('DELETED', 'Delete'), ('ACTIVE_LOCKED', 'Active Locked')], default='ACTIVE', max_length=255, null=True)),
+                ('author', models.CharField(max_length=200)),
+                ('text', models.TextField()),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('approved_comment', models.BooleanField(default=False)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='comments_comment_changed_by', related_query_name='comments_comments_changed_by', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='comments_comment_created_by', related_query_name='comments_comments_created_by', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='tickets.ticket')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
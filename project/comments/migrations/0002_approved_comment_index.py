@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['created_date', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(approved_comment=True), fields=['post', 'created_date', 'id'], name='comment_approved_post_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+
+def posts_to_targets(apps, schema_editor):
+    """ Point every comment to its ticket through the (target_type, target_id) pair, in one UPDATE. """
+    Comment = apps.get_model('comments', 'Comment')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ticket_type, created = ContentType.objects.get_or_create(app_label='tickets', model='ticket')
+    Comment.objects.update(target_type=ticket_type, target_id=F('post_id'))
+
+
+def targets_to_posts(apps, schema_editor):
+    """ Point the comments of the tickets back to their post, the comments of other models are deleted. """
+    Comment = apps.get_model('comments', 'Comment')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ticket_type, created = ContentType.objects.get_or_create(app_label='tickets', model='ticket')
+    Comment.objects.exclude(target_type=ticket_type).delete()
+    Comment.objects.update(post_id=F('target_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('comments', '0002_approved_comment_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='target_type',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype',
+            ),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='target_id',
+            field=models.PositiveBigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='tickets.ticket',
+            ),
+        ),
+        migrations.RunPython(posts_to_targets, targets_to_posts),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_approved_post_idx',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='post',
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='target_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='target_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                condition=models.Q(approved_comment=True), fields=['target_type', 'target_id', 'created_date', 'id'],
+                name='comment_approved_target_idx',
+            ),
+        ),
+    ]
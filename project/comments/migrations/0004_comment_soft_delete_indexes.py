@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0003_comment_target'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_approved_target_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                condition=models.Q(('approved_comment', True), models.Q(_negated=True, record_status='DELETED')),
+                fields=['target_type', 'target_id', 'created_date', 'id'], name='comment_approved_target_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                condition=models.Q(record_status='DELETED'), fields=['changed_on'], name='comment_deleted_idx',
+            ),
+        ),
+    ]
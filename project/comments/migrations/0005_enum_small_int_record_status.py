@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+from appsutils.fields import convert_to_enum_small_int, EnumSmallIntField
+from appsutils.models import RecordStatus
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0004_comment_soft_delete_indexes'),
+    ]
+
+    operations = [
+        # The partial indexes compare record_status to a name: dropped, then created again comparing it to a code
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_approved_target_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_deleted_idx',
+        ),
+        *convert_to_enum_small_int(
+            'comments.Comment', 'record_status',
+            EnumSmallIntField(RecordStatus, blank=True, default=RecordStatus.ACTIVE, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                condition=models.Q(
+                    ('approved_comment', True), models.Q(_negated=True, record_status=RecordStatus['DELETED']),
+                ),
+                fields=['target_type', 'target_id', 'created_date', 'id'], name='comment_approved_target_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                condition=models.Q(record_status=RecordStatus['DELETED']), fields=['changed_on'],
+                name='comment_deleted_idx',
+            ),
+        ),
+    ]
@@ -1,32 +1,114 @@
+""" Comments on the tickets, the groups and any model declaring a `comments` GenericRelation.
+
+A comment points to its target with a (target_type, target_id) pair instead of a foreign key, and is loaded:
+    - for one target: Comment.objects.for_target(obj), served by the approved comments index
+    - for many targets, of any mix of models: prefetch_comments(objects), one query per model
+    - from the targets querysets: Ticket.objects.prefetch_related('comments'), or filter(comments__...) joins
+
+Classes:
+    CommentQuerySet: approved comments, comments of a target, bulk approval
+    Comment: a comment, shown once approved by a moderator
+
+Functions:
+    prefetch_comments: load the comments of a heterogeneous list of objects, one query per model
+"""
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
-from django.urls import reverse
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils import timezone
 
-from tickets.models import Ticket
-from appsutils.models import BaseEntity
+from appsutils.models import BaseEntityQuerySet, BaseEntity, DELETED_RECORDS, LIVE_RECORDS, LiveManager
+
+
+class CommentQuerySet(BaseEntityQuerySet):
+    """ QuerySet of the comments.
+
+    Public methods:
+        approved(): the comments visible on their targets, with their author
+        for_target(obj): the comments of an object
+        approve(user): approve the comments with a single UPDATE
+    """
+
+    def approved(self):
+        """ Return the approved comments, their author (created_by) loaded with a join. """
+        return self.filter(approved_comment=True).select_related('created_by')
+
+    def for_target(self, obj):
+        """ Return the comments of the object, e.g. a ticket. """
+        return self.filter(target_type=ContentType.objects.get_for_model(obj), target_id=obj.pk)
 
-# TODO: create 'comment' model, views and all
+    def approve(self, user=None) -> int:
+        """ Approve the comments of the queryset with one UPDATE, instead of one save() per comment.
 
+        The comments already approved are left unchanged (their audit trail included).
+
+        :param user: the moderator, recorded as changed_by
+        :returns: the number of comments approved
+        """
+        return self.filter(approved_comment=False).update(
+            approved_comment=True, changed_on=timezone.now(), changed_by=user,
+        )
+
+
+CommentManager = LiveManager.from_queryset(CommentQuerySet)
+AllCommentManager = models.Manager.from_queryset(CommentQuerySet)
 
-# Create your models here.
 
 class Comment(BaseEntity):
-    post = models.ForeignKey(
-        'Ticket',       # TODO: should be updated so that a comment could be added to other models as well
-        related_name='comments',
-        on_delete=models.CASCADE,
-    )
+    # The target models declare the reverse GenericRelation, named comments, which deletes their comments with them
+    target_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    target_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('target_type', 'target_id')     # One query per comment: use it for single comments
     author = models.CharField(max_length=200)
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
-    approved_comment = models.BooleanField(default=False)
+    approved_comment = models.BooleanField(default=False)   # Comments are shown once approved by a moderator
+
+    objects = CommentManager()
+    all_objects = AllCommentManager()
 
     def approve(self):
         self.approved_comment = True
-        self.save()
+        self.save(update_fields=['approved_comment'])
 
     def get_absolute_url(self):
-        return reverse("post_list")
+        return self.target.get_absolute_url()
 
     def __str__(self):
         return self.text
+
+    class Meta:
+        ordering = ['created_date', 'id']
+        indexes = [
+            # Only the approved, not deleted, comments are listed: serves the comments of one or many targets of a
+            # type, and the keyset pagination of a thread
+            models.Index(
+                fields=['target_type', 'target_id', 'created_date', 'id'],
+                condition=models.Q(approved_comment=True) & LIVE_RECORDS, name='comment_approved_target_idx',
+            ),
+            # Serves the purge of the expired soft-deleted comments
+            models.Index(fields=['changed_on'], condition=DELETED_RECORDS, name='comment_deleted_idx'),
+        ]
+
+
+def prefetch_comments(objects: Iterable[models.Model], queryset: Optional[models.QuerySet] = None,
+                      to_attr: str = 'approved_comments'):
+    """ Load the comments of objects of any mix of models, e.g. a page of an activity feed of tickets and groups.
+
+    The objects are grouped by model and the comments of each group loaded with one query (through the comments
+    GenericRelation of the model), so that the cost is one query per model whatever the number of objects.
+
+    :param objects: instances of models having a `comments` GenericRelation to Comment
+    :param queryset: the comments to load, Comment.objects.approved() by default
+    :param to_attr: the attribute receiving the list of comments of each object, in the queryset order
+    """
+    queryset = Comment.objects.approved() if queryset is None else queryset
+    by_model = defaultdict(list)
+    for obj in objects:
+        by_model[obj._meta.concrete_model].append(obj)
+    for instances in by_model.values():
+        prefetch_related_objects(instances, Prefetch('comments', queryset=queryset, to_attr=to_attr))
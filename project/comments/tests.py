@@ -1,3 +1,127 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from groups.models import Group
+from tickets.models import Ticket
+from .models import Comment, prefetch_comments
+
+
+class TicketCommentsTests(TestCase):
+    """ Approved comments on the ticket detail page, and their moderation. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        cls.ticket = Ticket.objects.create(summary='Printer on fire', description='')
+        now = timezone.now()
+        # Comments sharing the same created_date check the id tie-breaker of the keyset
+        Comment.objects.bulk_create(
+            Comment(
+                target=cls.ticket, author='agent', text=f'Comment {i}', created_by=cls.user,
+                created_date=now + timedelta(minutes=i // 2), approved_comment=i % 3 != 0,
+            )
+            for i in range(120)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_list_the_approved_comments_in_order(self):
+        expected = list(
+            Comment.objects.filter(approved_comment=True).order_by('created_date', 'id').values_list('id', flat=True)
+        )
+        seen = []
+        url = reverse('tickets:detail', args=[self.ticket.pk])
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['comments_page']
+            seen.extend(comment.id for comment in page)
+            url = f"{reverse('tickets:detail', args=[self.ticket.pk])}?after={page.next_cursor}" \
+                if page.has_next() else None
+        self.assertEqual(seen, expected)
+
+    def test_ticket_and_comments_cost_two_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('tickets:detail', args=[self.ticket.pk]))
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if 'tickets_ticket' in query['sql'] or 'comments_comment' in query['sql']
+        ]
+        self.assertEqual(len(queries), 2)
+        self.assertIn('JOIN "users"', queries[1])
+
+    def test_comments_query_uses_the_partial_index(self):
+        queryset = Comment.objects.approved().for_target(self.ticket).order_by('created_date', 'id')[:51]
+        self.assertIn('comment_approved_target_idx', queryset.explain())
+
+    def test_bulk_approve_is_a_single_update(self):
+        pending = Comment.objects.filter(approved_comment=False)
+        with self.assertNumQueries(1):
+            self.assertEqual(pending.approve(self.user), 40)
+        self.assertFalse(Comment.objects.filter(approved_comment=False).exists())
+        self.assertEqual(Comment.objects.filter(changed_by=self.user).count(), 40)
+
+    def test_new_comments_wait_for_approval(self):
+        response = self.client.post(reverse('comments:create', args=['tickets', self.ticket.pk]), {'text': 'Fixed it'})
+        self.assertRedirects(response, reverse('tickets:detail', args=[self.ticket.pk]))
+        comment = Comment.objects.get(text='Fixed it')
+        self.assertEqual((comment.created_by, comment.author, comment.approved_comment), (self.user, 'agent', False))
+
+    def test_commenting_requires_login(self):
+        self.client.logout()
+        response = self.client.post(reverse('comments:create', args=['tickets', self.ticket.pk]), {'text': 'Anonymous'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Comment.objects.filter(text='Anonymous').exists())
+
+
+class CommentTargetsTests(TestCase):
+    """ Comments on several kinds of objects, loaded in one query per kind. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        cls.groups = [Group.objects.create(name=f'Group {i}') for i in range(3)]
+        # Ticket and group ids may overlap: the comments must not be mixed up between the kinds
+        cls.tickets = [Ticket.objects.create(summary=f'Ticket {i}', description='') for i in range(5)]
+        Comment.objects.bulk_create(
+            Comment(target=target, author='agent', text=f'On {target}', approved_comment=True)
+            for target in cls.groups + cls.tickets + cls.tickets
+        )
+
+    def test_mixed_page_loads_one_query_per_model(self):
+        feed = [Ticket.objects.get(pk=ticket.pk) for ticket in self.tickets]
+        feed += [Group.objects.get(pk=group.pk) for group in self.groups]
+        with self.assertNumQueries(2):
+            prefetch_comments(feed)
+            texts = {str(obj): [comment.text for comment in obj.approved_comments] for obj in feed}
+            [comment.created_by for obj in feed for comment in obj.approved_comments]
+        self.assertEqual(texts['Group 0'], ['On Group 0'])
+        self.assertEqual(texts['Ticket 0'], ['On Ticket 0', 'On Ticket 0'])
+
+    def test_targets_query_their_comments_through_joins(self):
+        self.assertEqual(list(Ticket.objects.filter(comments__text='On Ticket 1').distinct()), [self.tickets[1]])
+        self.assertEqual(Comment.objects.filter(group__name='Group 2').count(), 1)
+
+    def test_comments_are_deleted_with_their_target(self):
+        self.tickets[0].delete()
+        self.assertFalse(Comment.objects.for_target(self.tickets[0]).exists())
+        self.assertEqual(Comment.objects.count(), 11)
 
-# Create your tests here.
+    def test_groups_can_be_commented(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('comments:create', args=['groups', self.groups[1].pk]), {'text': 'Hi'})
+        self.assertRedirects(response, reverse('groups:detail', args=[self.groups[1].slug]))
+        self.assertEqual(Comment.objects.for_target(self.groups[1]).filter(text='Hi').count(), 1)
+        response = self.client.post(reverse('comments:create', args=['users', self.user.pk]), {'text': 'Hi'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'comments'
+
+urlpatterns = [
+    path('<slug:target>/<int:pk>/', views.CommentCreateView.as_view(), name='create'),
+]
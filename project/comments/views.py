@@ -1,3 +1,44 @@
-from django.shortcuts import render
+from django.apps import apps
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.views import generic
+
+from .forms import CommentForm
+from .models import Comment
+
+# The models which can be commented, by name in the URLs
+COMMENT_TARGETS = {
+    'tickets': 'tickets.Ticket',
+    'groups': 'groups.Group',
+}
+
 
 # Create your views here.
+class CommentCreateView(LoginRequiredMixin, generic.CreateView):
+    """ Comment a ticket or a group. The comment is shown once approved by a moderator (see CommentAdmin). """
+    model = Comment
+    form_class = CommentForm
+    login_url = '/login/'
+
+    def dispatch(self, request, *args, **kwargs):
+        if kwargs['target'] not in COMMENT_TARGETS:
+            raise Http404('This kind of object cannot be commented.')
+        self.target = get_object_or_404(apps.get_model(COMMENT_TARGETS[kwargs['target']]), pk=kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['target'] = self.target
+        return context
+
+    def form_valid(self, form):
+        form.instance.target = self.target
+        form.instance.created_by = self.request.user
+        form.instance.author = self.request.user.get_username()
+        messages.success(self.request, 'Thank you, your comment will be shown once approved.')
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return self.target.get_absolute_url()
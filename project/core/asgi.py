@@ -1,12 +1,32 @@
 # -*- encoding: utf-8 -*-
 """
 Copyright (c) 2019 - present AppSeed.us
+
+ASGI entry point of the ASGI deployment profile (see ASYNC_VIEWS in core.settings), e.g.
+    ASYNC_VIEWS=True gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
+
+The server-sent events of the ticket lists (TICKET_EVENTS_PATH) are streamed by tickets.events, outside of Django's
+request handling and its middleware: the stream only reads the session cookie. Every other request goes to Django,
+whose streaming responses (e.g. the CSV export of the tickets) are iterated in the views thread pool (see
+appsutils.asynchronous.StreamingASGIHandler).
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+from appsutils.asynchronous import get_asgi_application  # noqa: E402 Once the settings module is set
+
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402 Once Django is set up
+from tickets.events import ticket_events  # noqa: E402
+
+STREAMS = {
+    settings.TICKET_EVENTS_PATH: ticket_events,
+}
+
+
+async def application(scope, receive, send):
+    stream = STREAMS.get(scope['path']) if scope['type'] == 'http' else None
+    await (stream or django_application)(scope, receive, send)
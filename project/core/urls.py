@@ -10,6 +10,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),  # Django admin route
     path('tickets/', include('tickets.urls')),  # Ticket routes - Create, list, detail
     path('groups/', include('groups.urls')),     # Grouping of tickets and users (group, project)
+    path('comments/', include('comments.urls')),    # Comments on the tickets, shown once approved
+    path('monitoring/', include('monitoring.urls')),    # Prometheus metrics
     path("", include("accounts.urls")),              # UI Kits Html files, Auth routes - login / register
 ]
 
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from groups.models import GroupTicketStats
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    """ Recompute the GroupTicketStats counters from the tickets table, the soft-deleted tickets left out.
+
+    The counters are maintained incrementally by the ticket signals; this reconciles them after operations
+    bypassing the signals (bulk imports, QuerySet.update(), raw SQL) or a failure.
+    """
+    help = 'Recompute the number of tickets per group and status from the tickets table.'
+
+    def handle(self, *args, **options):
+        counts = (
+            Ticket.objects.filter(group__isnull=False).order_by()
+            .values_list('group_id', 'status_id').annotate(count=Count('id'))
+        )
+        with transaction.atomic():
+            GroupTicketStats.objects.all().delete()
+            stats = GroupTicketStats.objects.bulk_create(
+                GroupTicketStats(group_id=group_id, status_id=status_id, count=count)
+                for group_id, status_id, count in counts
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(stats)} group ticket counters rebuilt.'))
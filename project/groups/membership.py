@@ -0,0 +1,104 @@
+""" Cached membership of the users in the groups.
+
+The ids of the groups of a user are kept in the shared cache under the user's version stamp (see
+accounts.caching), bumped once a change of the memberships of the user commits: a membership saved or deleted
+(see groups.signals), added or removed in bulk below, or one of their groups soft-deleted. Filtering on them, e.g.
+Ticket.objects.visible_to(user), reads the group_id index of the filtered table instead of joining the groups and
+their members on every request.
+
+Functions:
+    group_ids_cache_key: return the cache key of the group ids of a user
+    get_user_group_ids: return the ids of the live groups of a user
+    add_members: make users members of a group, in bulk
+    remove_members: remove users from a group, in bulk
+"""
+from typing import FrozenSet, Iterable, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.caching import bump_user_cache_versions_on_commit, get_user_cache_version
+from appsutils.models import RecordStatus
+
+from .models import Group, GroupMember
+
+
+def group_ids_cache_key(user) -> str:
+    """ Return the key of the user's group ids, changing with the user's version stamp. """
+    return f'group-ids:{user.pk}:{get_user_cache_version(user)}'
+
+
+def get_user_group_ids(user) -> FrozenSet[int]:
+    """ Return the ids of the groups the user is a member of, soft-deleted groups and memberships excluded.
+
+    The set is memoized on the user instance for the rest of the request, read from the cache otherwise, and only
+    resolved from the database on a cache miss.
+
+    :param user: a user, anonymous users belong to no group
+    """
+    group_ids = getattr(user, '_group_ids', None)
+    if group_ids is not None:
+        return group_ids
+    if user.pk is None:
+        return frozenset()
+    key = group_ids_cache_key(user)
+    group_ids = cache.get(key)
+    if group_ids is None:
+        group_ids = frozenset(
+            GroupMember.objects.filter(user_id=user.pk).exclude(group__record_status=RecordStatus.DELETED)
+            .values_list('group_id', flat=True)
+        )
+        cache.set(key, group_ids, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    user._group_ids = group_ids
+    return group_ids
+
+
+def _user_ids(users: Iterable) -> Set[int]:
+    return {getattr(user, 'pk', user) for user in users}
+
+
+def add_members(group: Group, users: Iterable, created_by=None) -> int:
+    """ Make the users members of the group, with one INSERT for all of them instead of one save() each.
+
+    The memberships soft-deleted since are restored, the existing ones are left as they are: the INSERT ignores
+    the rows conflicting with the (group, user) unique constraint, including those inserted concurrently. Like any
+    bulk operation, it bypasses the save() methods and the signals of the memberships.
+
+    :param group: the group
+    :param users: the users, or their ids
+    :param created_by: the user adding them, recorded in the audit trail
+    :returns: the number of users who were not members of the group
+    """
+    user_ids = _user_ids(users)
+    if not user_ids:
+        return 0
+    with transaction.atomic():
+        memberships = GroupMember.all_objects.filter(group=group, user_id__in=user_ids)
+        existing = set(memberships.values_list('user_id', flat=True))
+        restored = memberships.filter(record_status=RecordStatus.DELETED).update(
+            record_status=RecordStatus.ACTIVE, changed_on=timezone.now(), changed_by=created_by,
+        )
+        GroupMember.objects.bulk_create(
+            (GroupMember(group=group, user_id=user_id, created_by=created_by) for user_id in user_ids - existing),
+            ignore_conflicts=True,
+        )
+    bump_user_cache_versions_on_commit(user_ids)
+    return restored + len(user_ids - existing)
+
+
+def remove_members(group: Group, users: Iterable, removed_by=None) -> int:
+    """ Remove the users from the group, soft-deleting their memberships with one UPDATE instead of one save() each.
+
+    :param group: the group
+    :param users: the users, or their ids
+    :param removed_by: the user removing them, recorded as changed_by
+    :returns: the number of users removed
+    """
+    user_ids = _user_ids(users)
+    if not user_ids:
+        return 0
+    removed = GroupMember.objects.filter(group=group, user_id__in=user_ids).soft_delete(removed_by)
+    bump_user_cache_versions_on_commit(user_ids)
+    return removed
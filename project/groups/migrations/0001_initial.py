@@ -0,0 +1,56 @@
+# Generated by Django 3.2 on 2026-10-18 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Group',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_on', models.DateTimeField(default=django.utils.timezone.now, null=True)),
+                ('record_status', models.CharField(blank=True, choices=[('ACTIVE', 'Active'), ('DELETED', 'Delete'), ('ACTIVE_LOCKED', 'Active Locked')], default='ACTIVE', max_length=255, null=True)),
+                ('name', models.CharField(max_length=250, unique=True)),
+                ('slug', models.SlugField(allow_unicode=True, unique=True)),
+                ('description', models.TextField(blank=True, default='')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='groups_group_changed_by', related_query_name='groups_groups_changed_by', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='groups_group_created_by', related_query_name='groups_groups_created_by', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_on', models.DateTimeField(default=django.utils.timezone.now, null=True)),
+                ('record_status', models.CharField(blank=True, choices=[('ACTIVE', 'Active'), ('DELETED', 'Delete'), ('ACTIVE_LOCKED', 'Active Locked')], default='ACTIVE', max_length=255, null=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='groups_groupmember_changed_by', related_query_name='groups_groupmembers_changed_by', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='groups_groupmember_created_by', related_query_name='groups_groupmembers_created_by', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='groups.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_in_groups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('group', 'user')},
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='members',
+            field=models.ManyToManyField(through='groups.GroupMember', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
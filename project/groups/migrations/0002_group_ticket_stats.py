@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 11:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupTicketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_stats', to='groups.group')),
+            ],
+            options={
+                'unique_together': {('group', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def count_tickets(apps, schema_editor):
+    """ Rebuild the counters, now keyed by the state of the tickets. """
+    GroupTicketStats = apps.get_model('groups', 'GroupTicketStats')
+    Ticket = apps.get_model('tickets', 'Ticket')
+    GroupTicketStats.objects.all().delete()
+    counts = (
+        Ticket.objects.filter(group__isnull=False).order_by()
+        .values_list('group_id', 'status_id').annotate(count=Count('id'))
+    )
+    GroupTicketStats.objects.bulk_create(
+        GroupTicketStats(group_id=group_id, status_id=status_id, count=count) for group_id, status_id, count in counts
+    )
+
+
+def delete_counters(apps, schema_editor):
+    # Rebuilt with `manage.py rebuild_group_stats` once migrated backwards
+    apps.get_model('groups', 'GroupTicketStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0002_group_ticket_stats'),
+        ('tickets', '0005_ticket_status_state'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='groupticketstats',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='groupticketstats',
+            name='status',
+        ),
+        migrations.AddField(
+            model_name='groupticketstats',
+            name='status',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workflows.state',
+            ),
+        ),
+        migrations.RunPython(count_tickets, delete_counters),
+        migrations.AlterField(
+            model_name='groupticketstats',
+            name='status',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workflows.state',
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name='groupticketstats',
+            unique_together={('group', 'status')},
+        ),
+    ]
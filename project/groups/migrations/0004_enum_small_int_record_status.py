@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from appsutils.fields import convert_to_enum_small_int, EnumSmallIntField
+from appsutils.models import RecordStatus
+
+RECORD_STATUS = EnumSmallIntField(RecordStatus, blank=True, default=RecordStatus.ACTIVE, null=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0003_group_ticket_stats_state'),
+    ]
+
+    operations = [
+        *convert_to_enum_small_int('groups.Group', 'record_status', RECORD_STATUS),
+        *convert_to_enum_small_int('groups.GroupMember', 'record_status', RECORD_STATUS),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 13:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0004_enum_small_int_record_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupSlug',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(allow_unicode=True, unique=True)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='previous_slugs', to='groups.group')),
+            ],
+        ),
+    ]
@@ -1,36 +1,228 @@
+import re
+from typing import Dict, List, Optional, Set
+
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.contrib.contenttypes.fields import GenericRelation
+from django.db import models, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 
-from appsutils.models import BaseEntity
+from accounts.caching import bump_user_cache_versions_on_commit
+from appsutils.models import BaseEntity, BaseEntityQuerySet, LiveManager, RecordStatus
 
 
 User = settings.AUTH_USER_MODEL
 
+SLUG_MAX_LENGTH = 50
+SLUG_SUFFIX_ROOM = 10   # Characters left to the -<n> suffixes deduplicating the slugs
+
+
+class GroupQuerySet(BaseEntityQuerySet):
+    """ QuerySet of the groups.
+
+    Public methods:
+        allocate_slugs(names): unique slugs for new or renamed groups
+        bulk_create(groups): insert groups, their missing slugs allocated at once
+    """
+
+    def allocate_slugs(self, names: List[str], group: Optional['Group'] = None) -> List[str]:
+        """ Return a unique slug for each name: the slugified name, followed by -<n> when it is already taken.
+
+        A slug is taken when it is the slug of a group (deleted ones included, until purged), a previous slug of a
+        group (see GroupSlug), or allocated to a previous name of the list. Instead of trying -2, -3... until one is
+        free, the taken slugs are read with one query on the slugified names, then one range query per name already
+        taken, served by the unique indexes of the slugs.
+
+        :param names: the names of the groups
+        :param group: the group renamed, whose current and previous slugs stay available to it
+        """
+        bases = [slugify(name)[:SLUG_MAX_LENGTH - SLUG_SUFFIX_ROOM].strip('-') or 'group' for name in names]
+        taken = self.taken_slugs(models.Q(slug__in=set(bases)), group)
+        suffixes: Dict[str, int] = {}    # Last suffix used by the slugs of each base
+        slugs = []
+        for base in bases:
+            if base not in taken:
+                slug = base
+            else:
+                if base not in suffixes:
+                    # One range query finds the suffixes already used, e.g. 'support-2' to 'support-9999'
+                    used = self.taken_slugs(models.Q(slug__gt=f'{base}-', slug__lt=f'{base}.'), group)
+                    pattern = re.compile(rf'{re.escape(base)}-(\d+)')
+                    suffixes[base] = max(
+                        (int(match.group(1)) for match in map(pattern.fullmatch, used) if match), default=1,
+                    )
+                suffixes[base] += 1
+                slug = f'{base}-{suffixes[base]}'
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    def taken_slugs(self, condition: models.Q, group: Optional['Group'] = None) -> Set[str]:
+        """ Return the current and previous slugs of the groups (but the group) matching the condition. """
+        current = Group.all_objects.filter(condition).order_by()
+        previous = GroupSlug.objects.filter(condition).order_by()
+        if group is not None and group.pk is not None:
+            current, previous = current.exclude(pk=group.pk), previous.exclude(group_id=group.pk)
+        return set(current.values_list('slug', flat=True).union(previous.values_list('slug', flat=True)))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """ Insert the groups like QuerySet.bulk_create(), allocating the slugs of those without one at once. """
+        objs = list(objs)
+        unslugged = [group for group in objs if not group.slug]
+        for group, slug in zip(unslugged, self.allocate_slugs([group.name for group in unslugged])):
+            group.slug = slug
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+GroupManager = LiveManager.from_queryset(GroupQuerySet)
+AllGroupManager = models.Manager.from_queryset(GroupQuerySet)
+
 
 class Group(BaseEntity):
     name = models.CharField(max_length=250, unique=True)
-    slug = models.SlugField(allow_unicode=True, unique=True)
+    # Allocated from the name when the group is created or renamed, see save(): the previous slugs are kept in
+    # GroupSlug and redirect to the current one
+    slug = models.SlugField(allow_unicode=True, unique=True, max_length=SLUG_MAX_LENGTH)
     description = models.TextField(blank=True, default='')
-    members = models.ManyToManyField(User, through="GroupMember")
+    members = models.ManyToManyField(User, through="GroupMember", through_fields=("group", "user"))
+    comments = GenericRelation(
+        'comments.Comment', content_type_field='target_type', object_id_field='target_id', related_query_name='group',
+    )
+
+    listing_deferred_fields = ('description',)
+
+    objects = GroupManager()
+    all_objects = AllGroupManager()
 
     def __str__(self):
         return self.name
 
+    def get_absolute_url(self):
+        return reverse('groups:detail', kwargs={'slug': self.slug})
+
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        """ Save the group, allocating its slug when it has none or its name changed since it was loaded (see
+        groups.signals), and keeping the previous slug in GroupSlug.
+        """
+        update_fields = kwargs.get('update_fields')
+        renamed = self.__dict__.get('name', self._loaded_name) != self._loaded_name
+        if self.slug and not (renamed and (update_fields is None or 'name' in update_fields)):
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = None if self._state.adding else self.slug
+            self.slug = Group.all_objects.allocate_slugs([self.name], self)[0]
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'slug'}
+            super().save(*args, **kwargs)
+            # A slug given back to the group leaves its history, the replaced one enters it
+            GroupSlug.objects.filter(group=self, slug=self.slug).delete()
+            if previous and previous != self.slug:
+                GroupSlug.objects.create(group=self, slug=previous)
+        self._loaded_name = self.name
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude)
+        # The unique checks query the default manager, blind to the soft-deleted groups holding their name until purged
+        if 'name' not in (exclude or ()) and Group.all_objects.filter(name=self.name).exclude(pk=self.pk).exists():
+            raise ValidationError({'name': 'A deleted group still holds this name.'})
+
+    def soft_delete(self, user=None) -> bool:
+        """ Mark the group DELETED with one UPDATE, and invalidate the group ids cached for its members (see
+        groups.membership) once committed.
+        """
+        deleted = super().soft_delete(user)
+        if deleted:
+            bump_user_cache_versions_on_commit(self.memberships.values_list('user_id', flat=True), using=self._state.db)
+        return deleted
 
     class Meta:
         ordering = ["name"]
 
 
+class GroupSlug(models.Model):
+    """ A previous slug of a group, found with one lookup on its unique index so that the URLs of the group
+    before its renaming redirect to its current one.
+
+    It does not inherit from BaseEntity: a previous slug has no author nor record status, and is deleted with its
+    group.
+    """
+    slug = models.SlugField(allow_unicode=True, unique=True, max_length=SLUG_MAX_LENGTH)
+    group = models.ForeignKey(Group, related_name='previous_slugs', on_delete=models.CASCADE)
+    created_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.slug
+
+
 class GroupMember(BaseEntity):
     group = models.ForeignKey(Group, related_name="memberships", on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name="user_in_groups", on_delete=models.CASCADE)
 
+    listing_related_fields = ('group', 'user')   # __str__ displays the user
+
     def __str__(self):
         return self.user.username
 
     class Meta:
         unique_together = ("group", "user")
+
+
+class GroupTicketStatsManager(models.Manager):
+
+    def adjust(self, group_id: int, status_id: int, delta: int):
+        """ Add delta to the number of tickets of the group having the status.
+
+        The counter is updated with an F() expression so that concurrent adjustments do not overwrite each other.
+
+        :param group_id: the id of the group, nothing is counted when None
+        :param status_id: the id of the state of the tickets
+        :param delta: the number of tickets to add (or remove, when negative)
+        """
+        if group_id is None or not delta:
+            return
+        with transaction.atomic(using=self.db):
+            if self.filter(group_id=group_id, status_id=status_id).update(count=F('count') + delta):
+                return
+            # get_or_create() copes with a concurrent creation of the same counter
+            stats, created = self.get_or_create(group_id=group_id, status_id=status_id, defaults={'count': delta})
+            if not created:
+                self.filter(pk=stats.pk).update(count=F('count') + delta)
+
+    def histograms(self) -> dict:
+        """ Return the ticket count per status of every group not deleted, as {group: {status: count}}. """
+        histograms = {}
+        stats_list = (
+            self.select_related('group', 'status').defer('group__description')
+            .filter(count__gt=0).exclude(group__record_status=RecordStatus.DELETED)
+        )
+        for stats in stats_list:
+            histograms.setdefault(stats.group, {})[stats.status] = stats.count
+        return histograms
+
+
+class GroupTicketStats(models.Model):
+    """ Denormalized number of tickets per group and status.
+
+    The counters are maintained incrementally when a ticket is created, deleted (or soft-deleted, see
+    Ticket.soft_delete) or changes status or group, so that the dashboard reads one row per group and status instead
+    of counting the tickets table.
+    Bulk operations (bulk_create, QuerySet.update/delete/soft_delete) bypass them: run `manage.py rebuild_group_stats`
+    after.
+
+    It does not inherit from BaseEntity: counters have no author nor record status.
+    """
+    group = models.ForeignKey(Group, related_name="ticket_stats", on_delete=models.CASCADE)
+    status = models.ForeignKey('workflows.State', related_name='+', on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+
+    objects = GroupTicketStatsManager()
+
+    def __str__(self):
+        return f'{self.group_id} {self.status_id}: {self.count}'
+
+    class Meta:
+        unique_together = ("group", "status")
@@ -0,0 +1,42 @@
+""" Signal receivers of the groups app, connected in GroupsConfig.ready().
+
+Receivers:
+    remember_name: keep the name a group was loaded with, to allocate its slug on renaming only (see Group.save)
+    invalidate_member_cache: bump the cache version of a user joining or leaving a group, once committed
+    invalidate_members_cache: same for the users added or removed through Group.members
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from accounts.caching import bump_user_cache_versions_on_commit
+
+from .models import Group, GroupMember
+
+
+@receiver(post_init, sender=Group)
+def remember_name(sender, instance: Group, **kwargs):
+    instance._loaded_name = instance.__dict__.get('name')     # None when deferred
+
+
+@receiver(post_save, sender=GroupMember)
+@receiver(post_delete, sender=GroupMember)
+def invalidate_member_cache(sender, instance: GroupMember, raw: bool = False, using=None, **kwargs):
+    # The menus, permissions and group ids (see groups.membership) of the user depend on their groups
+    if not raw:
+        bump_user_cache_versions_on_commit([instance.user_id], using=using)
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+def invalidate_members_cache(sender, instance, action: str, reverse: bool, pk_set=None, using=None, **kwargs):
+    # add() and remove() bypass the GroupMember signals: instance is the group (or the user when reverse)
+    if action == 'pre_clear' and not reverse:
+        # The members are unknown once cleared
+        instance._cleared_user_ids = list(instance.memberships.values_list('user_id', flat=True))
+        return
+    if action == 'post_clear' and not reverse:
+        user_ids = instance.__dict__.pop('_cleared_user_ids', ())
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        user_ids = [instance.pk] if reverse else pk_set
+    else:
+        return
+    bump_user_cache_versions_on_commit(user_ids, using=using)
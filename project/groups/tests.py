@@ -1,3 +1,268 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from appsutils.models import RecordStatus
+from monitoring.queries import query_budget
+
+from tickets.models import Ticket
+from workflows.models import State
+from .membership import add_members, get_user_group_ids, remove_members
+from .models import Group, GroupMember, GroupSlug, GroupTicketStats
+
+
+class GroupTicketStatsTests(TestCase):
+    """ Incremental maintenance of the per group ticket counters. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.support = Group.objects.create(name='Support')
+        cls.network = Group.objects.create(name='Network')
+        cls.open, cls.closed = (State.objects.get(workflow__group=None, name=name) for name in ('open', 'closed'))
+
+    def counts(self) -> dict:
+        return {
+            (stats.group.name, stats.status.name): stats.count
+            for stats in GroupTicketStats.objects.select_related('group', 'status').filter(count__gt=0)
+        }
+
+    def test_counters_follow_ticket_creation_changes_and_deletion(self):
+        first = Ticket.objects.create(summary='First', group=self.support)
+        Ticket.objects.create(summary='Second', group=self.support)
+        Ticket.objects.create(summary='No group')
+        self.assertEqual(self.counts(), {('Support', 'new'): 2})
+
+        first.status = self.closed
+        first.save()
+        first.save()
+        self.assertEqual(self.counts(), {('Support', 'new'): 1, ('Support', 'closed'): 1})
+
+        first.group = self.network
+        first.save()
+        self.assertEqual(self.counts(), {('Support', 'new'): 1, ('Network', 'closed'): 1})
+
+        first.delete()
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+
+    def test_counters_follow_soft_deletion_and_purge(self):
+        first = Ticket.objects.create(summary='First', group=self.support)
+        Ticket.objects.create(summary='Second', group=self.support)
+
+        self.assertTrue(first.soft_delete())
+        self.assertFalse(Ticket.all_objects.get(pk=first.pk).soft_delete())    # Already deleted: counted once
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+
+        Ticket.all_objects.get(pk=first.pk).delete()     # The purge
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+
+    def test_counters_follow_changes_of_tickets_loaded_with_deferred_status(self):
+        ticket = Ticket.objects.create(summary='First', group=self.support)
+        ticket = Ticket.objects.defer('status').get(pk=ticket.pk)
+        ticket.status = self.closed
+        ticket.save()
+        self.assertEqual(self.counts(), {('Support', 'closed'): 1})
+
+    def test_counters_are_kept_by_saves_leaving_the_deferred_status_out(self):
+        ticket = Ticket.objects.create(summary='First', group=self.support)
+        ticket = Ticket.objects.defer('status').get(pk=ticket.pk)
+        ticket.summary = 'Renamed'
+        ticket.save()
+        ticket.save()
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+
+    def test_counters_follow_deletion_of_tickets_loaded_with_deferred_fields(self):
+        first = Ticket.objects.create(summary='First', group=self.support)
+        Ticket.objects.create(summary='Second', group=self.support)
+        Ticket.objects.defer('status').get(pk=first.pk).delete()
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+
+    def test_counters_follow_the_stored_row_rather_than_the_loaded_instance(self):
+        ticket = Ticket.objects.create(summary='First', group=self.support)
+        # Two requests loading the ticket before either saves it
+        first, second = Ticket.objects.get(pk=ticket.pk), Ticket.objects.get(pk=ticket.pk)
+        first.status = second.status = self.closed
+        first.save()
+        second.save()
+        self.assertEqual(self.counts(), {('Support', 'closed'): 1})
+
+        Ticket.objects.get(pk=ticket.pk).soft_delete()
+        self.assertFalse(first.soft_delete())
+        self.assertEqual(self.counts(), {})
+
+    def test_counters_follow_the_fields_written_by_the_save(self):
+        ticket = Ticket.objects.create(summary='First', group=self.support)
+        ticket.status = self.closed
+        ticket.summary = 'Renamed'
+        ticket.save(update_fields=['summary'])
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).status.name, 'new')
+        self.assertEqual(self.counts(), {('Support', 'new'): 1})
+
+        ticket.save(update_fields=['status'])
+        self.assertEqual(self.counts(), {('Support', 'closed'): 1})
+
+    def test_rebuild_group_stats_reconciles_bulk_changes(self):
+        Ticket.objects.bulk_create(Ticket(summary=str(i), group=self.network, status=self.open) for i in range(3))
+        Ticket.objects.create(summary='Closed', group=self.support, status=self.closed)
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(self.counts(), {('Network', 'open'): 3, ('Support', 'closed'): 1})
+
+    def test_histograms_read_one_row_per_group_and_status(self):
+        Ticket.objects.create(summary='First', group=self.support)
+        Ticket.objects.create(summary='Second', group=self.support, status=self.closed)
+        with self.assertNumQueries(1):
+            histograms = GroupTicketStats.objects.histograms()
+        histogram = {state.name: count for state, count in histograms[self.support].items()}
+        self.assertEqual(histogram, {'new': 1, 'closed': 1})
+
+        self.support.soft_delete()
+        self.assertNotIn(self.support, GroupTicketStats.objects.histograms())
+
+
+class ListGroupsTests(TestCase):
+    """ The group list does not issue one query per group. """
+
+    def test_list_stays_within_its_query_budget(self):
+        user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        for i in range(20):
+            Group.objects.create(name=f'Group {i}', created_by=user)
+        self.client.force_login(user)
+        with query_budget(max_queries=3, max_repeats=1):
+            response = self.client.get(reverse('groups:list'))
+        self.assertEqual(len(response.context['group_list']), 20)
+
+
+class DeleteGroupTests(TestCase):
+    """ Groups are soft-deleted, with one UPDATE. """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        self.client.force_login(self.user)
+        self.group = Group.objects.create(name='Support')
+
+    def test_delete_is_confirmed_first(self):
+        response = self.client.get(reverse('groups:delete', args=[self.group.pk]))
+
+        self.assertContains(response, 'Delete the group "Support"?')
+        self.assertTrue(Group.objects.exists())
+
+    def test_delete_marks_the_group_deleted(self):
+        response = self.client.post(reverse('groups:delete', args=[self.group.pk]))
+
+        self.assertRedirects(response, reverse('groups:list'))
+        group = Group.all_objects.get(pk=self.group.pk)
+        self.assertEqual((group.record_status, group.changed_by), (RecordStatus.DELETED, self.user))
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(list(self.client.get(reverse('groups:list')).context['group_list']), [])
+
+    def test_deleted_groups_hold_their_name(self):
+        self.group.soft_delete()
+
+        with self.assertRaisesMessage(ValidationError, 'A deleted group still holds this name.'):
+            Group(name='Support').full_clean()
+
+
+class MembershipTests(TestCase):
+    """ Cached group ids of the users, and bulk membership changes. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            get_user_model().objects.create_user(
+                first_name=name, email=f'{name}@example.com', username=name, phone_number=name, password='pass',
+            )
+            for name in ('ann', 'bob', 'cid')
+        ]
+        cls.support = Group.objects.create(name='Support')
+        cls.network = Group.objects.create(name='Network')
+
+    def setUp(self):
+        cache.clear()
+
+    def group_ids(self, user) -> frozenset:
+        # A new instance, like the one loaded by every request
+        return get_user_group_ids(get_user_model().objects.get(pk=user.pk))
+
+    def test_group_ids_are_cached_until_the_memberships_change(self):
+        ann = self.users[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupMember.objects.create(group=self.support, user=ann)
+        self.assertEqual(self.group_ids(ann), {self.support.pk})
+        user = get_user_model().objects.get(pk=ann.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_group_ids(user), {self.support.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.network.members.add(ann)
+            # Until the commit, the other requests keep reading the memberships as committed
+            self.assertEqual(self.group_ids(ann), {self.support.pk})
+        self.assertEqual(self.group_ids(ann), {self.support.pk, self.network.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.network.soft_delete()
+        self.assertEqual(self.group_ids(ann), {self.support.pk})
+
+    def test_bulk_add_and_remove(self):
+        ann, bob, cid = self.users
+        GroupMember.objects.create(group=self.support, user=ann)
+        self.assertEqual(self.group_ids(bob), set())
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(5):
+            # The existing members, the restore and the insert, in a savepoint
+            self.assertEqual(add_members(self.support, [ann, bob, cid.pk]), 2)
+        self.assertEqual(GroupMember.objects.filter(group=self.support).count(), 3)
+        self.assertEqual(self.group_ids(bob), {self.support.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(remove_members(self.support, [bob, cid]), 2)
+        self.assertEqual(self.group_ids(bob), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(add_members(self.support, [bob]), 1)   # The soft-deleted membership is restored
+        self.assertEqual(GroupMember.all_objects.filter(group=self.support).count(), 3)
+        self.assertEqual(self.group_ids(bob), {self.support.pk})
+
+
+class GroupSlugTests(TestCase):
+    """ Slugs allocated on creation and renaming, previous slugs redirecting to the current one. """
+
+    def test_colliding_names_get_suffixed_slugs(self):
+        Group.objects.create(name='Support')
+        Group.objects.create(name='Support!').soft_delete()     # Deleted groups hold their slug until purged
+        self.assertEqual(Group.objects.create(name='Support?').slug, 'support-3')
+
+        with self.assertNumQueries(3):     # The slugified names, the suffixes of 'support', the insert
+            groups = Group.objects.bulk_create(Group(name=name) for name in ('Support.', 'Support:', 'Network'))
+        self.assertEqual([group.slug for group in groups], ['support-4', 'support-5', 'network'])
+
+    def test_slug_changes_with_the_name_only(self):
+        group = Group.objects.create(name='Support')
+        group = Group.objects.get(pk=group.pk)
+        group.description = 'Help desk'
+        with self.assertNumQueries(1):
+            group.save()
+
+        group.name = 'Help desk'
+        group.save()
+        self.assertEqual(group.slug, 'help-desk')
+        response = self.client.get(reverse('groups:detail', args=['support']))
+        self.assertRedirects(response, reverse('groups:detail', args=['help-desk']), status_code=301)
+        self.assertContains(self.client.get(reverse('groups:detail', args=['help-desk'])), 'Help desk')
+
+        group.name = 'Support'
+        group.save()     # The group gets its previous slug back
+        self.assertEqual(group.slug, 'support')
+        self.assertEqual(list(GroupSlug.objects.values_list('slug', flat=True)), ['help-desk'])
+        self.assertEqual(Group.objects.create(name='Help desk').slug, 'help-desk-2')
 
-# Create your tests here.
+        group.soft_delete()
+        for slug in ('support', 'help-desk'):
+            self.assertEqual(self.client.get(reverse('groups:detail', args=[slug])).status_code, 404)
@@ -8,5 +8,6 @@ app_name = 'groups'
 urlpatterns = [
     path('', views.ListGroups.as_view(), name='list'),
     path('create', views.CreateGroup.as_view(), name='create'),
-    path('delete', views.DeleteGroup.as_view(), name='delete'),
+    path('<int:pk>/delete/', views.DeleteGroup.as_view(), name='delete'),
+    path('<slug:slug>/', views.GroupDetail.as_view(), name='detail'),
 ]
\ No newline at end of file
@@ -1,12 +1,33 @@
-from django.shortcuts import render
+from django.http import Http404
+from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views import generic
-from groups.models import Group
+
+from appsutils.db import ReplicaReadMixin
+from appsutils.models import RecordStatus
+from appsutils.views import SoftDeleteView
+from groups.models import Group, GroupSlug
 
 
 # Create your views here.
-class ListGroups(generic.ListView):
+class ListGroups(ReplicaReadMixin, generic.ListView):
     model = Group
+    queryset = Group.objects.for_listing()
+
+
+class GroupDetail(ReplicaReadMixin, generic.DetailView):
+    """ Show a group found by its slug, or redirect (permanently) a previous slug of the group to its current one. """
+    model = Group
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            # One lookup on the unique index of the previous slugs, only for the slugs not current
+            previous = GroupSlug.objects.select_related('group').filter(slug=kwargs['slug']).first()
+            if previous is None or previous.group.record_status == RecordStatus.DELETED:
+                raise
+            return redirect(previous.group, permanent=True)
 
 
 class CreateGroup(generic.CreateView):
@@ -14,6 +35,6 @@ class CreateGroup(generic.CreateView):
     model = Group
 
 
-class DeleteGroup(generic.DeleteView):
+class DeleteGroup(SoftDeleteView):
     model = Group
-    success_url = reverse_lazy('list')
+    success_url = reverse_lazy('groups:list')
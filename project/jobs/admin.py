@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from . import models
+
+
+# Register your models here.
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('function', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_on')
+    list_filter = ('status',)
+    search_fields = ('function',)
+    actions = ('retry',)
+
+    @admin.action(description='Retry the selected jobs now')
+    def retry(self, request, queryset):
+        queryset.exclude(status=models.JobStatus.RUNNING).update(
+            status=models.JobStatus.QUEUED, run_at=timezone.now(), attempts=0, locked_by='', locked_at=None,
+        )
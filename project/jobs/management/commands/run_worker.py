@@ -0,0 +1,103 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+
+from appsutils.db import refresh_connections
+from jobs.models import Job
+from jobs.queue import run_job
+
+logger = logging.getLogger('jobs')
+
+
+def execute(job_id: int) -> bool:
+    """ Run a claimed job in a thread or process of the pool. """
+    refresh_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        refresh_connections()
+
+
+class Command(BaseCommand):
+    """ Run the queued jobs (see jobs.queue.enqueue) until interrupted by SIGINT or SIGTERM.
+
+    The worker claims as many due jobs as it has free slots in its pool, of threads (for jobs waiting on I/O) or
+    processes (for CPU bound jobs, e.g. Markdown rendering), and polls the queue when it is empty. Any number of
+    workers, on any number of hosts, can share the queue. On SIGINT or SIGTERM the worker stops claiming jobs and
+    waits for the running ones.
+    """
+    help = 'Run the background jobs in a pool of threads or processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=os.cpu_count(),
+            help='Number of jobs run at the same time, 1 runs them in the current thread.',
+        )
+        parser.add_argument('--pool', choices=('thread', 'process'), default='thread', help='The kind of pool.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an empty queue.')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of polling.')
+        parser.add_argument('--name', help='Identifier of the worker in the jobs it locks, <host>:<pid> by default.')
+
+    def handle(self, *args, concurrency: int, pool: str, poll_interval: float, once: bool, name: str, **options):
+        name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        previous_handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        succeeded = failed = 0
+        try:
+            if concurrency <= 1:
+                while not self.stopping.is_set():
+                    ids = Job.objects.claim(name, 1)
+                    if not ids and once:
+                        break
+                    for job_id in ids:
+                        if run_job(job_id):
+                            succeeded += 1
+                        else:
+                            failed += 1
+                    if not ids:
+                        self.stopping.wait(poll_interval)
+                    refresh_connections()
+            else:
+                with self.create_pool(pool, concurrency) as executor:
+                    running = set()
+                    while not self.stopping.is_set():
+                        ids = Job.objects.claim(name, concurrency - len(running))
+                        running.update(executor.submit(execute, job_id) for job_id in ids)
+                        if not running:
+                            if once:
+                                break
+                            self.stopping.wait(poll_interval)
+                            continue
+                        done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            if future.exception() is None and future.result():
+                                succeeded += 1
+                            else:
+                                failed += 1
+                                if future.exception() is not None:
+                                    logger.error('Job execution crashed', exc_info=future.exception())
+                        refresh_connections()
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f'{succeeded} jobs succeeded, {failed} failed.'))
+
+    def stop(self, signum, frame):
+        self.stdout.write('Stopping after the running jobs.')
+        self.stopping.set()
+
+    @staticmethod
+    def create_pool(pool: str, concurrency: int):
+        if pool == 'thread':
+            return ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job')
+        # Fresh interpreters (not forks) so that no database connection is shared with the parent
+        return ProcessPoolExecutor(
+            max_workers=concurrency, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+        )
@@ -0,0 +1,102 @@
+""" Database backed queue of background jobs.
+
+Classes:
+    JobStatus: the states of a job
+    JobQuerySet: claiming of the due jobs by the workers
+    Job: a call of a function, run by `manage.py run_worker` outside of the requests
+"""
+import random
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'queued', 'Queued'
+    RUNNING = 'running', 'Running'
+    FAILED = 'failed', 'Failed'
+
+
+class JobQuerySet(models.QuerySet):
+
+    def claimable(self):
+        """ Return the jobs due to run: queued ones whose time has come, and running ones whose worker vanished. """
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS)
+        return self.filter(
+            Q(status=JobStatus.QUEUED, run_at__lte=now) | Q(status=JobStatus.RUNNING, locked_at__lt=stale)
+        )
+
+    def claim(self, worker: str, limit: int) -> List[int]:
+        """ Lock up to `limit` due jobs for the worker and return their ids, oldest due first.
+
+        With SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8) concurrent workers skip each other's rows.
+        Elsewhere (SQLite) every candidate is claimed with a conditional UPDATE, which only succeeds for the first
+        worker flipping the row: the row itself is the lock.
+
+        :param worker: the identifier of the claiming worker, stored in locked_by
+        :param limit: the maximum number of jobs to claim
+        """
+        if limit <= 0:
+            return []
+        claim = {
+            'status': JobStatus.RUNNING, 'locked_by': worker, 'locked_at': timezone.now(),
+            'attempts': F('attempts') + 1,
+        }
+        candidates = self.claimable().order_by('run_at', 'id')
+        if connections[self.db].features.has_select_for_update_skip_locked:
+            with transaction.atomic(using=self.db):
+                ids = list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+                self.filter(id__in=ids).update(**claim)
+            return ids
+        ids = []
+        # A few more candidates than needed, as concurrent workers may win some of them
+        for id in candidates.values_list('id', flat=True)[:limit * 2]:
+            if self.claimable().filter(id=id).update(**claim):
+                ids.append(id)
+                if len(ids) == limit:
+                    break
+        return ids
+
+
+class Job(models.Model):
+    """ A call of a module level function, with JSON serializable arguments, to run in a worker.
+
+    Jobs are created with jobs.queue.enqueue(). A worker claims a job (status running, locked_by/locked_at set),
+    then deletes it when the call succeeds. A failed call is queued again after an exponential backoff until it
+    has been attempted max_attempts times, then kept with the failed status and its traceback for inspection.
+    A running job locked for more than JOBS_LOCK_TIMEOUT_SECONDS (its worker died) is claimed again.
+
+    It does not inherit from BaseEntity: jobs have no author nor record status.
+    """
+    function = models.CharField(max_length=255)     # Dotted path of the function
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_on = models.DateTimeField(default=timezone.now)
+
+    objects = JobQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.function} #{self.pk} ({self.status})'
+
+    def retry_delay(self) -> float:
+        """ Return the seconds to wait before the next attempt: exponential backoff with jitter, capped. """
+        delay = settings.JOBS_RETRY_BACKOFF_SECONDS * 2 ** max(0, self.attempts - 1)
+        return min(delay, settings.JOBS_RETRY_BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1)
+
+    class Meta:
+        indexes = [
+            # Serves the claiming of the due jobs
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
@@ -0,0 +1,84 @@
+""" Enqueueing and running of the background jobs.
+
+Functions:
+    enqueue: queue a call of a function, once the current transaction commits
+    run_job: run a claimed job and record its outcome, called by the workers
+"""
+import logging
+import traceback
+from datetime import timedelta
+from typing import Callable, Optional, Sequence, Union
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger('jobs')
+
+
+def function_path(function: Union[Callable, str]) -> str:
+    """ Return the dotted path the worker imports the function from.
+
+    :raises ValueError: when the function cannot be imported by path (lambda, nested function, method)
+    """
+    if isinstance(function, str):
+        return function
+    path = f'{function.__module__}.{function.__qualname__}'
+    if '<' in path or '.' in function.__qualname__:
+        raise ValueError(f'{path} is not a module level function, it cannot run in a worker.')
+    return path
+
+
+def enqueue(function: Union[Callable, str], args: Sequence = (), kwargs: Optional[dict] = None, delay: float = 0,
+            max_attempts: Optional[int] = None, using: Optional[str] = None):
+    """ Queue a call of the function, run by a worker once the current transaction has committed.
+
+    Nothing is queued when the transaction rolls back, and the worker never sees data the transaction has not
+    committed yet. Outside of a transaction, the job is queued immediately.
+
+    :param function: a module level function, or its dotted path
+    :param args: the positional arguments, JSON serializable
+    :param kwargs: the keyword arguments, JSON serializable
+    :param delay: the seconds to wait before running the job
+    :param max_attempts: the number of attempts before giving up, JOBS_MAX_ATTEMPTS by default
+    :param using: the database whose transaction triggers the job
+    :raises ValueError: when the function cannot be imported by the worker
+    """
+    job = Job(
+        function=function_path(function), args=list(args), kwargs=kwargs or {},
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    transaction.on_commit(job.save, using=using)
+
+
+def run_job(job_id: int) -> bool:
+    """ Run a job claimed by the current worker, then delete it or schedule its retry.
+
+    It only needs the id of the job, so it can run in a thread or a process of the worker pool.
+
+    :param job_id: the id of a claimed (running) job
+    :returns: True when the call succeeded
+    """
+    job = Job.objects.get(pk=job_id)
+    try:
+        import_string(job.function)(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=job.retry_delay())
+            logger.warning(
+                'Job %s failed (attempt %s/%s), retried at %s', job, job.attempts, job.max_attempts, job.run_at,
+            )
+        else:
+            job.status = JobStatus.FAILED
+            logger.error('Job %s failed after %s attempts:\n%s', job, job.attempts, job.last_error)
+        job.locked_by, job.locked_at = '', None
+        job.save(update_fields=['status', 'run_at', 'last_error', 'locked_by', 'locked_at'])
+        return False
+    job.delete()
+    return True
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job, JobStatus
+from .queue import enqueue, run_job
+
+CALLS = []
+
+
+def record_call(*args, **kwargs):
+    CALLS.append((args, kwargs))
+
+
+def fail():
+    raise ValueError('Boom')
+
+
+class QueueTests(TestCase):
+    """ Enqueueing, claiming and retrying of the jobs. """
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_jobs_are_queued_on_commit_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record_call, args=(1,), kwargs={'key': 'value'})
+        try:
+            with transaction.atomic():
+                enqueue(record_call)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        job = Job.objects.get()
+        self.assertEqual((job.function, job.args, job.kwargs), ('jobs.tests.record_call', [1], {'key': 'value'}))
+        with self.assertRaises(ValueError):
+            enqueue(lambda: None)
+
+    def test_a_claimed_job_is_not_claimed_again_until_its_lock_times_out(self):
+        job = Job.objects.create(function='jobs.tests.record_call')
+        Job.objects.create(function='jobs.tests.record_call', run_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(Job.objects.claim('first', 10), [job.pk])
+        self.assertEqual(Job.objects.claim('second', 10), [])
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(Job.objects.claim('second', 10), [job.pk])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (JobStatus.RUNNING, 'second', 2))
+
+    def test_successful_jobs_are_deleted(self):
+        job = Job.objects.create(function='jobs.tests.record_call', args=[1, 2], kwargs={'three': 3})
+        Job.objects.claim('worker', 1)
+        self.assertTrue(run_job(job.pk))
+        self.assertEqual(CALLS, [((1, 2), {'three': 3})])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_RETRY_BACKOFF_SECONDS=10, JOBS_RETRY_BACKOFF_MAX_SECONDS=15)
+    def test_failed_jobs_are_retried_with_backoff_then_kept(self):
+        job = Job.objects.create(function='jobs.tests.fail', max_attempts=3)
+        delays = []
+        for attempt in range(3):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            Job.objects.claim('worker', 1)
+            before = timezone.now()
+            with self.assertLogs('jobs'):
+                self.assertFalse(run_job(job.pk))
+            job.refresh_from_db()
+            delays.append((job.run_at - before).total_seconds())
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIn('ValueError: Boom', job.last_error)
+        self.assertTrue(5 <= delays[0] <= 10 and 7.5 <= delays[1] <= 15)
+
+
+class WorkerTests(TransactionTestCase):
+    """ The run_worker command, running the jobs in a thread pool. """
+
+    def test_worker_runs_the_due_jobs_then_exits(self):
+        CALLS.clear()
+        for value in range(6):
+            enqueue(record_call, args=(value,))
+        enqueue(fail, max_attempts=1)
+        out = StringIO()
+        with self.assertLogs('jobs'):
+            call_command('run_worker', once=True, concurrency=3, pool='thread', stdout=out)
+        self.assertIn('6 jobs succeeded, 1 failed', out.getvalue())
+        self.assertEqual(sorted(args[0] for args, kwargs in CALLS), list(range(6)))
+        self.assertEqual(list(Job.objects.values_list('status', flat=True)), [JobStatus.FAILED])
@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+MIDDLEWARE = 'monitoring.middleware.RequestMetricsMiddleware'
+
+
+class Command(BaseCommand):
+    """ Measure the overhead of the RequestMetricsMiddleware on the current database.
+
+    The same path is requested alternately with and without the middleware, through the full middleware stack,
+    and the median request times are compared.
+    """
+    help = 'Measure the request time overhead of the monitoring middleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='/tickets/list/', help='Path to request.')
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests per configuration.')
+
+    def handle(self, *args, path: str, requests: int, **options):
+        without = [middleware for middleware in settings.MIDDLEWARE if middleware != MIDDLEWARE]
+        clients = {}
+        for name, middleware in (('with', [MIDDLEWARE] + without), ('without', without)):
+            # The client handler loads the middleware chain on its first request: warm it up under each setting
+            with override_settings(MIDDLEWARE=middleware):
+                clients[name] = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+                response = clients[name].get(path)
+                if response.status_code != 200:
+                    raise CommandError(f'{path} answered {response.status_code}.')
+
+        timings = {'with': [], 'without': []}
+        for _ in range(requests):
+            for name, client in clients.items():
+                start = time.perf_counter()
+                client.get(path)
+                timings[name].append(time.perf_counter() - start)
+
+        with_median = statistics.median(timings['with']) * 1000
+        without_median = statistics.median(timings['without']) * 1000
+        self.stdout.write(
+            f'{path}: {without_median:.3f} ms without, {with_median:.3f} ms with the middleware, '
+            f'overhead {(with_median - without_median) / without_median:+.1%}'
+        )
@@ -0,0 +1,159 @@
+""" In-process metrics, exported in the Prometheus text format.
+
+Every process (e.g. gunicorn worker) aggregates its own metrics: each scrape of /monitoring/metrics reads the
+metrics of the worker serving it.
+
+Classes:
+    Histogram: HDR-style log-linear histogram of integer values, with bounded relative error
+    Registry: thread safe collection of labelled counters and histograms
+
+Objects:
+    registry: the registry of the process, filled by the monitoring middleware
+"""
+import threading
+from typing import Dict, Iterable, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """ Log-linear histogram of non negative integers, in the spirit of HdrHistogram.
+
+    Every power of two range is split into 2**sub_bucket_bits buckets of equal width, so that recording a value is
+    O(1) and the quantiles are exact to 1 / 2**sub_bucket_bits (12.5% with the default 3 bits) whatever the range.
+
+    Public methods:
+        record(value): count one occurrence of the value
+        quantile(q): return an upper bound of the q-quantile of the recorded values
+    Instance variables:
+        count: number of recorded values
+        total: sum of the recorded values
+    """
+
+    def __init__(self, sub_bucket_bits: int = 3):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+
+    def bucket_index(self, value: int) -> int:
+        """ Return the index of the bucket of the value, increasing with the value. """
+        bits = self.sub_bucket_bits
+        if value < (1 << bits):
+            return value
+        shift = value.bit_length() - bits - 1
+        return ((shift + 1) << bits) + (value >> shift) - (1 << bits)
+
+    def bucket_upper_bound(self, index: int) -> int:
+        """ Return the highest value counted in the bucket. """
+        bits = self.sub_bucket_bits
+        if index < (1 << bits):
+            return index
+        shift = (index >> bits) - 1
+        lower = ((1 << bits) + (index & ((1 << bits) - 1))) << shift
+        return lower + (1 << shift) - 1
+
+    def record(self, value: int):
+        value = max(0, int(value))
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> int:
+        """ Return the upper bound of the bucket holding the q-quantile (0 <= q <= 1), 0 when empty. """
+        if not self.count:
+            return 0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return self.bucket_upper_bound(index)
+        return self.bucket_upper_bound(max(self.buckets))
+
+
+class Registry:
+    """ Thread safe collection of the metrics of the process.
+
+    The histograms are exported as Prometheus summaries (quantiles, sum and count), converting the recorded
+    integers with the scale given at declaration (e.g. microseconds recorded, seconds exported).
+
+    Public methods:
+        counter(name, help): declare a counter
+        histogram(name, help, scale, quantiles): declare a histogram
+        inc(name, labels, amount): increment a counter
+        observe(name, labels, value): record a value in a histogram
+        render(): return all the metrics in the Prometheus text format
+        clear(): reset all the values, keeping the declarations
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.declarations: Dict[str, dict] = {}
+        self.values: Dict[str, dict] = {}
+
+    def counter(self, name: str, help: str):
+        self.declarations[name] = {'type': 'counter', 'help': help}
+        self.values.setdefault(name, {})
+
+    def histogram(self, name: str, help: str, scale: float = 1, quantiles: Iterable[float] = (0.5, 0.9, 0.99)):
+        self.declarations[name] = {'type': 'summary', 'help': help, 'scale': scale, 'quantiles': tuple(quantiles)}
+        self.values.setdefault(name, {})
+
+    def inc(self, name: str, labels: Labels, amount: int = 1):
+        with self.lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: int):
+        with self.lock:
+            series = self.values[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram()
+            histogram.record(value)
+
+    def clear(self):
+        with self.lock:
+            for series in self.values.values():
+                series.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for name, declaration in self.declarations.items():
+                lines.append(f'# HELP {name} {declaration["help"]}')
+                lines.append(f'# TYPE {name} {declaration["type"]}')
+                for labels, value in sorted(self.values[name].items()):
+                    if declaration['type'] == 'counter':
+                        lines.append(f'{name}{format_labels(labels)} {value}')
+                        continue
+                    scale = declaration['scale']
+                    for q in declaration['quantiles']:
+                        quantile_labels = labels + (('quantile', str(q)),)
+                        lines.append(f'{name}{format_labels(quantile_labels)} {value.quantile(q) * scale:g}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {value.total * scale:g}')
+                    lines.append(f'{name}_count{format_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels: Labels) -> str:
+    """ Return the labels in the Prometheus text format, e.g. {view="tickets:list",method="GET"}. """
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = Registry()
+registry.counter('django_http_requests_total', 'Number of HTTP requests by view, method and status.')
+registry.histogram(
+    'django_http_request_duration_seconds', 'Wall time of the HTTP requests by view.', scale=1e-6,
+)
+registry.histogram('django_http_request_db_queries', 'Number of database queries per HTTP request by view.')
+registry.histogram(
+    'django_http_request_db_duration_seconds', 'Time spent in the database per HTTP request by view.', scale=1e-6,
+)
@@ -0,0 +1,80 @@
+""" Per request instrumentation.
+
+Classes:
+    RequestMetricsMiddleware: record the wall time, query count and database time of every request
+"""
+import asyncio
+import time
+
+from django.conf import settings
+
+from .metrics import registry
+from .queries import QueryInspector, QueryRecorder, request_recorder
+
+
+class RequestMetricsMiddleware:
+    """ Record the metrics of every request in monitoring.metrics.registry, labelled by view name.
+
+    When MONITORING_INSPECT_QUERIES is set, the queries are also fingerprinted to log the probable N+1 and the slow
+    queries of the request (see monitoring.queries).
+
+    Requests which do not resolve to a view are labelled '<unresolved>'. Queries run while a streaming response
+    is consumed are not counted.
+
+    The middleware works in the synchronous (WSGI) and asynchronous (ASGI) chains: the queries are recorded by
+    monitoring.queries.record_request_queries, whatever the thread they run in.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.inspect_queries = settings.MONITORING_INSPECT_QUERIES
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, like django.utils.deprecation.MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def new_recorder(self) -> QueryRecorder:
+        if not self.inspect_queries:
+            return QueryRecorder()
+        return QueryInspector(
+            repeat_threshold=settings.MONITORING_N_PLUS_ONE_THRESHOLD,
+            slow_threshold=settings.MONITORING_SLOW_QUERY_SECONDS,
+        )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = self.new_recorder()
+        token = request_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_recorder.reset(token)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        recorder = self.new_recorder()
+        token = request_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_recorder.reset(token)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, recorder: QueryRecorder, duration: float):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        labels = (('view', view),)
+        registry.inc('django_http_requests_total', labels + (
+            ('method', request.method), ('status', str(response.status_code)),
+        ))
+        registry.observe('django_http_request_duration_seconds', labels, duration * 1e6)
+        registry.observe('django_http_request_db_queries', labels, recorder.count)
+        registry.observe('django_http_request_db_duration_seconds', labels, recorder.duration * 1e6)
+        if self.inspect_queries:
+            recorder.log(view)
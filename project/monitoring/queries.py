@@ -0,0 +1,198 @@
+""" Recording of the database queries, detection of N+1 and slow queries.
+
+In production, the RequestMetricsMiddleware records the queries with a QueryInspector and logs, on the
+'monitoring.queries' logger, the statements repeated more than MONITORING_N_PLUS_ONE_THRESHOLD times in one request
+and those slower than MONITORING_SLOW_QUERY_SECONDS, with the view and the project code frame which ran them.
+In tests, query_budget() fails when a block of code exceeds a number of queries or repeats a statement.
+
+Classes:
+    QueryRecorder: database execute wrapper counting and timing the queries
+    QueryInspector: query recorder counting the statements by fingerprint and catching slow ones
+    QueryBudgetExceeded: assertion error raised by query_budget
+    query_budget: context manager and decorator limiting the queries run by a block of code
+
+Functions:
+    record_request_queries: execute wrapper recording the queries in the recorder of the current request
+    install_request_recorder: connection_created receiver installing record_request_queries on every connection
+    fingerprint: normalize a SQL statement, replacing its literals by placeholders
+    caller_frame: return the innermost frame of the project code calling the database
+"""
+import logging
+import os
+import re
+import sys
+import time
+import traceback
+from contextlib import ContextDecorator, ExitStack
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('monitoring.queries')
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+VALUES_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+# Set by the RequestMetricsMiddleware for the duration of a request
+request_recorder: ContextVar[Optional['QueryRecorder']] = ContextVar('request_recorder', default=None)
+
+
+def fingerprint(sql: str) -> str:
+    """ Return the statement with its literals replaced by ?, so that executions differing by values compare equal.
+
+    Lists of placeholders, e.g. IN (%s, %s, %s), are collapsed to (...) whatever their length.
+    """
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = VALUES_LIST.sub('(...)', sql.replace('%s', '?'))
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def caller_frame() -> Optional[traceback.FrameSummary]:
+    """ Return the innermost frame of the project code (outside site-packages and this app) in the current stack. """
+    base_dir = str(settings.BASE_DIR)
+    monitoring_dir = os.path.dirname(__file__)
+    for frame in reversed(traceback.extract_stack(sys._getframe(1))):
+        filename = frame.filename
+        if 'site-packages' in filename or filename.startswith(monitoring_dir):
+            continue
+        if filename.startswith(base_dir):
+            return frame
+    return None
+
+
+class QueryRecorder:
+    """ Execute wrapper (see connection.execute_wrapper) counting and timing the queries it runs.
+
+    Instance variables:
+        count: number of executed queries
+        duration: time spent executing them, in seconds
+    Subclasses can extend record() to inspect every query.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - start)
+
+    def record(self, sql: str, duration: float):
+        self.count += 1
+        self.duration += duration
+
+
+class QueryInspector(QueryRecorder):
+    """ Query recorder counting the executions of every statement fingerprint and catching the slow queries.
+
+    Instance variables:
+        fingerprints: number of executions per fingerprint
+        repeated: fingerprints executed more than repeat_threshold times, with the frame of the first exceeding call
+        slow: (sql, duration, frame) of the queries slower than slow_threshold seconds
+    """
+
+    def __init__(self, repeat_threshold: Optional[int] = None, slow_threshold: Optional[float] = None):
+        super().__init__()
+        self.repeat_threshold = repeat_threshold
+        self.slow_threshold = slow_threshold
+        self.fingerprints: Dict[str, int] = {}
+        self.repeated: Dict[str, Optional[traceback.FrameSummary]] = {}
+        self.slow: List[Tuple[str, float, Optional[traceback.FrameSummary]]] = []
+
+    def record(self, sql: str, duration: float):
+        super().record(sql, duration)
+        key = fingerprint(sql)
+        count = self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+        # The stack is only walked for the offending queries, once per repeated fingerprint
+        if self.repeat_threshold is not None and count == self.repeat_threshold + 1:
+            self.repeated[key] = caller_frame()
+        if self.slow_threshold is not None and duration > self.slow_threshold:
+            self.slow.append((sql, duration, caller_frame()))
+
+    def log(self, view: str):
+        """ Log the repeated and slow queries found during the request of the view. """
+        for key, frame in self.repeated.items():
+            logger.warning(
+                'Probable N+1 in %s: %d executions of %s (first repeated from %s)',
+                view, self.fingerprints[key], key, format_frame(frame),
+            )
+        for sql, duration, frame in self.slow:
+            logger.warning('Slow query in %s: %.3f s from %s: %s', view, duration, format_frame(frame), sql)
+
+
+def format_frame(frame: Optional[traceback.FrameSummary]) -> str:
+    if frame is None:
+        return '<unknown>'
+    return f'{frame.filename}:{frame.lineno} in {frame.name}'
+
+
+def record_request_queries(execute, sql, params, many, context):
+    """ Execute wrapper recording the query in the recorder of the current request, if any.
+
+    Being installed on every connection and reading the recorder from a context variable, it follows the request
+    into the threads where its queries run: under ASGI, sync_to_async() copies the context into them.
+    """
+    recorder = request_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_request_recorder(sender, connection, **kwargs):
+    """ Install record_request_queries on every new connection, once per connection object. """
+    if record_request_queries not in connection.execute_wrappers:
+        # First, as connection.execute_wrapper() blocks pop the last wrapper on exit
+        connection.execute_wrappers.insert(0, record_request_queries)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """ Raised by query_budget when the code ran more queries, or repeated a statement more, than allowed. """
+
+
+class query_budget(ContextDecorator):
+    """ Fail when the enclosed code runs more than max_queries queries or a statement more than max_repeats times.
+
+    Usable as a context manager or a decorator, e.g. in a test:
+
+        with query_budget(max_queries=5, max_repeats=1):
+            self.client.get(reverse('tickets:list'))
+
+    :param max_queries: maximum number of queries, unlimited when None
+    :param max_repeats: maximum number of executions of the same statement fingerprint, unlimited when None
+    :raises QueryBudgetExceeded: on exit, listing the offending statements
+    """
+
+    def __init__(self, max_queries: Optional[int] = None, max_repeats: Optional[int] = None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def __enter__(self):
+        self.inspector = QueryInspector(repeat_threshold=self.max_repeats)
+        self.stack = ExitStack()
+        for alias in connections:
+            self.stack.enter_context(connections[alias].execute_wrapper(self.inspector))
+        return self.inspector
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stack.close()
+        if exc_type is not None:
+            return False
+        problems = []
+        if self.max_queries is not None and self.inspector.count > self.max_queries:
+            problems.append(f'{self.inspector.count} queries executed, {self.max_queries} allowed')
+        for key, frame in self.inspector.repeated.items():
+            problems.append(
+                f'{self.inspector.fingerprints[key]} executions of {key} (from {format_frame(frame)}), '
+                f'{self.max_repeats} allowed'
+            )
+        if problems:
+            raise QueryBudgetExceeded('Query budget exceeded:\n' + '\n'.join(problems))
+        return False
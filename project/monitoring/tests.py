@@ -1,3 +1,129 @@
-from django.test import TestCase
+import random
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.http import HttpResponse
+from django.urls import path, reverse
+
+from groups.models import Group, GroupMember
+from tickets.models import Ticket
+from .metrics import Histogram, registry
+from .queries import fingerprint, query_budget, QueryBudgetExceeded
+
+
+class HistogramTests(SimpleTestCase):
+    """ Accuracy of the log-linear histogram. """
+
+    def test_buckets_are_contiguous_and_increasing(self):
+        histogram = Histogram()
+        previous = -1
+        for value in range(5000):
+            index = histogram.bucket_index(value)
+            self.assertIn(index, (previous, previous + 1))
+            self.assertLessEqual(value, histogram.bucket_upper_bound(index))
+            previous = index
+
+    def test_quantiles_are_within_the_relative_error(self):
+        rng = random.Random(0)
+        values = sorted(rng.randint(0, 10 ** 7) for _ in range(10000))
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[round(q * len(values)) - 1]
+            self.assertLessEqual(exact, histogram.quantile(q))
+            self.assertLessEqual(histogram.quantile(q), exact * 1.125)
+        self.assertEqual(histogram.count, 10000)
+        self.assertEqual(histogram.total, sum(values))
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    """ Per view metrics recorded by the middleware and exported at /monitoring/metrics. """
+
+    def setUp(self):
+        registry.clear()
+
+    def test_records_wall_time_and_queries_per_view(self):
+        Ticket.objects.create(summary='Printer')
+        self.client.get(reverse('tickets:list'))
+        self.client.get(reverse('tickets:list'))
+        metrics = self.client.get(reverse('monitoring:metrics')).content.decode()
+
+        self.assertIn('django_http_requests_total{view="tickets:list",method="GET",status="200"} 2', metrics)
+        self.assertIn('django_http_request_duration_seconds_count{view="tickets:list"} 2', metrics)
+        self.assertIn('django_http_request_db_queries_sum{view="tickets:list"} 2', metrics)
+        self.assertIn('django_http_request_db_duration_seconds{view="tickets:list",quantile="0.99"}', metrics)
+
+    async def test_records_queries_of_asgi_requests(self):
+        # The async middleware chain runs the view, and its queries, in another thread
+        await self.async_client.get(reverse('tickets:list'))
+        self.assertIn('django_http_request_db_queries_sum{view="tickets:list"} 1', registry.render())
+
+    def test_requests_rejected_before_url_resolution_are_grouped(self):
+        self.client.get(reverse('tickets:list'), HTTP_HOST='unknown.example.com')
+        self.assertIn('view="<unresolved>",method="GET",status="400"', registry.render())
+
+    @override_settings(MONITORING_METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_metrics_are_only_served_to_allowed_addresses(self):
+        self.assertEqual(self.client.get(reverse('monitoring:metrics')).status_code, 403)
+        response = self.client.get(reverse('monitoring:metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+
+
+class FingerprintTests(SimpleTestCase):
+
+    def test_literals_and_placeholder_lists_are_normalized(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'it''s'  AND b = 42 AND c IN (%s, %s, %s) AND d = %s"),
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...) AND d = ?',
+        )
+        self.assertEqual(fingerprint('SELECT "T3"."id" FROM x T3'), 'SELECT "T3"."id" FROM x T3')
+
+
+class QueryBudgetTests(TestCase):
+    """ Detection of the N+1 queries, in tests and in production. """
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(name='Support')
+        for i in range(12):
+            user = get_user_model().objects.create(username=f'user{i}')
+            GroupMember.objects.create(group=group, user=user)
+
+    def test_repeated_statement_exceeds_the_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '12 executions of SELECT'):
+            with query_budget(max_repeats=1):
+                [str(member) for member in GroupMember.objects.all()]
+
+    def test_query_count_exceeds_the_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 queries executed, 1 allowed'):
+            with query_budget(max_queries=1):
+                list(Group.objects.all())
+                list(Group.objects.all())
+
+    def test_listing_fits_the_budget(self):
+        with query_budget(max_queries=1, max_repeats=1):
+            [str(member) for member in GroupMember.objects.for_listing()]
+
+    def test_usable_as_decorator(self):
+        @query_budget(max_queries=0)
+        def no_queries():
+            list(Group.objects.all())
+        self.assertRaises(QueryBudgetExceeded, no_queries)
+
+    @override_settings(ROOT_URLCONF='monitoring.tests', MONITORING_N_PLUS_ONE_THRESHOLD=5)
+    def test_middleware_logs_probable_n_plus_one_with_its_origin(self):
+        with self.assertLogs('monitoring.queries', 'WARNING') as logs:
+            self.client.get('/members')
+        self.assertIn('Probable N+1 in members: 12 executions of SELECT', logs.output[0])
+        self.assertIn('groups/models.py', logs.output[0])  # GroupMember.__str__ reads the user
+
+
+def list_members(request):
+    return HttpResponse(', '.join(str(member) for member in GroupMember.objects.all()))
+
+
+urlpatterns = [
+    path('members', list_members, name='members'),
+]
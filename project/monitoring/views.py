@@ -1,3 +1,14 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 
-# Create your views here.
+from .metrics import registry
+
+
+def metrics(request):
+    """ Return the metrics of the process in the Prometheus text format.
+
+    Only the addresses listed in the MONITORING_METRICS_ALLOWED_IPS setting are served.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.MONITORING_METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
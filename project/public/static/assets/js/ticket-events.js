@@ -0,0 +1,63 @@
+/*
+ * Keeps the ticket list up to date with the changes pushed by the server (server-sent events, see tickets.events),
+ * instead of reloading the page.
+ *
+ * The list (#ticket-list) declares the events URL (data-ticket-events), whether it shows the newest tickets
+ * (data-newest: the created tickets are only added to the first page) and its filters (data-status, data-group).
+ * Every `ticket` event carries the action ('created', 'updated' or 'deleted'), the id and, unless deleted, the
+ * status, the group and the HTML of the list item (a ticket moved to another group is updated, and dropped by the
+ * lists filtered on its previous group). A `reload` event, or a reconnection after an interruption, reloads the
+ * page: changes were missed, or the groups of the user changed.
+ */
+(function () {
+  'use strict';
+
+  var list = document.getElementById('ticket-list');
+  if (!list || !list.dataset.ticketEvents || !window.EventSource) {
+    return;
+  }
+
+  function matches(change) {
+    return (!list.dataset.status || list.dataset.status === change.status) &&
+      (!list.dataset.group || list.dataset.group === change.group);
+  }
+
+  function itemOf(html) {
+    var template = document.createElement('template');
+    template.innerHTML = html.trim();
+    return template.content.firstElementChild;
+  }
+
+  function apply(change) {
+    var current = list.querySelector('[data-ticket-id="' + change.id + '"]');
+    if (change.action === 'deleted' || !matches(change)) {
+      if (current) {
+        current.remove();
+      }
+    } else if (current) {
+      current.replaceWith(itemOf(change.html));
+    } else if (change.action === 'created' && list.dataset.newest === 'true') {
+      list.insertBefore(itemOf(change.html), list.firstElementChild);
+    }
+  }
+
+  var source = new EventSource(list.dataset.ticketEvents);
+  var interrupted = false;
+
+  source.addEventListener('ticket', function (event) {
+    apply(JSON.parse(event.data));
+  });
+  source.addEventListener('reload', function () {
+    source.close();
+    window.location.reload();
+  });
+  source.addEventListener('error', function () {
+    interrupted = true;   // The browser reconnects on its own
+  });
+  source.addEventListener('open', function () {
+    if (interrupted) {
+      source.close();
+      window.location.reload();
+    }
+  });
+})();
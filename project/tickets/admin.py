@@ -1,6 +1,11 @@
 from django.contrib import admin
+
+from appsutils.admin import AuditedAdminMixin
 from . import models
 
 
 # Register your models here.
-admin.site.register(models.Ticket)
+@admin.register(models.Ticket)
+class TicketAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('summary', 'status', 'group', 'created_by', 'created_on', 'changed_by', 'changed_on')
+    list_filter = ('status', 'record_status')
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def restore_search_index(using: str, **kwargs):
+    """ Reinstall the search index synchronisation, which a migration rebuilding the tickets table may drop. """
+    from .models import Ticket
+    from .search import get_search_backend
+
+    connection = connections[using]
+    if Ticket._meta.db_table in connection.introspection.table_names():
+        get_search_backend(connection).install()
 
 
 class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tickets'
+
+    def ready(self):
+        from . import signals  # noqa: F401 Connect the signal receivers
+        post_migrate.connect(restore_search_index, sender=self)
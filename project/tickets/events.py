@@ -0,0 +1,168 @@
+""" Real-time updates of the ticket lists, pushed to the browsers as server-sent events.
+
+Every change of a ticket (creation, save, deletion) is published once committed to the channel of its group (see
+appsutils.pubsub), with the HTML of its list item rendered once whatever the number of clients. ticket_events
+streams the changes of the groups of the user on TICKET_EVENTS_PATH in the ASGI profile (see core.asgi), and
+public/static/assets/js/ticket-events.js patches the open lists with them: the agents no longer reload the lists,
+running their query and rendering the whole layout, to see the changes.
+
+The changes made by bulk operations (QuerySet.update(), bulk_create()...) are not pushed, nor those of the other
+processes than the ASGI workers (e.g. the job workers) unless EVENTS_BROKER relays them.
+
+Functions:
+    group_channel: return the channel of the ticket changes of a group
+    publish_ticket_change: publish the change of a ticket to the lists of its group, once committed
+    session_member: return the user logged in a session, with their cache version and group ids
+    memberships_changed: return whether the cache version of a user changed
+    ticket_events: ASGI application streaming the ticket changes of the groups of the user
+"""
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from typing import FrozenSet, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from accounts.caching import get_user_cache_version
+from appsutils.asynchronous import wait_disconnect
+from appsutils.db import refresh_connections
+from appsutils.pubsub import get_broker
+from groups.membership import get_user_group_ids
+
+RETRY_MILLISECONDS = 5000   # Delay of the reconnections of the browsers
+
+
+def group_channel(group_id: int) -> str:
+    return f'tickets:group:{group_id}'
+
+
+def publish_ticket_change(ticket, action: str, group_id: Optional[int], previous_group_id: Optional[int] = None,
+                          using: Optional[str] = None):
+    """ Publish the change of the ticket to the channel of its group, once the transaction commits.
+
+    The created and updated tickets are sent with their status, group and list item (tickets/_ticket.html), the
+    deleted ones with their id only. A ticket moved to another group is sent updated to the previous one too: the
+    lists show it as long as it exists, those filtered on the previous group drop it (see ticket-events.js).
+
+    :param ticket: the ticket changed
+    :param action: 'created', 'updated' or 'deleted'
+    :param group_id: the group of the ticket, given by the caller: it may be deferred, and loading it from a deletion
+        signal would query the deleted row
+    :param previous_group_id: the group of the ticket before the change
+    :param using: the database whose transaction makes the change
+    """
+    ticket_id = ticket.pk     # The pk of a deleted ticket is cleared before the commit
+    channels = [group_channel(pk) for pk in dict.fromkeys((group_id, previous_group_id)) if pk is not None]
+    if not channels:
+        return  # Listed by no group
+
+    def publish():
+        broker = get_broker()
+        listening = [channel for channel in channels if broker.has_subscribers(channel)]
+        if not listening:
+            return
+        message = {'action': action, 'id': ticket_id}
+        if action != 'deleted':
+            message.update(
+                status=ticket.status.name, group=ticket.group.slug if group_id is not None else '',
+                html=render_to_string('tickets/_ticket.html', {'ticket': ticket}),
+            )
+        for channel in listening:
+            broker.publish(channel, message)
+
+    transaction.on_commit(publish, using=using)
+
+
+def session_member(session_key: Optional[str]) -> Optional[Tuple[int, int, FrozenSet[int]]]:
+    """ Return the id, cache version and group ids of the user logged in the session, None for an anonymous user.
+
+    The version is read before the group ids: a membership change committed in between bumps it again (see
+    memberships_changed).
+    """
+    refresh_connections()
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        # auth.get_user() only reads the session of the request, and checks it against the password of the user
+        user = auth.get_user(SimpleNamespace(session=engine.SessionStore(session_key)))
+        if not user.is_authenticated:
+            return None
+        return user.pk, get_user_cache_version(user), get_user_group_ids(user)
+    finally:
+        refresh_connections()
+
+
+def memberships_changed(user_id: int, version: int) -> bool:
+    """ Return whether the cache version of the user changed since it was read, e.g. by a change of their groups. """
+    return get_user_cache_version(SimpleNamespace(pk=user_id)) != version
+
+
+def event(name: str, data: str = '') -> bytes:
+    return f'event: {name}\ndata: {data}\n\n'.encode()
+
+
+async def ticket_events(scope: dict, receive, send):
+    """ Stream the changes of the tickets of the groups of the logged in user, as server-sent events:
+        ticket: a change, as JSON: action and id, and status, group and html unless deleted
+        reload: changes were lost, the client lagging too much, or the groups of the user changed: the list must be
+            reloaded
+    and comments to keep the idle streams open. Anonymous users get a 403.
+
+    The groups of the user are read when the stream opens. Once their cache version changes (checked every
+    EVENTS_KEEPALIVE_SECONDS), e.g. when they join or leave a group, a reload ends the stream. The browsers also
+    reconnect (and reload the list) when the server closes it, e.g. on restart.
+    """
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', ()):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    member = await sync_to_async(session_member)(morsel.value if morsel else None)
+    if member is None:
+        await send({'type': 'http.response.start', 'status': 403, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Forbidden'})
+        return
+
+    user_id, version, group_ids = member
+    subscription = get_broker().subscribe(group_channel(group_id) for group_id in group_ids)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),   # Not buffered by nginx
+        ]})
+        retry = f'retry: {RETRY_MILLISECONDS}\n\n'.encode()
+        await send({'type': 'http.response.body', 'body': retry, 'more_body': True})
+        loop = asyncio.get_running_loop()
+        checked = loop.time()
+        while True:
+            message = asyncio.ensure_future(subscription.get())
+            done, pending = await asyncio.wait(
+                {message, disconnected}, timeout=settings.EVENTS_KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                message.cancel()
+                break
+            if message in done:
+                change = message.result()
+                body = event('reload') if change is None else event('ticket', json.dumps(change))
+            else:
+                message.cancel()
+                body = b': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+            if loop.time() - checked >= settings.EVENTS_KEEPALIVE_SECONDS:
+                if await sync_to_async(memberships_changed)(user_id, version):
+                    # Subscribed to the former groups of the user: the list reloads and opens a new stream
+                    await send({'type': 'http.response.body', 'body': event('reload')})
+                    break
+                checked = loop.time()
+    finally:
+        disconnected.cancel()
+        subscription.close()
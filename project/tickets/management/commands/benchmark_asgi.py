@@ -0,0 +1,158 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.models import Ticket
+
+PROFILES = {
+    'wsgi': (['core.wsgi:application', '-k', 'sync'], {'ASYNC_VIEWS': 'False'}),
+    'asgi': (['core.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'], {'ASYNC_VIEWS': 'True'}),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(port: int, path: str, timeout: float = 10.0) -> int:
+    """ Request the path on a new connection and return the status code, 0 when it failed or timed out. """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return 0
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return 0
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1]) if response.startswith(b'HTTP/') else 0
+
+
+async def slow_client(port: int, path: str, stop: asyncio.Event, interval: float):
+    """ Hold a connection open until stopped, sending the request headers one every interval, like a slow client. """
+    while not stop.is_set():
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError:
+            await asyncio.sleep(interval)
+            continue
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'.encode())
+            while not stop.is_set():
+                writer.write(b'X-Slow: 1\r\n')
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(stop.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+        except OSError:
+            pass    # Dropped by the server, reconnect
+        finally:
+            writer.close()
+
+
+async def load(port: int, paths, clients: int, slow_clients: int, duration: float, interval: float, timeout: float):
+    """ Request the paths from concurrent clients for duration seconds, while slow clients hold connections.
+
+    :returns: the latencies of the successful requests, the number of failed (or timed out) ones and the seconds
+        elapsed until the last response
+    """
+    stop = asyncio.Event()
+    slow = [asyncio.ensure_future(slow_client(port, paths[0], stop, interval)) for _ in range(slow_clients)]
+    await asyncio.sleep(min(1.0, interval))     # Let the slow clients connect
+    latencies, failures = [], 0
+    start_time = time.perf_counter()
+    deadline = start_time + duration
+
+    async def client(index: int):
+        nonlocal failures
+        request = index
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await fetch(port, paths[request % len(paths)], timeout)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+            request += 1
+
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    elapsed = time.perf_counter() - start_time
+    stop.set()
+    await asyncio.gather(*slow)
+    return latencies, failures, elapsed
+
+
+class Command(BaseCommand):
+    """ Compare the WSGI (gunicorn sync workers) and ASGI (uvicorn workers, ASYNC_VIEWS) deployment profiles.
+
+    Both profiles are started in turn with the same number of workers on the current database, then the ticket
+    list and detail pages are requested by concurrent clients while --slow-clients connections trickle their
+    request headers, as clients on slow networks do. A sync worker is held by each slow connection, an uvicorn
+    worker keeps them on its event loop. Requires gunicorn and uvicorn, and tickets in the database.
+    """
+    help = 'Load test the ticket list and detail pages under the WSGI and the ASGI deployment profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+        parser.add_argument('--workers', type=int, default=2, help='Number of server processes per profile.')
+        parser.add_argument('--clients', type=int, default=20, help='Number of concurrent clients.')
+        parser.add_argument('--slow-clients', type=int, default=0, help='Number of connections held by slow clients.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per profile.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between the slow clients headers.')
+        parser.add_argument('--timeout', type=float, default=5.0, help='Seconds after which a request fails.')
+
+    def handle(self, *args, profiles, workers: int, clients: int, slow_clients: int, duration: float,
+               interval: float, timeout: float, **options):
+        ticket = Ticket.objects.order_by('-id').first()
+        if ticket is None:
+            raise CommandError('No ticket to request, import some first (see import_tickets).')
+        paths = ['/tickets/list/', f'/tickets/{ticket.pk}/']
+        for profile in profiles:
+            port = free_port()
+            server = self.start(profile, port, workers)
+            try:
+                latencies, failures, elapsed = asyncio.run(
+                    load(port, paths, clients, slow_clients, duration, interval, timeout)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            if not latencies:
+                self.stdout.write(f'{profile}: no successful request, {failures} failures')
+                continue
+            self.stdout.write(
+                f'{profile}: {len(latencies) / elapsed:.0f} requests/s, '
+                f'median {statistics.median(latencies) * 1000:.1f} ms, '
+                f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, {failures} failures '
+                f'({workers} workers, {clients} clients, {slow_clients} slow clients)'
+            )
+
+    def start(self, profile: str, port: int, workers: int) -> subprocess.Popen:
+        """ Start gunicorn with the profile and wait for it to answer. """
+        arguments, environment = PROFILES[profile]
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *arguments, '-w', str(workers), '-b', f'127.0.0.1:{port}',
+             '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env={**os.environ, 'DEBUG': 'False', **environment},
+        )
+        deadline = time.perf_counter() + 30
+        while asyncio.run(fetch(port, '/tickets/list/')) != 200:
+            if server.poll() is not None or time.perf_counter() > deadline:
+                server.kill()
+                raise CommandError(f'The {profile} server did not start.')
+            time.sleep(0.2)
+        return server
@@ -0,0 +1,70 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tickets.models import Ticket
+from tickets.search import get_search_backend, search_tickets
+
+WORDS = (
+    'printer network password email laptop screen keyboard vpn access account server disk backup license '
+    'install update crash slow error timeout login folder share phone badge meeting room projector cable wifi '
+    'invoice payroll report database outlook teams calendar mouse monitor battery charger scanner toner'
+).split()
+
+
+class Command(BaseCommand):
+    """ Time the full-text search of the tickets on the current database.
+
+    With --seed, synthetic tickets are first inserted with bulk_create (the index triggers keep the full-text
+    index up to date), e.g. `manage.py benchmark_search --seed 1000000`.
+    """
+    help = 'Time full-text ticket searches, optionally after seeding synthetic tickets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Number of synthetic tickets to insert first.')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of runs of every query.')
+        parser.add_argument(
+            'queries', nargs='*', default=['printer', 'vpn time', 'pass', 'disk backup error', 'sca'],
+            help='Queries to time.',
+        )
+
+    def handle(self, *args, seed: int, repeat: int, queries, **options):
+        if seed:
+            self.seed(seed)
+        self.stdout.write(
+            f'{Ticket.objects.count()} tickets, {type(get_search_backend(connection)).__name__} on {connection.vendor}'
+        )
+        for query in queries:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results = search_tickets(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{query!r}: {len(results)} results, median {statistics.median(timings):.1f} ms, '
+                f'max {timings[-1]:.1f} ms'
+            )
+
+    def seed(self, count: int, batch_size: int = 10000, vocabulary_size: int = 50000):
+        """ Insert tickets made of words drawn from a Zipf distribution, like natural language. """
+        rng = random.Random(0)
+        syllables = ['ba', 'ko', 'ri', 'te', 'nu', 'sa', 'lo', 'mi', 'da', 'pe', 'gu', 'fi', 'zo', 've', 'ha', 'ju']
+        vocabulary = list(WORDS) + [
+            ''.join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(vocabulary_size - len(WORDS))
+        ]
+        weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+        for start in range(0, count, batch_size):
+            Ticket.objects.bulk_create(
+                Ticket(
+                    summary=' '.join(rng.choices(vocabulary, cum_weights=weights, k=4)),
+                    description=' '.join(rng.choices(vocabulary, cum_weights=weights, k=40)),
+                )
+                for _ in range(min(batch_size, count - start))
+            )
+            self.stdout.write(f'{min(start + batch_size, count)} tickets inserted', ending='\r')
+        self.stdout.write('')
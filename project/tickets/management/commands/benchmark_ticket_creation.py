@@ -0,0 +1,55 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import OperationalError
+
+from appsutils.db import configure_sqlite
+from tickets.models import Ticket
+
+
+def create_tickets(count: int, untuned: bool) -> int:
+    """ Create tickets one by one like concurrent requests would, return the number of failures. """
+    if untuned:
+        connection_created.disconnect(configure_sqlite)
+    failures = 0
+    for i in range(count):
+        try:
+            Ticket.objects.create(summary=f'Benchmark {i}', description=f'Created by the *benchmark*, ticket {i}')
+        except OperationalError:
+            failures += 1
+    connection.close()
+    return failures
+
+
+class Command(BaseCommand):
+    """ Measure the throughput of concurrent ticket creations, like gunicorn workers would do.
+
+    --untuned disables the SQLite tuning of appsutils.db (WAL, busy timeout) to compare with the defaults.
+    """
+    help = 'Measure the throughput of ticket creations from concurrent processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Number of concurrent processes.')
+        parser.add_argument('--tickets', type=int, default=200, help='Number of tickets created per process.')
+        parser.add_argument('--untuned', action='store_true', help='Use the SQLite defaults (rollback journal).')
+
+    def handle(self, *args, processes: int, tickets: int, untuned: bool, **options):
+        if untuned and connection.vendor == 'sqlite':
+            connection_created.disconnect(configure_sqlite)
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode = DELETE')  # WAL persists in the database file
+        connections.close_all()  # The processes must not share the connections of the parent
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            failures = sum(pool.starmap(create_tickets, [(tickets, untuned)] * processes))
+        duration = time.perf_counter() - start
+
+        created = processes * tickets - failures
+        self.stdout.write(
+            f'{created} tickets created by {processes} processes in {duration:.2f} s: '
+            f'{created / duration:.0f} tickets/s, {failures} failures'
+        )
@@ -0,0 +1,187 @@
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from groups.models import Group, GroupTicketStats
+from tickets.models import Ticket
+from tickets.rendering import description_digest, render_markdown
+from workflows.table import get_transition_table
+
+FORMATS = ('csv', 'jsonl')
+
+
+class Command(BaseCommand):
+    """ Import tickets from a CSV (with a header line) or JSONL file, e.g. exported from another tracker.
+
+    Every record (a line of the JSONL file, blank lines skipped) has a summary and optionally a description, status
+    (name of a state of the workflow of the group, the initial state by default), group (slug), created_by
+    (username) and created_on (ISO 8601). The file is streamed and the tickets inserted by batches with
+    bulk_create(), so the memory stays constant whatever the size of the file. The groups, users and states are
+    resolved through lookup maps loaded once, and the descriptions are rendered by a pool of worker processes while
+    the previous batch is inserted.
+
+    Every batch is committed together with the ticket counters of the groups (bulk_create() bypasses the ticket
+    signals) and the number of records imported so far is then written to a checkpoint file: after a failure,
+    running the same command again resumes after the last committed batch.
+    """
+    help = 'Import tickets from a CSV or JSONL file by batches, resuming from a checkpoint after a failure.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The CSV or JSONL file to import.')
+        parser.add_argument('--format', choices=FORMATS, help='The file format, guessed from its extension if omitted.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Number of tickets per batch.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of rendering processes, 1 renders in the current process.',
+        )
+        parser.add_argument('--checkpoint', help='The checkpoint file, <path>.checkpoint by default.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and import from the start.')
+
+    def handle(self, *args, path: str, format: str, batch_size: int, workers: int, checkpoint: str, restart: bool,
+               **options):
+        format = format or os.path.splitext(path)[1].lstrip('.').lower()
+        if format not in FORMATS:
+            raise CommandError(f'Unknown format {format!r}, use --format {" or ".join(FORMATS)}.')
+        checkpoint = checkpoint or f'{path}.checkpoint'
+        done = 0 if restart else self.read_checkpoint(checkpoint, path)
+        if done:
+            self.stdout.write(f'Resuming after {done} records.')
+
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.users = dict(get_user_model().objects.values_list('username', 'id'))
+        self.table = get_transition_table()
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        pending = None   # The previous batch, inserted while the current one is rendered
+        try:
+            with open(path, newline='', encoding='utf-8') as file:
+                records = csv.DictReader(file) if format == 'csv' else self.read_jsonl(file)
+                try:
+                    for batch in self.iter_batches(records, done, batch_size):
+                        descriptions = [ticket.description for ticket in batch]
+                        if executor:
+                            chunksize = max(1, len(descriptions) // (workers * 4))
+                            htmls = executor.map(render_markdown, descriptions, chunksize=chunksize)
+                        else:
+                            htmls = map(render_markdown, descriptions)
+                        if pending:
+                            done = self.insert(*pending, done, checkpoint, path)
+                        pending = batch, htmls
+                except CommandError:
+                    # Keep the valid records read before the invalid one, the import resumes after them
+                    if pending:
+                        self.insert(*pending, done, checkpoint, path)
+                    raise
+                if pending:
+                    done = self.insert(*pending, done, checkpoint, path)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f'{done} records imported.'))
+
+    @staticmethod
+    def read_jsonl(file):
+        """ Yield the records of the lines of a JSONL file, skipping the blank lines.
+
+        :raises CommandError: on a line which is not a JSON object
+        """
+        number = 0
+        for line in file:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f'Record {number}: invalid JSON, {error}.')
+            if not isinstance(record, dict):
+                raise CommandError(f'Record {number}: not a JSON object.')
+            yield record
+
+    def iter_batches(self, records, skip: int, batch_size: int):
+        """ Yield the unsaved tickets of the records by batches, skipping the first `skip` (already imported). """
+        batch = []
+        for number, record in enumerate(records, start=1):
+            if number <= skip:
+                continue
+            batch.append(self.build_ticket(number, record))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def build_ticket(self, number: int, record: dict) -> Ticket:
+        """ Return the unsaved ticket of a record, its foreign keys resolved through the lookup maps.
+
+        :raises CommandError: when the record has no summary, an unknown group, user or status, or an invalid date
+        """
+        if not record.get('summary'):
+            raise CommandError(f'Record {number}: the summary is missing.')
+        fields = {'summary': record['summary'], 'description': record.get('description') or ''}
+        for field, lookup, key in (('group_id', self.groups, 'group'), ('created_by_id', self.users, 'created_by')):
+            value = record.get(key)
+            if not value:
+                continue
+            if value not in lookup:
+                raise CommandError(f'Record {number}: unknown {key} {value!r}.')
+            fields[field] = lookup[value]
+        group_id, status = fields.get('group_id'), record.get('status')
+        fields['status_id'] = self.table.state_id(group_id, status) if status else self.table.initial_state(group_id)
+        if fields['status_id'] is None:
+            raise CommandError(f'Record {number}: unknown status {status!r} in the workflow of the group.')
+        ticket = Ticket(**fields)
+        if record.get('created_on'):
+            created_on = parse_datetime(record['created_on'])
+            if created_on is None:
+                raise CommandError(f'Record {number}: invalid created_on {record["created_on"]!r}.')
+            if timezone.is_naive(created_on):
+                created_on = timezone.make_aware(created_on)
+            ticket.created_on = ticket.changed_on = created_on
+        return ticket
+
+    def insert(self, batch, htmls, done: int, checkpoint: str, path: str) -> int:
+        """ Insert the batch and adjust the group counters in one transaction, then move the checkpoint.
+
+        :returns: the number of records imported, including this batch
+        """
+        for ticket, html in zip(batch, htmls):
+            ticket.description_html = html
+            ticket.description_digest = description_digest(ticket.description)
+        counts = Counter((ticket.group_id, ticket.status_id) for ticket in batch if ticket.group_id)
+        with transaction.atomic():
+            Ticket.objects.bulk_create(batch)
+            for (group_id, status_id), count in counts.items():
+                GroupTicketStats.objects.adjust(group_id, status_id, count)
+        done += len(batch)
+        self.write_checkpoint(checkpoint, path, done)
+        self.stdout.write(f'{done} records imported', ending='\r')
+        return done
+
+    @staticmethod
+    def read_checkpoint(checkpoint: str, path: str) -> int:
+        """ Return the number of records of the file already imported according to the checkpoint, 0 if none. """
+        try:
+            with open(checkpoint) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return 0
+        if state.get('path') != os.path.abspath(path):
+            raise CommandError(f'{checkpoint} is the checkpoint of {state.get("path")}, use --checkpoint or --restart.')
+        return state['done']
+
+    @staticmethod
+    def write_checkpoint(checkpoint: str, path: str, done: int):
+        # Written aside then renamed, so that a crash never leaves a truncated checkpoint
+        with open(f'{checkpoint}.tmp', 'w') as file:
+            json.dump({'path': os.path.abspath(path), 'done': done}, file)
+        os.replace(f'{checkpoint}.tmp', checkpoint)
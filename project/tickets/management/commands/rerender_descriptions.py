@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from tickets.models import Ticket
+from tickets.rendering import description_digest, render_markdown
+
+
+class Command(BaseCommand):
+    """ Re-render the HTML of the ticket descriptions in batches.
+
+    Only the stale descriptions (whose digest differs from the stored one, e.g. after a renderer upgrade) are
+    rendered, unless --all is given. The Markdown rendering runs in a pool of worker processes and every batch is
+    written with a single bulk_update().
+    """
+    help = 'Re-render the HTML of stale (or all, with --all) ticket descriptions in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of tickets per batch.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of rendering processes, 1 renders in the current process.',
+        )
+        parser.add_argument('--all', action='store_true', help='Re-render every description, even up to date.')
+
+    def handle(self, *args, batch_size: int, workers: int, all: bool, **options):
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        rendered = 0
+        try:
+            for batch in self.iter_batches(batch_size):
+                stale = [ticket for ticket in batch if all or ticket.description_digest != ticket.digest]
+                if not stale:
+                    continue
+                sources = [ticket.description for ticket in stale]
+                chunksize = max(1, len(sources) // (workers * 4)) if executor else 1
+                htmls = executor.map(render_markdown, sources, chunksize=chunksize) if executor \
+                    else map(render_markdown, sources)
+                for ticket, html in zip(stale, htmls):
+                    ticket.description_html = html
+                    ticket.description_digest = ticket.digest
+                Ticket.objects.bulk_update(stale, ['description_html', 'description_digest'])
+                rendered += len(stale)
+        finally:
+            if executor:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'{rendered} ticket descriptions rendered.'))
+
+    @staticmethod
+    def iter_batches(batch_size: int):
+        """ Yield the tickets by batches of batch_size, walking the primary key instead of using OFFSET.
+
+        Each ticket gets a `digest` attribute holding the current digest of its description.
+        """
+        last_id = 0
+        while True:
+            batch = list(
+                Ticket.objects.filter(id__gt=last_id).order_by('id')
+                .only('id', 'description', 'description_digest')[:batch_size]
+            )
+            if not batch:
+                return
+            for ticket in batch:
+                ticket.digest = description_digest(ticket.description)
+            yield batch
+            last_id = batch[-1].id
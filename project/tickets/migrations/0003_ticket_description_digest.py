@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_created_on_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='description_digest',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from tickets.search import get_search_backend
+    get_search_backend(schema_editor.connection).install()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_ticket_description_digest'),
+    ]
+
+    operations = [
+        # FTS5 table and triggers on SQLite, generated tsvector column and GIN index on PostgreSQL
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.utils.text import slugify
+import django.db.models.deletion
+
+
+def statuses_to_states(apps, schema_editor):
+    """ Point every ticket to the state of the default workflow named like its status, created when missing. """
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Workflow = apps.get_model('workflows', 'Workflow')
+    State = apps.get_model('workflows', 'State')
+    workflow = Workflow.objects.filter(group=None).order_by('id').first()
+    for status in Ticket.objects.order_by().values_list('status', flat=True).distinct():
+        state, created = State.objects.get_or_create(
+            workflow=workflow, name=slugify(status)[:100] or 'unknown', defaults={'label': status},
+        )
+        Ticket.objects.filter(status=status).update(state=state)
+
+
+def states_to_statuses(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    State = apps.get_model('workflows', 'State')
+    for state in State.objects.all():
+        Ticket.objects.filter(state=state).update(status=state.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_ticket_search_index'),
+        ('workflows', '0002_default_workflow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='state',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='workflows.state',
+            ),
+        ),
+        migrations.RunPython(statuses_to_states, states_to_statuses),
+        migrations.RemoveField(
+            model_name='ticket',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='ticket',
+            old_name='state',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='status',
+            # Every ticket got a state above. No default: evaluated here (NULL to NOT NULL), default_status would
+            # compile the workflows with the current models rather than the historical ones, see 0008
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT, related_name='tickets', to='workflows.state',
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_ticket_status_state'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_created_on_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(_negated=True, record_status='DELETED'), fields=['-created_on', '-id'],
+                name='ticket_live_created_on_id_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(record_status='DELETED'), fields=['changed_on'], name='ticket_deleted_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+from appsutils.fields import convert_to_enum_small_int, EnumSmallIntField
+from appsutils.models import RecordStatus
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_ticket_soft_delete_indexes'),
+    ]
+
+    operations = [
+        # The partial indexes compare record_status to a name: dropped, then created again comparing it to a code
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_live_created_on_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_deleted_idx',
+        ),
+        *convert_to_enum_small_int(
+            'tickets.Ticket', 'record_status',
+            EnumSmallIntField(RecordStatus, blank=True, default=RecordStatus.ACTIVE, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(_negated=True, record_status=RecordStatus['DELETED']), fields=['-created_on', '-id'],
+                name='ticket_live_created_on_id_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(record_status=RecordStatus['DELETED']), fields=['changed_on'],
+                name='ticket_deleted_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+import workflows.table
+
+
+class Migration(migrations.Migration):
+    """ Restore the default of the status, left out by 0005: the column is already NOT NULL, so the default is only
+    recorded in the state, never called by the schema editor.
+    """
+
+    dependencies = [
+        ('workflows', '0004_workflows_version'),
+        ('tickets', '0007_enum_small_int_record_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='status',
+            field=models.ForeignKey(
+                default=workflows.table.default_status, on_delete=django.db.models.deletion.PROTECT,
+                related_name='tickets', to='workflows.state',
+            ),
+        ),
+    ]
@@ -1,30 +1,118 @@
 # tickets/models.py
 
-from django.db import models
+from django.contrib.contenttypes.fields import GenericRelation
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
 from django.urls import reverse
 
-import misaka
+from appsutils.models import BaseEntity, BaseEntityQuerySet, DELETED_RECORDS, LIVE_RECORDS, LiveManager
+from groups.membership import get_user_group_ids
+from groups.models import Group, GroupTicketStats
+from jobs.queue import enqueue
+from workflows.models import State
+from workflows.table import default_status, get_transition_table
+from .events import publish_ticket_change
+from .rendering import description_digest
 
-from appsutils.models import BaseEntity
-from groups.models import Group
+
+class TicketQuerySet(BaseEntityQuerySet):
+    """ QuerySet of the tickets.
+
+    Public methods:
+        visible_to(user): the tickets of the groups of a user
+    """
+
+    def visible_to(self, user):
+        """ Return the tickets of the groups the user is a member of.
+
+        The group ids come from the membership cache (see groups.membership): the query filters on the group_id
+        index of the tickets, without joining the groups and their members.
+        """
+        return self.filter(group_id__in=get_user_group_ids(user))
+
+
+TicketManager = LiveManager.from_queryset(TicketQuerySet)
+AllTicketManager = models.Manager.from_queryset(TicketQuerySet)
 
 
 # Create your models here.
 class Ticket(BaseEntity):
     summary = models.CharField(max_length=100)
-    status = models.CharField(max_length=100, default='new')
+    # Indexed as a foreign key, the state belongs to the workflow of the group (see workflows.table)
+    status = models.ForeignKey(State, related_name='tickets', on_delete=models.PROTECT, default=default_status)
     description = models.TextField()
     description_html = models.TextField(editable=False)     # For html rendering of the description
+    # Digest of the description rendered in description_html, see rendering.description_digest()
+    description_digest = models.CharField(max_length=64, editable=False, blank=True, default='')
     group = models.ForeignKey(Group, related_name="tickets", null=True, on_delete=models.CASCADE)
+    comments = GenericRelation(
+        'comments.Comment', content_type_field='target_type', object_id_field='target_id', related_query_name='ticket',
+    )
+
+    listing_deferred_fields = ('description', 'description_html', 'description_digest')
+    listing_related_fields = ('group', 'status')
+
+    objects = TicketManager()
+    all_objects = AllTicketManager()
 
     def __str__(self):
         return self.summary
 
+    def get_absolute_url(self):
+        return reverse('tickets:detail', kwargs={'pk': self.pk})
+
+    def clean(self):
+        """ Check that the status belongs to the workflow of the group and, when changed, that the change is allowed.
+
+        :raises ValidationError: on the status field
+        """
+        table = get_transition_table()
+        if table.state_workflows.get(self.status_id) != table.workflow_of(self.group_id):
+            raise ValidationError({'status': 'This status is not part of the workflow of the group.'})
+        # (group_id, status_id) when loaded, () when soft-deleted (restored whatever its status), see tickets.signals
+        loaded = getattr(self, '_loaded_stats_key', None)
+        if not self._state.adding and loaded and loaded[1] != self.status_id:
+            try:
+                table.check(loaded[1], self.status_id)
+            except ValidationError as error:
+                raise ValidationError({'status': error.messages})
+
     def save(self, *args, **kwargs):
-        self.description_html = misaka.html(self.message)
-        super().save(*args, **kwargs)
+        if self._state.adding:
+            # A new ticket of a group having its own workflow starts in the initial state of that workflow
+            table = get_transition_table()
+            if table.state_workflows.get(self.status_id) != table.workflow_of(self.group_id):
+                self.status_id = table.initial_state(self.group_id)
+        # The description is rendered by a background job, only when its content (or the renderer) changed since
+        # the last rendering: until then description_html holds the previous rendering
+        stale = description_digest(self.description) != self.description_digest
+        # One transaction with the counters of the groups, the row locked by tickets.signals.lock_stored_stats
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Ticket, instance=self)):
+            super().save(*args, **kwargs)
+        if stale:
+            enqueue('tickets.tasks.render_ticket_description', args=(self.pk,), using=kwargs.get('using'))
+
+    def soft_delete(self, user=None) -> bool:
+        """ Mark the ticket DELETED with one UPDATE, and remove it from its GroupTicketStats counter and from the open
+        ticket lists.
+        """
+        with transaction.atomic():
+            # The counter of the row, locked: the instance may have been loaded before a concurrent save
+            key = Ticket.all_objects.select_for_update().filter(pk=self.pk).values_list('group_id', 'status_id').first()
+            deleted = super().soft_delete(user)
+            if deleted and key:
+                GroupTicketStats.objects.adjust(*key, -1)
+                publish_ticket_change(self, 'deleted', key[0])
+        self._loaded_stats_key = ()
+        return deleted
 
     class Meta:
-        ordering = ['-created_on']
+        ordering = ['-created_on', '-id']
+        indexes = [
+            # Serves the default ordering and the keyset pagination of the ticket list
+            models.Index(fields=['-created_on', '-id'], condition=LIVE_RECORDS, name='ticket_live_created_on_id_idx'),
+            # Serves the purge of the expired soft-deleted tickets
+            models.Index(fields=['changed_on'], condition=DELETED_RECORDS, name='ticket_deleted_idx'),
+        ]
 
 
@@ -0,0 +1,48 @@
+""" Markdown rendering of the ticket descriptions.
+
+Functions:
+    description_digest: content hash identifying a description and the renderer version
+    render_markdown: render Markdown to HTML, without caching (safe to run in worker processes)
+    render_description: render a description through the markdown cache
+"""
+import hashlib
+from typing import Optional
+
+import misaka
+from django.conf import settings
+from django.core.cache import caches
+
+# Bump when the rendering changes (misaka upgrade, extensions, ...) so that all the descriptions become stale
+RENDERER_VERSION = 'misaka-2.1-1'
+
+
+def description_digest(text: str) -> str:
+    """ Return the SHA-256 hex digest of the description, salted with the renderer version.
+
+    :param text: the Markdown source of the description
+    :returns: a 64 characters digest, which changes when the text or the renderer changes
+    """
+    return hashlib.sha256(f'{RENDERER_VERSION}\0{text}'.encode()).hexdigest()
+
+
+def render_markdown(text: str) -> str:
+    """ Return the HTML rendering of the Markdown text. """
+    return misaka.html(text)
+
+
+def render_description(text: str, digest: Optional[str] = None) -> str:
+    """ Return the HTML rendering of a description, looked up first in the markdown cache.
+
+    The cache is keyed by the content digest, so identical descriptions are rendered once, and is configured
+    with MARKDOWN_CACHE_ALIAS in the settings (the least recently used entries are evicted when it is full).
+
+    :param text: the Markdown source of the description
+    :param digest: the description_digest() of the text, when already computed by the caller
+    """
+    cache = caches[settings.MARKDOWN_CACHE_ALIAS]
+    key = f'description:{digest or description_digest(text)}'
+    html = cache.get(key)
+    if html is None:
+        html = render_markdown(text)
+        cache.set(key, html, timeout=None)
+    return html
@@ -0,0 +1,188 @@
+""" Full-text search of the tickets, on their summary and description.
+
+The inverted index depends on the database vendor:
+    sqlite: an FTS5 virtual table (external content) kept in sync with the tickets table by triggers
+    postgresql: a generated tsvector column with a GIN index
+Other vendors fall back to a (non indexed) icontains filter.
+
+Classes:
+    SearchBackend: base class, fallback on icontains
+    SqliteSearchBackend: FTS5 index ranked with bm25
+    PostgresSearchBackend: tsvector index ranked with ts_rank
+
+Functions:
+    get_search_backend: return the backend for a database connection
+    search_terms: split a user query into index terms
+    search_tickets: return the tickets matching a query, best matches first
+"""
+import re
+from typing import List, Optional
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Ticket
+
+TICKETS_TABLE = Ticket._meta.db_table
+
+
+def search_terms(query: str) -> List[str]:
+    """ Return the words of the query, lower cased.
+
+    Only word characters are kept, so that the user input never reaches the index query syntax.
+    """
+    return re.findall(r'\w+', query.lower())
+
+
+class SearchBackend:
+    """ Search the tickets without any index, with icontains on every term.
+
+    Subclasses implement an indexed search by overriding:
+        install(): create the index and its synchronisation, idempotent
+        search(terms, limit): return the ids of the best matching tickets
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        """ Create the index and its synchronisation if they do not exist. """
+
+    def search(self, terms: List[str], limit: int) -> List[int]:
+        """ Return the ids of the tickets matching all the terms (the last one as a prefix), best first.
+
+        :param terms: the words to search, from search_terms()
+        :param limit: the maximum number of ids to return
+        """
+        condition = Q()
+        for term in terms:
+            condition &= Q(summary__icontains=term) | Q(description__icontains=term)
+        return list(
+            Ticket.objects.using(self.connection.alias).filter(condition).values_list('id', flat=True)[:limit]
+        )
+
+
+class SqliteSearchBackend(SearchBackend):
+    """ Search the tickets through an FTS5 virtual table, ranked by bm25 (the summary weighing 10 times more).
+
+    Only the max_candidates most recent matches are ranked: FTS5 streams them in rowid order, so a term present in
+    most tickets costs the same as a rare one.
+    """
+    fts_table = f'{TICKETS_TABLE}_fts'
+    max_candidates = 1000
+
+    def install(self):
+        # The triggers are created with IF NOT EXISTS as the SQLite schema editor drops them whenever a migration
+        # rebuilds the tickets table: install() runs again after every migrate to restore them.
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.fts_table])
+            created = cursor.fetchone() is None
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5(
+                    summary, description,
+                    content='{TICKETS_TABLE}', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {self.fts_table}_insert AFTER INSERT ON {TICKETS_TABLE} BEGIN
+                    INSERT INTO {self.fts_table} (rowid, summary, description)
+                    VALUES (new.id, new.summary, new.description);
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {self.fts_table}_delete AFTER DELETE ON {TICKETS_TABLE} BEGIN
+                    INSERT INTO {self.fts_table} ({self.fts_table}, rowid, summary, description)
+                    VALUES ('delete', old.id, old.summary, old.description);
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {self.fts_table}_update
+                AFTER UPDATE OF summary, description ON {TICKETS_TABLE} BEGIN
+                    INSERT INTO {self.fts_table} ({self.fts_table}, rowid, summary, description)
+                    VALUES ('delete', old.id, old.summary, old.description);
+                    INSERT INTO {self.fts_table} (rowid, summary, description)
+                    VALUES (new.id, new.summary, new.description);
+                END
+            """)
+            if created:
+                cursor.execute(f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('rebuild')")
+
+    def search(self, terms: List[str], limit: int) -> List[int]:
+        match = ' '.join(f'"{term}"' for term in terms[:-1])
+        match += f' "{terms[-1]}"*'
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM ("
+                f"  SELECT rowid, bm25({self.fts_table}, 10.0, 1.0) AS score FROM {self.fts_table}"
+                f"  WHERE {self.fts_table} MATCH %s ORDER BY rowid DESC LIMIT %s"
+                f") ORDER BY score LIMIT %s",
+                [match.strip(), self.max_candidates, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """ Search the tickets through a generated tsvector column with a GIN index, ranked by ts_rank.
+
+    The column is generated by PostgreSQL (12+) from the summary (weight A) and the description (weight B), so it
+    needs no trigger and is not declared on the Ticket model, which stays portable to SQLite.
+    Like on SQLite, only the max_candidates most recent matches are ranked.
+    """
+    config = 'simple'
+    max_candidates = 1000
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                ALTER TABLE {TICKETS_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{self.config}', coalesce(summary, '')), 'A') ||
+                    setweight(to_tsvector('{self.config}', coalesce(description, '')), 'B')
+                ) STORED
+            """)
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {TICKETS_TABLE}_search_vector_idx "
+                f"ON {TICKETS_TABLE} USING GIN (search_vector)"
+            )
+
+    def search(self, terms: List[str], limit: int) -> List[int]:
+        query = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM ("
+                f"  SELECT id, ts_rank(search_vector, q) AS score"
+                f"  FROM {TICKETS_TABLE}, to_tsquery('{self.config}', %s) q"
+                f"  WHERE search_vector @@ q ORDER BY id DESC LIMIT %s"
+                f") candidates ORDER BY score DESC LIMIT %s",
+                [query, self.max_candidates, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(connection) -> SearchBackend:
+    """ Return the search backend matching the vendor of the database connection. """
+    return SEARCH_BACKENDS.get(connection.vendor, SearchBackend)(connection)
+
+
+def search_tickets(query: str, limit: int = 50, using: Optional[str] = None) -> List[Ticket]:
+    """ Return the tickets matching every word of the query, the last word as a prefix, best matches first.
+
+    :param query: the text typed by the user
+    :param limit: the maximum number of tickets to return
+    :param using: the alias of the database to search, chosen by the database routers when None
+    :returns: the tickets, loaded for listing (see BaseEntityQuerySet.for_listing)
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    using = using or router.db_for_read(Ticket)
+    ids = get_search_backend(connections[using]).search(terms, limit)
+    tickets = Ticket.objects.using(using).for_listing().in_bulk(ids)
+    return [tickets[id] for id in ids if id in tickets]
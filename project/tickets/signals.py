@@ -0,0 +1,121 @@
+""" Signal receivers of the tickets app, connected in TicketsConfig.ready().
+
+Receivers:
+    remember_stats_key: keep the group and status a ticket was loaded with, for the validation of its status change
+    lock_stored_stats: read the group and status a save or a deletion replaces, locking the row
+    publish_change_on_save: push the saved ticket to the open ticket lists (see tickets.events)
+    publish_change_on_delete: remove the deleted ticket from the open ticket lists
+    update_group_stats_on_save: move the ticket between the GroupTicketStats counters
+    update_group_stats_on_delete: remove the ticket from its GroupTicketStats counter
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from appsutils.models import RecordStatus
+from groups.models import GroupTicketStats
+from .events import publish_ticket_change
+from .models import Ticket
+
+STATS_FIELDS = ('group_id', 'status_id', 'record_status')
+
+
+def stats_key(ticket: Ticket):
+    """ Return the (group_id, status_id) counter of the ticket, () when soft-deleted (counted nowhere), or None when
+    a field is deferred.
+    """
+    if any(field not in ticket.__dict__ for field in STATS_FIELDS):
+        return None
+    return to_stats_key(*(ticket.__dict__[field] for field in STATS_FIELDS))
+
+
+def to_stats_key(group_id, status_id, record_status):
+    return () if record_status == RecordStatus.DELETED else (group_id, status_id)
+
+
+def saved_stats_values(ticket: Ticket, update_fields=None):
+    """ Return the STATS_FIELDS values of the saved row: those of the fields written by the save, the stored ones
+    (see lock_stored_stats) for the fields left out of update_fields or deferred, or None when unknown.
+    """
+    stored = getattr(ticket, '_stored_stats_values', None) or {}
+    values = []
+    for field in STATS_FIELDS:
+        written = field in ticket.__dict__ and (
+            update_fields is None or Ticket._meta.get_field(field).name in update_fields or field in update_fields
+        )
+        if not written and field not in stored:
+            return None
+        values.append(ticket.__dict__[field] if written else stored[field])
+    return tuple(values)
+
+
+def saved_stats_key(ticket: Ticket, update_fields=None):
+    """ Return the counter of the saved ticket, None when unknown. """
+    values = saved_stats_values(ticket, update_fields)
+    return None if values is None else to_stats_key(*values)
+
+
+@receiver(post_init, sender=Ticket)
+def remember_stats_key(sender, instance: Ticket, **kwargs):
+    instance._loaded_stats_key = stats_key(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+@receiver(pre_delete, sender=Ticket)
+def lock_stored_stats(sender, instance: Ticket, raw: bool = False, using=None, **kwargs):
+    # The values the save or the deletion replaces are those of the row, not those the instance was loaded with: a
+    # concurrent save may have changed them since. The row stays locked until the transaction (of Ticket.save or of
+    # the deletion) commits, so that the concurrent saves wait and read the values written by this one.
+    instance._stored_stats_values = None
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    values = (
+        Ticket.all_objects.using(using).select_for_update().filter(pk=instance.pk).values_list(*STATS_FIELDS).first()
+    )
+    if values:
+        instance._stored_stats_values = dict(zip(STATS_FIELDS, values))
+    instance._loaded_stats_key = to_stats_key(*values) if values else None   # None: the row is gone
+
+
+@receiver(post_save, sender=Ticket)
+def publish_change_on_save(sender, instance: Ticket, created: bool, raw: bool = False, update_fields=None,
+                           using=None, **kwargs):
+    # Connected before update_group_stats_on_save, which replaces the stored key by the saved one
+    if raw:
+        return
+    loaded = None if created else instance._loaded_stats_key
+    values = saved_stats_values(instance, update_fields)
+    if values is None:
+        return  # The row vanished before the save could read its deferred group
+    action = 'created' if created else 'deleted' if to_stats_key(*values) == () else 'updated'
+    publish_ticket_change(instance, action, values[0], previous_group_id=loaded[0] if loaded else None, using=using)
+
+
+@receiver(post_save, sender=Ticket)
+def update_group_stats_on_save(sender, instance: Ticket, created: bool, raw: bool = False, update_fields=None,
+                               **kwargs):
+    if raw:
+        return
+    old_key = None if created else instance._loaded_stats_key
+    new_key = saved_stats_key(instance, update_fields)
+    if old_key != new_key:
+        with transaction.atomic():
+            if old_key:
+                GroupTicketStats.objects.adjust(*old_key, -1)
+            if new_key:
+                GroupTicketStats.objects.adjust(*new_key, 1)
+    instance._loaded_stats_key = new_key
+
+
+@receiver(post_delete, sender=Ticket)
+def update_group_stats_on_delete(sender, instance: Ticket, **kwargs):
+    key = instance._loaded_stats_key     # Read by lock_stored_stats
+    if key:     # Not soft-deleted (already removed from its counter)
+        GroupTicketStats.objects.adjust(*key, -1)
+
+
+@receiver(post_delete, sender=Ticket)
+def publish_change_on_delete(sender, instance: Ticket, using=None, **kwargs):
+    key = instance._loaded_stats_key     # Read by lock_stored_stats: never read the deleted row
+    if key:     # Not soft-deleted (already removed from the lists)
+        publish_ticket_change(instance, 'deleted', key[0], using=using)
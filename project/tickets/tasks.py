@@ -0,0 +1,23 @@
+""" Background jobs of the tickets app, queued with jobs.queue.enqueue().
+
+Functions:
+    render_ticket_description: render the HTML of a ticket description, off the request path
+"""
+from .models import Ticket
+from .rendering import description_digest, render_description
+
+
+def render_ticket_description(ticket_id: int):
+    """ Render the description of the ticket into description_html, unless already up to date.
+
+    The rendering is only stored if the description did not change meanwhile: a newer job renders the new one.
+    """
+    ticket = Ticket.objects.filter(pk=ticket_id).only('description', 'description_digest').first()
+    if ticket is None:
+        return
+    digest = description_digest(ticket.description)
+    if digest == ticket.description_digest:
+        return
+    Ticket.objects.filter(pk=ticket_id, description=ticket.description).update(
+        description_html=render_description(ticket.description, digest), description_digest=digest,
+    )
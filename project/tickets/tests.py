@@ -1,3 +1,553 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import override_settings, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from appsutils.models import RecordStatus
+from core.asgi import application
+from groups.models import Group, GroupTicketStats
+from jobs.models import Job
+from workflows.models import State, Workflow
+from workflows.table import invalidate_transition_tables
+from monitoring.metrics import registry
+from monitoring.queries import query_budget
+from .models import Ticket
+from . import rendering
+from .events import ticket_events
+from .search import search_tickets
+from .views import TicketExportView
+
+
+class TicketsListViewTests(TestCase):
+    """ Keyset pagination of the ticket list. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        now = timezone.now()
+        # Tickets sharing the same created_on check the id tie-breaker of the keyset
+        Ticket.objects.bulk_create(
+            Ticket(summary=f'Ticket {i}', description='', created_on=now - timedelta(minutes=i // 2))
+            for i in range(60)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_follow_each_other_without_gaps_or_duplicates(self):
+        expected = list(Ticket.objects.order_by('-created_on', '-id').values_list('id', flat=True))
+        seen = []
+        url = reverse('tickets:list')
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            seen.extend(ticket.id for ticket in page)
+            url = f"{reverse('tickets:list')}?after={page.next_cursor}" if page.has_next() else None
+        self.assertEqual(seen, expected)
+
+    def test_page_costs_a_single_query_without_count_or_offset(self):
+        first_page = self.client.get(reverse('tickets:list')).context['page_obj']
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('tickets:list'), {'after': first_page.next_cursor})
+        ticket_queries = [query['sql'] for query in context.captured_queries if 'tickets_ticket' in query['sql']]
+        self.assertEqual(len(ticket_queries), 1)
+        self.assertNotIn('COUNT', ticket_queries[0])
+        self.assertNotIn('OFFSET', ticket_queries[0])
+
+    def test_list_query_defers_descriptions_and_joins_group(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('tickets:list'))
+        ticket_query = next(query['sql'] for query in context.captured_queries if 'tickets_ticket' in query['sql'])
+        self.assertNotIn('"tickets_ticket"."description', ticket_query)
+        self.assertNotIn('"groups_group"."description"', ticket_query)
+        self.assertIn('JOIN "groups_group"', ticket_query)
+
+    def test_list_stays_within_its_query_budget(self):
+        Ticket.objects.filter(id__lte=30).update(created_by=self.user, changed_by=self.user)
+        with query_budget(max_queries=3, max_repeats=1):
+            self.client.get(reverse('tickets:list'))
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('tickets:list'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_deleted_tickets_are_left_out_through_the_partial_index(self):
+        deleted = Ticket.objects.first()
+        response = self.client.post(reverse('tickets:delete', args=[deleted.pk]))
+        self.assertRedirects(response, reverse('tickets:list'))
+        self.assertEqual(Ticket.all_objects.get(pk=deleted.pk).record_status, RecordStatus.DELETED)
+
+        response = self.client.get(reverse('tickets:list'))
+        self.assertNotIn(deleted, response.context['page_obj'])
+        self.assertEqual(self.client.get(reverse('tickets:detail', args=[deleted.pk])).status_code, 404)
+        self.assertIn('ticket_live_created_on_id_idx', Ticket.objects.for_listing()[:20].explain())
+
+
+class TicketVisibilityTests(TestCase):
+    """ Tickets of the groups of a user, filtered on the cached group ids. """
+
+    def test_visible_tickets_are_filtered_on_the_group_index_without_joins(self):
+        user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        support, network = Group.objects.create(name='Support'), Group.objects.create(name='Network')
+        support.members.add(user)
+        visible = Ticket.objects.create(summary='Support', group=support)
+        Ticket.objects.create(summary='Network', group=network)
+        Ticket.objects.create(summary='No group')
+        caches['default'].clear()
+
+        self.assertEqual(list(Ticket.objects.visible_to(user)), [visible])
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(list(Ticket.objects.visible_to(user)), [visible])
+        self.assertEqual(len(context.captured_queries), 1)     # The group ids are memoized on the user
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'])
+
+
+class TicketEventsTests(TransactionTestCase):
+    """ Ticket changes streamed to the lists of the groups members, as server-sent events (TransactionTestCase: the
+    stream reads the session in a thread of its own, with its own database connection).
+    """
+
+    def setUp(self):
+        # The previous transaction tests flushed the default workflow of the migrations, and the rows cached
+        ContentType.objects.clear_cache()
+        invalidate_transition_tables()
+        caches['default'].clear()
+        workflow, created = Workflow.objects.get_or_create(name='Default', group=None)
+        State.objects.get_or_create(workflow=workflow, name='new', defaults={'label': 'New', 'is_initial': True})
+        self.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        self.support, self.network = Group.objects.create(name='Support'), Group.objects.create(name='Network')
+        self.support.members.add(self.user)
+
+    def stream(self, change, cookies: str = '') -> list:
+        """ Open the event stream, make the change once subscribed, and return the events received until then. """
+        scope = {'type': 'http', 'path': settings.TICKET_EVENTS_PATH, 'headers': [(b'cookie', cookies.encode())]}
+        chunks = []
+
+        async def run():
+            closed = asyncio.Event()
+
+            async def receive():
+                await closed.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                chunks.append(message)
+
+            stream = asyncio.ensure_future(ticket_events(scope, receive, send))
+            while len(chunks) < 2 and not stream.done():    # The headers and the retry delay: subscribed
+                await asyncio.sleep(0.01)
+            if not stream.done():
+                await sync_to_async(change)()
+                await asyncio.sleep(0.05)
+            closed.set()
+            await stream
+
+        async_to_sync(run)()
+        events = []
+        for chunk in chunks[2:]:
+            body = chunk['body'].decode()
+            if body.startswith('event: '):  # Not a keepalive comment
+                name, data = (line.split(': ', 1)[1] for line in body.splitlines()[:2])
+                events.append(json.loads(data) if name == 'ticket' else name)
+        return [chunks[0]['status']] + events
+
+    def make_changes(self):
+        ticket = Ticket.objects.create(summary='Printer jam', group=self.support)
+        Ticket.objects.create(summary='Router down', group=self.network)
+        ticket.group = self.network
+        ticket.save()
+
+    def test_members_receive_the_changes_of_their_groups(self):
+        self.client.force_login(self.user)
+        status, created, moved = self.stream(self.make_changes, self.client.cookies.output(header='', sep=';'))
+
+        self.assertEqual(status, 200)
+        ticket = Ticket.objects.get(summary='Printer jam')
+        self.assertEqual(
+            {key: created[key] for key in ('action', 'id', 'status', 'group')},
+            {'action': 'created', 'id': ticket.pk, 'status': 'new', 'group': 'support'},
+        )
+        self.assertIn(f'data-ticket-id="{ticket.pk}"', created['html'])
+        # Moved out of the group, still listed: updated, and dropped by the lists filtered on the group
+        self.assertEqual(
+            {key: moved[key] for key in ('action', 'id', 'group')},
+            {'action': 'updated', 'id': ticket.pk, 'group': 'network'},
+        )
+
+    @override_settings(EVENTS_KEEPALIVE_SECONDS=0.01)
+    def test_the_stream_ends_with_a_reload_when_the_groups_of_the_user_change(self):
+        self.client.force_login(self.user)
+        events = self.stream(
+            lambda: self.network.members.add(self.user), self.client.cookies.output(header='', sep=';'),
+        )
+
+        self.assertEqual(events, [200, 'reload'])
+
+    def test_deletions_of_tickets_loaded_with_deferred_fields_are_sent(self):
+        ticket = Ticket.objects.create(summary='Printer jam', group=self.support)
+        self.client.force_login(self.user)
+
+        def delete():
+            Ticket.objects.only('id').get(pk=ticket.pk).delete()    # The group is read before the row is deleted
+
+        status, deleted = self.stream(delete, self.client.cookies.output(header='', sep=';'))
+
+        self.assertEqual(deleted, {'action': 'deleted', 'id': ticket.pk})
+        self.assertFalse(Ticket.all_objects.filter(pk=ticket.pk).exists())
+
+    def test_anonymous_users_are_refused(self):
+        self.assertEqual(self.stream(self.make_changes), [403])
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_list_subscribes_to_the_events_in_the_asgi_profile(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tickets:list'), {'group': 'support'})
+
+        self.assertContains(response, f'data-ticket-events="{settings.TICKET_EVENTS_PATH}"')
+        self.assertContains(response, 'data-group="support"')
+        self.assertContains(response, 'assets/js/ticket-events.js')
+
+
+class TicketAdminTests(TestCase):
+    """ The changelist of the ticket admin does not issue one query per row. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(
+            first_name='Admin', email='admin@example.com', username='admin', phone_number='0000', password='pass',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_tickets(self, count: int):
+        Ticket.objects.bulk_create(
+            Ticket(summary=f'Ticket {i}', created_by=self.admin, changed_by=self.admin) for i in range(count)
+        )
+
+    def count_changelist_queries(self) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('admin:tickets_ticket_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_stays_within_its_query_budget(self):
+        self.create_tickets(100)
+        # The changelist counts the filtered and the total number of tickets: the same COUNT runs twice
+        with query_budget(max_queries=6, max_repeats=2):
+            self.client.get(reverse('admin:tickets_ticket_changelist'))
+
+    def test_changelist_query_count_does_not_depend_on_the_number_of_rows(self):
+        self.create_tickets(5)
+        queries_for_5_rows = self.count_changelist_queries()
+        self.create_tickets(495)
+        self.assertEqual(self.count_changelist_queries(), queries_for_5_rows)
+
+    def test_deleted_tickets_can_be_restored(self):
+        group = Group.objects.create(name='Support')
+        ticket = Ticket.objects.create(summary='Printer', description='Jammed', group=group)
+        ticket.soft_delete()
+        ticket = Ticket.all_objects.get(pk=ticket.pk)
+        ticket.record_status = RecordStatus.ACTIVE
+        ticket.full_clean()
+        ticket.save()
+        self.assertTrue(Ticket.objects.filter(pk=ticket.pk).exists())
+        self.assertEqual(GroupTicketStats.objects.get(group=group).count, 1)
+
+
+class DescriptionRenderingTests(TestCase):
+    """ Markdown rendering of the description by a background job, skipped when its digest did not change. """
+
+    def setUp(self):
+        caches['markdown'].clear()
+
+    def save(self, ticket: Ticket):
+        """ Save the ticket in a committed transaction, then run the queued jobs. """
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        call_command('run_worker', once=True, concurrency=1, stdout=StringIO())
+
+    def test_description_is_rendered_after_the_commit_by_a_job(self):
+        ticket = Ticket(summary='Printer', description='*Out* of paper')
+        with self.captureOnCommitCallbacks() as callbacks:
+            ticket.save()
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).description_html, '')
+        self.assertEqual(len(callbacks), 1)
+        self.save(ticket)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.description_html, '<p><em>Out</em> of paper</p>\n')
+        self.assertEqual(ticket.description_digest, rendering.description_digest('*Out* of paper'))
+
+    def test_creating_a_ticket_does_not_render_in_the_request(self):
+        with mock.patch.object(rendering, 'render_markdown') as render_markdown:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('tickets:create'),
+                    {'summary': 'Printer', 'description': '*x*', 'group': Group.objects.create(name='Support').pk},
+                )
+        self.assertRedirects(response, reverse('tickets:list'))
+        render_markdown.assert_not_called()
+        self.assertEqual(Job.objects.get().function, 'tickets.tasks.render_ticket_description')
+
+    def test_save_does_not_render_an_unchanged_description(self):
+        ticket = Ticket(summary='Printer', description='Out of paper')
+        self.save(ticket)
+        with mock.patch.object(rendering, 'render_markdown') as render_markdown:
+            ticket = Ticket.objects.get(pk=ticket.pk)
+            ticket.summary = 'Printer on floor 2'
+            with self.captureOnCommitCallbacks() as callbacks:
+                ticket.save()
+        self.assertEqual(callbacks, [])
+        render_markdown.assert_not_called()
+
+    def test_identical_descriptions_are_rendered_once(self):
+        with mock.patch.object(rendering, 'render_markdown', wraps=rendering.render_markdown) as render_markdown:
+            self.save(Ticket(summary='First', description='Same text'))
+            self.save(Ticket(summary='Second', description='Same text'))
+        render_markdown.assert_called_once_with('Same text')
+
+    def test_rerender_descriptions_updates_stale_descriptions_only(self):
+        Ticket.objects.bulk_create([
+            Ticket(summary='Stale', description='**new**', description_html='old', description_digest='old'),
+            Ticket(
+                summary='Fresh', description='fresh', description_html='kept',
+                description_digest=rendering.description_digest('fresh'),
+            ),
+        ])
+        out = StringIO()
+        call_command('rerender_descriptions', '--workers=1', '--batch-size=1', stdout=out)
+        self.assertIn('1 ticket descriptions rendered', out.getvalue())
+        self.assertEqual(Ticket.objects.get(summary='Stale').description_html, '<p><strong>new</strong></p>\n')
+        self.assertEqual(Ticket.objects.get(summary='Fresh').description_html, 'kept')
+
+
+class TicketSearchTests(TestCase):
+    """ Full-text search of the tickets, kept in sync with the tickets table. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.printer = Ticket.objects.create(summary='Printer jammed', description='Paper stuck in tray 2')
+        cls.network = Ticket.objects.create(summary='Network down', description='The printer cannot be reached')
+        Ticket.objects.create(summary='Password reset', description='Locked out')
+
+    def test_matches_are_ranked_summary_first(self):
+        self.assertEqual(search_tickets('printer'), [self.printer, self.network])
+
+    def test_last_term_matches_as_prefix(self):
+        self.assertEqual(search_tickets('paper ja'), [self.printer])
+        self.assertEqual(search_tickets('pass'), [Ticket.objects.get(summary='Password reset')])
+
+    def test_index_follows_updates_and_deletions(self):
+        self.network.description = 'Switch unplugged'
+        self.network.save()
+        self.assertEqual(search_tickets('printer'), [self.printer])
+        self.printer.delete()
+        self.assertEqual(search_tickets('printer'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(search_tickets('"printer" OR NEAR(* -'), [])
+        self.assertEqual(search_tickets('  '), [])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('tickets:search'), {'q': 'jam'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['ticket_list']), [self.printer])
+
+
+class ImportTicketsTests(TestCase):
+    """ Streaming bulk import of tickets, resumable from a checkpoint. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+        cls.group = Group.objects.create(name='Support')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'tickets.jsonl')
+
+    def write_records(self, records):
+        with open(self.path, 'w') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+
+    def import_tickets(self, **options):
+        call_command('import_tickets', self.path, batch_size=2, workers=1, stdout=StringIO(), **options)
+
+    def test_records_are_imported_with_resolved_foreign_keys(self):
+        self.write_records([
+            {'summary': 'Printer', 'description': '*jammed*', 'group': 'support', 'created_by': 'agent'},
+            {'summary': 'VPN', 'status': 'open', 'group': 'support', 'created_on': '2020-01-02T03:04:05'},
+            {'summary': 'Mail'},
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.import_tickets()
+        # Lookup maps and one insert per batch, not queries per record
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "tickets_ticket"')]), 2)
+        printer = Ticket.objects.get(summary='Printer')
+        self.assertEqual((printer.group, printer.created_by), (self.group, self.user))
+        self.assertEqual(printer.description_html, '<p><em>jammed</em></p>\n')
+        self.assertEqual(printer.description_digest, rendering.description_digest('*jammed*'))
+        self.assertEqual(Ticket.objects.get(summary='VPN').created_on.year, 2020)
+        histogram = GroupTicketStats.objects.histograms()[self.group]
+        self.assertEqual({state.name: count for state, count in histogram.items()}, {'new': 1, 'open': 1})
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_a_failed_import_resumes_after_the_last_committed_batch(self):
+        records = [{'summary': f'Ticket {i}', 'group': 'support'} for i in range(5)]
+        self.write_records(records[:3] + [{'summary': 'Bad', 'group': 'unknown'}] + records[3:])
+        with self.assertRaisesMessage(CommandError, "Record 4: unknown group 'unknown'"):
+            self.import_tickets()
+        self.assertEqual(Ticket.objects.count(), 2)
+
+        self.write_records(records[:3] + [{'summary': 'Fixed', 'group': 'support'}] + records[3:])
+        self.import_tickets()
+        self.assertEqual(Ticket.objects.count(), 6)
+        self.assertEqual(Ticket.objects.filter(summary='Ticket 0').count(), 1)
+        self.assertEqual(GroupTicketStats.objects.get().count, 6)
+
+    def test_blank_lines_are_skipped_and_malformed_ones_reported(self):
+        self.write_records([{'summary': f'Ticket {i}'} for i in range(3)])
+        with open(self.path, 'a') as file:
+            file.write('\n{"summary": \n')
+        with self.assertRaisesMessage(CommandError, 'Record 4: invalid JSON'):
+            self.import_tickets()
+        self.assertEqual(Ticket.objects.count(), 2)     # The batch read before is kept
+
+
+class TicketExportTests(TestCase):
+    """ Streaming CSV export of the ticket list. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(name='Support')
+
+    def create_tickets(self, count: int, **fields):
+        Ticket.objects.bulk_create(
+            (Ticket(summary=f'Ticket {i}', description='x' * 200, **fields) for i in range(count)), batch_size=1000,
+        )
+
+    def export_peak_memory(self) -> int:
+        """ Return the peak memory allocated while streaming the export of all the tickets. """
+        tracemalloc.start()
+        try:
+            response = self.client.get(reverse('tickets:export'))
+            for _ in response.streaming_content:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_export_honors_the_list_filters(self):
+        open, closed = (State.objects.get(workflow__group=None, name=name) for name in ('open', 'closed'))
+        self.create_tickets(2, status=open, group=self.group)
+        self.create_tickets(3, status=closed, group=self.group)
+        self.create_tickets(1, status=open)
+        response = self.client.get(reverse('tickets:export'), {'status': 'open', 'group': 'support'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,created_on,summary,status,group,created_by,description')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(',open,support,' in line for line in lines[1:]))
+
+        list_response = self.client.get(reverse('tickets:list'), {'status': 'open', 'group': 'support'})
+        self.assertEqual(len(list_response.context['ticket_list']), 2)
+        self.assertContains(list_response, 'export.csv?status=open&amp;group=support')
+
+    @mock.patch.object(TicketExportView, 'chunk_size', 500)
+    def test_memory_stays_flat_whatever_the_number_of_rows(self):
+        # Both exports span several fetches from the database
+        self.create_tickets(2000)
+        small = self.export_peak_memory()
+        self.create_tickets(18000)
+        large = self.export_peak_memory()
+        # Ten times more rows: a materialized queryset would need ten times more memory
+        self.assertLess(large, small * 1.2)
+
+
+class TicketExportAsgiTests(TransactionTestCase):
+    """ The CSV export served by core.asgi (TransactionTestCase: the pages are read in the threads of the views pool,
+    with their own database connections).
+    """
+
+    def setUp(self):
+        workflow, created = Workflow.objects.get_or_create(name='Default', group=None)
+        self.new, created = State.objects.get_or_create(
+            workflow=workflow, name='new', defaults={'label': 'New', 'is_initial': True},
+        )
+
+    def export(self, method: str = 'GET', host: bytes = b'testserver', leave: bool = False) -> list:
+        scope = {
+            'type': 'http', 'method': method, 'path': reverse('tickets:export'), 'query_string': b'status=new',
+            'headers': [(b'host', host)],
+        }
+        messages = []
+        requests = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            if leave:
+                return {'type': 'http.disconnect'}
+            await asyncio.Event().wait()    # The client stays
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(application)(scope, receive, send)
+        return messages
+
+    @mock.patch.object(TicketExportView, 'chunk_size', 2)
+    def test_pages_are_read_out_of_the_event_loop(self):
+        Ticket.objects.bulk_create(Ticket(summary=f'Ticket {i}', status=self.new) for i in range(5))
+        registry.clear()
+        start, *bodies = self.export()
+
+        self.assertEqual((start['status'], dict(start['headers'])[b'Content-Type']), (200, b'text/csv'))
+        self.assertIn(b'X-Content-Type-Options', dict(start['headers']))     # Through the middleware
+        lines = b''.join(body.get('body', b'') for body in bodies).decode().splitlines()
+        self.assertEqual(lines[0], 'id,created_on,summary,status,group,created_by,description')
+        self.assertEqual([line.split(',')[2] for line in lines[1:]], [f'Ticket {i}' for i in range(4, -1, -1)])
+        self.assertEqual([body.get('more_body', False) for body in bodies], [True, True, True, True, False])
+        self.assertIn('view="tickets:export",method="GET",status="200"', registry.render())
+
+    @mock.patch.object(TicketExportView, 'chunk_size', 1)
+    def test_pages_are_no_longer_read_once_the_client_left(self):
+        Ticket.objects.bulk_create(Ticket(summary=f'Ticket {i}', status=self.new) for i in range(5))
+        read_page = TicketExportView.read_page
+        with mock.patch.object(TicketExportView, 'read_page', autospec=True, side_effect=read_page) as read:
+            start, *bodies = self.export(leave=True)
+        self.assertEqual(start['status'], 200)
+        self.assertLess(read.call_count, 5)
+
+    def test_disallowed_hosts_are_refused(self):
+        self.assertEqual(self.export(host=b'evil.example.com')[0]['status'], 400)
+
+    def test_only_get_and_head_are_allowed(self):
+        self.assertEqual(self.export('HEAD')[0]['status'], 200)
+        self.assertEqual(self.export('POST')[0]['status'], 403)    # Refused by the CSRF middleware
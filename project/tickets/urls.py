@@ -1,13 +1,17 @@
 from django.urls import path
 
+from appsutils.asynchronous import asgi_view
 from . import views
 
 
 app_name = 'tickets'
 
 urlpatterns = [
-    path('', views.TicketsListView.as_view(), name='default'),
-    path('list/', views.TicketsListView.as_view(), name='list'),
+    path('', asgi_view(views.TicketsListView.as_view()), name='default'),
+    path('list/', asgi_view(views.TicketsListView.as_view()), name='list'),
+    path('export.csv', views.TicketExportView.as_view(), name='export'),
     path('create/', views.TicketCreateView.as_view(), name='create'),
-    path('<int:pk>/', views.TicketDetailView.as_view(), name='detail'),
+    path('search/', views.TicketSearchView.as_view(), name='search'),
+    path('<int:pk>/', asgi_view(views.TicketDetailView.as_view()), name='detail'),
+    path('<int:pk>/delete/', views.TicketDeleteView.as_view(), name='delete'),
 ]
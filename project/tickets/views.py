@@ -1,12 +1,26 @@
+import csv
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import router
+from django.http import StreamingHttpResponse
 from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.views import generic
+
+from appsutils.db import ReplicaReadMixin, use_replicas
+from appsutils.pagination import KeysetPaginationMixin
+from appsutils.views import SoftDeleteView
+from comments.forms import CommentForm
+from comments.models import Comment
 from . import models
+from .search import search_tickets
 
 
 # Create your views here.
 class TicketCreateView(generic.CreateView):
     model = models.Ticket
-    fields = ('summary', 'description', 'author_name')
+    fields = ('summary', 'description', 'group')
     success_url = reverse_lazy('tickets:list')
 
     # def get_success_url(self):
@@ -19,9 +33,139 @@ class TicketCreateView(generic.CreateView):
     #     return super().form_valid(form)
 
 
-class TicketsListView(generic.ListView):
+class TicketFilterMixin:
+    """ Filter the tickets on the query parameters, shared by the list and its CSV export.
+
+    Filters: `?status=<state name>` and `?group=<group slug>`, both optional.
+    """
+    filter_params = {'status': 'status__name', 'group': 'group__slug'}
+
+    def get_filters(self) -> dict:
+        """ Return the filters found in the request, as {query parameter: value}. """
+        return {param: self.request.GET[param] for param in self.filter_params if self.request.GET.get(param)}
+
+    def filter_queryset(self, queryset):
+        return queryset.filter(**{self.filter_params[param]: value for param, value in self.get_filters().items()})
+
+
+class TicketsListView(ReplicaReadMixin, TicketFilterMixin, KeysetPaginationMixin, generic.ListView):
+    """ List the tickets, newest first, paginated with an opaque `?after=` cursor over (created_on, id).
+
+    In the ASGI profile, the list is then kept up to date by the ticket events (see tickets.events) instead of
+    being reloaded.
+    """
     model = models.Ticket
+    queryset = models.Ticket.objects.for_listing()
+    keyset_ordering = ('-created_on', '-id')    # Backed by the ticket_live_created_on_id_idx partial index
+
+    def get_queryset(self):
+        return self.filter_queryset(super().get_queryset())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_query'] = urlencode(self.get_filters())
+        context['filters'] = self.get_filters()
+        context['ticket_events_url'] = settings.TICKET_EVENTS_PATH if settings.ASYNC_VIEWS else ''
+        return context
+
+
+class Echo:
+    """ File-like object returning what is written to it, to turn csv.writer into a generator of lines. """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class TicketExportView(ReplicaReadMixin, TicketFilterMixin, KeysetPaginationMixin, generic.View):
+    """ Stream the tickets of the list, with its filters, as a CSV file.
+
+    The rows are read by pages of chunk_size rows, every page selected by a keyset query after the last row of the
+    previous one, and written while they are sent: the memory of the worker stays bounded whatever the number of
+    tickets, and no database cursor stays open while a slow client downloads. Under ASGI, every page is read in the
+    views thread pool (see appsutils.asynchronous.StreamingASGIHandler).
+    """
+    columns = (
+        ('id', 'id'),   # id and created_on first: the keyset of the pages
+        ('created_on', 'created_on'),
+        ('summary', 'summary'),
+        ('status', 'status__name'),
+        ('group', 'group__slug'),
+        ('created_by', 'created_by__username'),
+        ('description', 'description'),
+    )
+    chunk_size = 2000   # Rows read from the database and sent at once
+    keyset_ordering = ('-created_on', '-id')
+    headers = {'Content-Type': 'text/csv', 'Content-Disposition': 'attachment; filename="tickets.csv"'}
 
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # The pages are read once the view has returned: the database is chosen now, inside the replica block
+        with use_replicas():
+            self.using = router.db_for_read(models.Ticket)
 
-class TicketDetailView(generic.DetailView):
+    def get(self, request, *args, **kwargs):
+        return StreamingHttpResponse(self.stream(), headers=self.headers)
+
+    def stream(self):
+        """ Yield the CSV header then the pages of rows. """
+        yield self.header()
+        after = None
+        while True:
+            lines, after = self.read_page(after)
+            yield lines
+            if after is None:
+                return
+
+    def header(self) -> str:
+        return csv.writer(Echo()).writerow([column for column, lookup in self.columns])
+
+    def read_page(self, after: Optional[tuple] = None) -> Tuple[str, Optional[tuple]]:
+        """ Return the CSV lines of the page of rows following the keyset values `after` (the first page when None),
+        and the keyset values of its last row, None on the last page.
+        """
+        queryset = self.filter_queryset(models.Ticket.objects.using(self.using)).order_by(*self.keyset_ordering)
+        if after is not None:
+            queryset = queryset.filter(self.keyset_filter(after))
+        rows = list(queryset.values_list(*(lookup for column, lookup in self.columns))[:self.chunk_size])
+        writer = csv.writer(Echo())
+        lines = ''.join(writer.writerow(row) for row in rows)
+        return lines, (rows[-1][1], rows[-1][0]) if len(rows) == self.chunk_size else None
+
+
+class TicketSearchView(ReplicaReadMixin, generic.ListView):
+    """ List the tickets matching the `?q=` query, best matches first, through the full-text index. """
+    template_name = 'tickets/ticket_search.html'
+    context_object_name = 'ticket_list'
+    max_results = 50
+
+    def get_queryset(self):
+        return search_tickets(self.request.GET.get('q', ''), limit=self.max_results)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class TicketDetailView(ReplicaReadMixin, KeysetPaginationMixin, generic.DetailView):
+    """ Show a ticket and its approved comments, oldest first, paginated with an opaque `?after=` cursor.
+
+    Two queries whatever the number of comments: the ticket with its group and status, then the page of comments
+    with their author.
+    """
     model = models.Ticket
+    queryset = models.Ticket.objects.select_related('group', 'status', 'created_by')
+    paginate_by = 50
+    keyset_ordering = ('created_date', 'id')    # Backed by the comment_approved_target_idx partial index
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments = Comment.objects.approved().for_target(self.object)
+        paginator, page, comment_list, is_paginated = self.paginate_queryset(comments, self.paginate_by)
+        context.update(comments_page=page, comment_list=comment_list, comment_form=CommentForm())
+        return context
+
+
+class TicketDeleteView(SoftDeleteView):
+    model = models.Ticket
+    success_url = reverse_lazy('tickets:list')
@@ -1,3 +1,23 @@
 from django.contrib import admin
 
+from appsutils.admin import AuditedAdminMixin
+from . import models
+
+
 # Register your models here.
+class StateInline(admin.TabularInline):
+    model = models.State
+    fields = ('name', 'label', 'is_initial')
+    extra = 0
+
+
+@admin.register(models.Workflow)
+class WorkflowAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'group', 'created_by', 'created_on', 'changed_by', 'changed_on')
+    inlines = (StateInline,)
+
+
+@admin.register(models.Transition)
+class TransitionAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('source', 'target', 'permission', 'created_by', 'created_on', 'changed_by', 'changed_on')
+    list_filter = ('source__workflow',)
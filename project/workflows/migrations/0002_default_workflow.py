@@ -0,0 +1,34 @@
+from django.db import migrations
+
+STATES = (('new', 'New'), ('open', 'Open'), ('closed', 'Closed'))
+TRANSITIONS = (('new', 'open'), ('new', 'closed'), ('open', 'closed'), ('closed', 'open'))
+
+
+def create_default_workflow(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    State = apps.get_model('workflows', 'State')
+    Transition = apps.get_model('workflows', 'Transition')
+    workflow = Workflow.objects.create(name='Default')
+    states = {
+        name: State.objects.create(workflow=workflow, name=name, label=label, is_initial=name == 'new')
+        for name, label in STATES
+    }
+    Transition.objects.bulk_create(
+        Transition(source=states[source], target=states[target]) for source, target in TRANSITIONS
+    )
+
+
+def delete_default_workflow(apps, schema_editor):
+    apps.get_model('workflows', 'Workflow').objects.filter(name='Default', group=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0001_initial'),
+    ]
+
+    operations = [
+        # The workflow of the groups without their own: new -> open -> closed, closed tickets can be reopened
+        migrations.RunPython(create_default_workflow, delete_default_workflow),
+    ]
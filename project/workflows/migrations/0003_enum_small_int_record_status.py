@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from appsutils.fields import convert_to_enum_small_int, EnumSmallIntField
+from appsutils.models import RecordStatus
+
+RECORD_STATUS = EnumSmallIntField(RecordStatus, blank=True, default=RecordStatus.ACTIVE, null=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0002_default_workflow'),
+    ]
+
+    operations = [
+        *convert_to_enum_small_int('workflows.Workflow', 'record_status', RECORD_STATUS),
+        *convert_to_enum_small_int('workflows.State', 'record_status', RECORD_STATUS),
+        *convert_to_enum_small_int('workflows.Transition', 'record_status', RECORD_STATUS),
+    ]
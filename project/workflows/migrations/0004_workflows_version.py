@@ -0,0 +1,20 @@
+# Generated by Django 3.2 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_enum_small_int_record_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,3 +1,80 @@
+""" Ticket workflows: the states a ticket can be in and the transitions allowed between them, per group.
+
+A group follows its own workflow when it has one, else the default workflow (the one without a group). The
+workflows are compiled into an in-memory transition table (see workflows.table) so that validating a status
+change costs no query.
+
+Classes:
+    Workflow: a set of states and transitions, for a group or the default one
+    State: a status of the tickets of a workflow
+    Transition: an allowed change of status, optionally restricted to the users having a permission
+    WorkflowsVersion: the version of the workflows, bumped by every change (see workflows.table)
+"""
+from django.core.exceptions import ValidationError
 from django.db import models
 
-# Create your models here.
+from appsutils.models import BaseEntity
+
+
+class Workflow(BaseEntity):
+    name = models.CharField(max_length=100, unique=True)
+    # The default workflow has no group, and serves the groups without a workflow of their own
+    group = models.OneToOneField(
+        'groups.Group', related_name='workflow', null=True, blank=True, on_delete=models.CASCADE,
+    )
+
+    listing_related_fields = ('group',)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+
+class State(BaseEntity):
+    workflow = models.ForeignKey(Workflow, related_name='states', on_delete=models.CASCADE)
+    name = models.SlugField(max_length=100)     # Used in the URLs and imports, e.g. ?status=open
+    label = models.CharField(max_length=100)
+    is_initial = models.BooleanField(default=False)    # The state of the new tickets, one per workflow
+
+    listing_related_fields = ('workflow',)
+
+    def __str__(self):
+        return self.label
+
+    class Meta:
+        ordering = ['workflow', 'id']
+        unique_together = ('workflow', 'name')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['workflow'], condition=models.Q(is_initial=True), name='state_one_initial_per_workflow',
+            ),
+        ]
+
+
+class Transition(BaseEntity):
+    # Both states belong to the same workflow
+    source = models.ForeignKey(State, related_name='outgoing_transitions', on_delete=models.CASCADE)
+    target = models.ForeignKey(State, related_name='incoming_transitions', on_delete=models.CASCADE)
+    # 'app_label.codename' of the permission required to make the transition, any user when empty
+    permission = models.CharField(max_length=255, blank=True, default='')
+
+    listing_related_fields = ('source', 'target')
+
+    def __str__(self):
+        return f'{self.source} → {self.target}'
+
+    def clean(self):
+        if self.source.workflow_id != self.target.workflow_id:
+            raise ValidationError('A transition links two states of the same workflow.')
+
+    class Meta:
+        unique_together = ('source', 'target')
+
+
+class WorkflowsVersion(models.Model):
+    """ One row counting the changes of the workflows, states and transitions: it is bumped by the transaction making
+    the change, so that every process sees the new version when, and only when, the change is committed.
+    """
+    version = models.PositiveBigIntegerField(default=0)
@@ -0,0 +1,24 @@
+""" Signal receivers of the workflows app, connected in WorkflowsConfig.ready().
+
+Receivers:
+    invalidate_transition_table: recompile the transition tables when a workflow, state or transition changes
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import State, Transition, Workflow
+from .table import bump_workflows_version, forget_transition_table
+
+
+@receiver(post_save, sender=Workflow)
+@receiver(post_delete, sender=Workflow)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=State)
+@receiver(post_save, sender=Transition)
+@receiver(post_delete, sender=Transition)
+def invalidate_transition_table(sender, using=None, **kwargs):
+    # The version is bumped by the transaction making the change, and the table of the process forgotten once it
+    # commits: recompiling it before would compile the previous workflows
+    bump_workflows_version(using)
+    transaction.on_commit(forget_transition_table, using=using)
@@ -0,0 +1,163 @@
+""" The workflows compiled into an in-memory transition table.
+
+Every process compiles the workflows, states and transitions (3 queries) on first use and keeps the table until
+they change: the changes bump the version of the workflows in the database (WorkflowsVersion, see
+workflows.signals), which every process reads at most once per WORKFLOWS_CHECK_SECONDS to recompile its table when
+it changed. The process making the change recompiles its table as soon as the change is committed. Validating a
+status change is then a dictionary lookup.
+
+Classes:
+    InvalidTransition: error raised for a status change the workflow does not allow
+    TransitionTable: the compiled workflows
+
+Functions:
+    get_transition_table: return the up to date table of the process
+    bump_workflows_version: make every process recompile its table once the current transaction commits
+    forget_transition_table: make the process recompile its table on its next use
+    invalidate_transition_tables: make every process recompile its table
+    default_status: return the initial state of the default workflow, the default status of the tickets
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from .models import State, Transition, Workflow, WorkflowsVersion
+
+
+class InvalidTransition(ValidationError):
+    """ The workflow of the ticket does not allow the status change, or not for this user. """
+
+
+class TransitionTable:
+    """ The workflows compiled into dictionaries, every lookup costing no query.
+
+    Public methods:
+        workflow_of(group_id): return the id of the workflow followed by the group
+        initial_state(group_id): return the id of the state of the new tickets of the group
+        state_id(group_id, name): return the id of the state with this name in the workflow of the group
+        states_named(name): return the id of the state with this name in every workflow having one
+        allows(source_id, target_id, user): tell whether the status change is allowed
+        check(source_id, target_id, user): same, raising InvalidTransition when not allowed
+        sources_of(target_id, user): return the ids of the states from which the target can be reached
+    """
+
+    def __init__(self, workflows, states, transitions):
+        """
+        :param workflows: (id, group_id) of every workflow
+        :param states: (id, workflow_id, name, is_initial) of every state
+        :param transitions: (source_id, target_id, permission) of every transition
+        """
+        self.default_workflow = min((id for id, group_id in workflows if group_id is None), default=None)
+        self.group_workflows: Dict[int, int] = {group_id: id for id, group_id in workflows if group_id is not None}
+        self.state_workflows: Dict[int, int] = {}
+        self.state_ids: Dict[Tuple[int, str], int] = {}
+        self.initial_states: Dict[int, int] = {}
+        for id, workflow_id, name, is_initial in states:
+            self.state_workflows[id] = workflow_id
+            self.state_ids[workflow_id, name] = id
+            if is_initial:
+                self.initial_states[workflow_id] = id
+        # {target_id: {source_id: required permission or ''}}
+        self.sources: Dict[int, Dict[int, str]] = {}
+        for source_id, target_id, permission in transitions:
+            self.sources.setdefault(target_id, {})[source_id] = permission
+
+    @classmethod
+    def compile(cls) -> 'TransitionTable':
+        # From the primary, like the version: a lagging replica would keep the previous workflows under the new one
+        return cls(
+            list(Workflow.objects.using(DEFAULT_DB_ALIAS).values_list('id', 'group_id')),
+            list(State.objects.using(DEFAULT_DB_ALIAS).values_list('id', 'workflow_id', 'name', 'is_initial')),
+            list(Transition.objects.using(DEFAULT_DB_ALIAS).values_list('source_id', 'target_id', 'permission')),
+        )
+
+    def workflow_of(self, group_id: Optional[int]) -> Optional[int]:
+        return self.group_workflows.get(group_id, self.default_workflow)
+
+    def initial_state(self, group_id: Optional[int]) -> Optional[int]:
+        return self.initial_states.get(self.workflow_of(group_id))
+
+    def state_id(self, group_id: Optional[int], name: str) -> Optional[int]:
+        return self.state_ids.get((self.workflow_of(group_id), name))
+
+    def states_named(self, name: str) -> List[int]:
+        return [id for (workflow_id, state_name), id in self.state_ids.items() if state_name == name]
+
+    def allows(self, source_id: int, target_id: int, user=None) -> bool:
+        """ Tell whether a ticket can move from the source to the target state.
+
+        :param user: the user making the change, checked against the permission of the transition; None for the
+        system (imports, jobs), which is allowed every transition
+        """
+        permission = self.sources.get(target_id, {}).get(source_id)
+        if permission is None:
+            return False
+        return not permission or user is None or user.has_perm(permission)
+
+    def check(self, source_id: int, target_id: int, user=None):
+        """ Raise InvalidTransition unless the ticket can move from the source to the target state. """
+        if not self.allows(source_id, target_id, user):
+            raise InvalidTransition('This status change is not allowed.', code='invalid_transition')
+
+    def sources_of(self, target_id: int, user=None) -> List[int]:
+        return [source_id for source_id in self.sources.get(target_id, ()) if self.allows(source_id, target_id, user)]
+
+
+_compiled: Tuple[Optional[int], Optional[TransitionTable]] = (None, None)
+_checked_on = 0.0   # time.monotonic() of the last reading of the version
+_lock = threading.Lock()
+
+
+def stored_version() -> int:
+    return WorkflowsVersion.objects.using(DEFAULT_DB_ALIAS).values_list('version', flat=True).first() or 0
+
+
+def get_transition_table() -> TransitionTable:
+    """ Return the transition table of the process, recompiled when the workflows changed. """
+    global _compiled, _checked_on
+    compiled_version, table = _compiled
+    now = time.monotonic()
+    if table is not None and now - _checked_on < settings.WORKFLOWS_CHECK_SECONDS:
+        return table
+    version = stored_version()    # Read before compiling: a change committed in between is compiled next time
+    if table is None or compiled_version != version:
+        with _lock:
+            table = TransitionTable.compile()
+            _compiled = version, table
+    _checked_on = now
+    return table
+
+
+def bump_workflows_version(using: Optional[str] = None):
+    """ Bump the version of the workflows in the current transaction: the other processes recompile their table once
+    it commits, on their next reading of the version.
+    """
+    versions = WorkflowsVersion.objects.using(using or DEFAULT_DB_ALIAS)
+    if versions.update(version=F('version') + 1):
+        return
+    # get_or_create() copes with a concurrent creation of the row
+    row, created = versions.get_or_create(defaults={'version': 1})
+    if not created:
+        versions.filter(pk=row.pk).update(version=F('version') + 1)
+
+
+def forget_transition_table():
+    """ Make the process recompile its transition table on its next use. """
+    global _compiled
+    _compiled = None, None
+
+
+def invalidate_transition_tables():
+    """ Make every process recompile its transition table on its next use. """
+    bump_workflows_version()
+    forget_transition_table()
+
+
+def default_status() -> Optional[int]:
+    """ Return the id of the initial state of the default workflow, the default status of the tickets. """
+    return get_transition_table().initial_state(None)
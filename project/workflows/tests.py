@@ -1,3 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from groups.models import Group, GroupTicketStats
+from tickets.models import Ticket
+from .models import State, Transition, Workflow
+from .table import InvalidTransition, bump_workflows_version, get_transition_table, invalidate_transition_tables
+from .transitions import bulk_transition, transition
+
+
+class WorkflowTests(TestCase):
+    """ Status changes validated against the compiled workflows of the groups. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.support = Group.objects.create(name='Support')
+        cls.network = Group.objects.create(name='Network')
+        # The network group follows its own workflow: triage -> done, done requiring a permission
+        workflow = Workflow.objects.create(name='Network', group=cls.network)
+        cls.triage = State.objects.create(workflow=workflow, name='triage', label='Triage', is_initial=True)
+        cls.done = State.objects.create(workflow=workflow, name='done', label='Done')
+        Transition.objects.create(source=cls.triage, target=cls.done, permission='accounts.custom_edit_user')
+        cls.new, cls.open, cls.closed = (
+            State.objects.get(workflow__group=None, name=name) for name in ('new', 'open', 'closed')
+        )
+        cls.user = get_user_model().objects.create_user(
+            first_name='Agent', email='agent@example.com', username='agent', phone_number='0000', password='pass',
+        )
+
+    def setUp(self):
+        # The workflows of the test data are never committed: compile them, and forget them after the test
+        invalidate_transition_tables()
+        self.addCleanup(invalidate_transition_tables)
+
+    def test_new_tickets_start_in_the_initial_state_of_their_workflow(self):
+        self.assertEqual(Ticket.objects.create(summary='Printer', group=self.support).status, self.new)
+        self.assertEqual(Ticket.objects.create(summary='Router', group=self.network).status, self.triage)
+
+    def test_checking_a_transition_runs_no_query_once_compiled(self):
+        get_transition_table()
+        with CaptureQueriesContext(connection) as queries:
+            table = get_transition_table()
+            table.check(self.new.pk, self.open.pk)
+            self.assertRaises(InvalidTransition, table.check, self.closed.pk, self.new.pk)
+            self.assertEqual(table.initial_state(self.network.pk), self.triage.pk)
+        self.assertEqual(len(queries), 0)
+
+    def test_the_table_is_recompiled_when_the_workflows_change(self):
+        self.assertFalse(get_transition_table().allows(self.closed.pk, self.new.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Transition.objects.create(source=self.closed, target=self.new)
+        self.assertTrue(get_transition_table().allows(self.closed.pk, self.new.pk))
+
+    def test_the_changes_of_other_processes_are_seen_at_the_next_reading_of_the_version(self):
+        self.assertFalse(get_transition_table().allows(self.closed.pk, self.new.pk))
+        # Made by another process: bulk_create() sends no signal, the table of this process is not forgotten
+        Transition.objects.bulk_create([Transition(source=self.closed, target=self.new)])
+        bump_workflows_version()
+        self.assertFalse(get_transition_table().allows(self.closed.pk, self.new.pk))
+        with self.settings(WORKFLOWS_CHECK_SECONDS=0):
+            self.assertTrue(get_transition_table().allows(self.closed.pk, self.new.pk))
+
+    def test_transitions_and_forms_reject_disallowed_changes(self):
+        ticket = Ticket.objects.create(summary='Printer', group=self.support, status=self.closed)
+        with self.assertRaises(InvalidTransition):
+            transition(ticket, 'new')
+        transition(ticket, 'open', self.user)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).status, self.open)
+
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.status = self.triage
+        with self.assertRaisesMessage(ValidationError, 'not part of the workflow'):
+            ticket.full_clean()
+
+    def test_transition_permissions_are_checked(self):
+        ticket = Ticket.objects.create(summary='Router', group=self.network)
+        with self.assertRaises(InvalidTransition):
+            transition(ticket, 'done', self.user)
+        self.user.is_admin = True
+        transition(ticket, 'done', self.user)
+        self.assertEqual(ticket.status, self.done)
+
+    def test_bulk_transition_moves_the_allowed_tickets_in_one_update(self):
+        Ticket.objects.bulk_create(Ticket(summary=f'new {i}', group=self.support, status=self.new) for i in range(5))
+        Ticket.objects.bulk_create(Ticket(summary=f'open {i}', group=self.support, status=self.open) for i in range(3))
+        Ticket.objects.bulk_create(Ticket(summary=str(i), group=self.network, status=self.triage) for i in range(2))
+        Ticket.objects.create(summary='Reopened', group=self.support, status=self.closed)
+        GroupTicketStats.objects.adjust(self.support.pk, self.new.pk, 5)
+        GroupTicketStats.objects.adjust(self.support.pk, self.open.pk, 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            moved = bulk_transition(Ticket.objects.filter(group=self.support).exclude(summary='new 0'), 'closed')
+        self.assertEqual(moved, 7)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "tickets_ticket"')]), 1)
+        self.assertEqual(Ticket.objects.filter(status=self.closed).count(), 8)
+        self.assertEqual(Ticket.objects.filter(status=self.new).count(), 1)
+        counts = {stats.status.name: stats.count for stats in GroupTicketStats.objects.filter(group=self.support)}
+        self.assertEqual(counts, {'new': 1, 'open': 0, 'closed': 8})
+
+        # Without the permission, the network tickets cannot be done
+        self.assertEqual(bulk_transition(Ticket.objects.all(), 'done', self.user), 0)
+        self.assertEqual(bulk_transition(Ticket.objects.all(), 'done'), 2)
+
+    def test_bulk_transition_updates_the_locked_tickets_by_batches(self):
+        Ticket.objects.bulk_create(Ticket(summary=f'new {i}', group=self.support, status=self.new) for i in range(5))
+        GroupTicketStats.objects.adjust(self.support.pk, self.new.pk, 5)
 
-# Create your tests here.
+        with mock.patch('workflows.transitions.UPDATE_BATCH_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(bulk_transition(Ticket.objects.all(), 'open'), 5)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "tickets_ticket"')]), 3)
+        counts = {stats.status.name: stats.count for stats in GroupTicketStats.objects.filter(group=self.support)}
+        self.assertEqual(counts, {'new': 0, 'open': 5})
@@ -0,0 +1,75 @@
+""" Status changes of the tickets, validated against their workflow.
+
+Functions:
+    transition: move a ticket to another state of its workflow
+    bulk_transition: move all the tickets of a queryset to a state, with one UPDATE per batch of tickets
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, When
+from django.utils import timezone
+
+from groups.models import GroupTicketStats
+from .table import InvalidTransition, get_transition_table
+
+UPDATE_BATCH_SIZE = 500     # Primary keys per UPDATE, within the parameter limit of SQLite
+
+
+def transition(ticket, target: str, user=None):
+    """ Move the ticket to the state named target in the workflow of its group, and save it.
+
+    :param ticket: the ticket to move
+    :param target: the name of the state, e.g. 'closed'
+    :param user: the user making the change, None for the system
+    :raises InvalidTransition: when the workflow has no such state or does not allow the change
+    """
+    table = get_transition_table()
+    target_id = table.state_id(ticket.group_id, target)
+    if target_id is None:
+        raise InvalidTransition(f'The workflow of this ticket has no {target!r} state.', code='invalid_transition')
+    table.check(ticket.status_id, target_id, user)
+    ticket.status_id = target_id
+    if user is not None and user.is_authenticated:
+        ticket.changed_by = user
+    ticket.changed_on = timezone.now()
+    ticket.save()
+
+
+def bulk_transition(tickets, target: str, user=None) -> int:
+    """ Move the tickets to the state named target in their workflow, with one UPDATE per UPDATE_BATCH_SIZE tickets.
+
+    The tickets whose current state does not lead to the target (or not for this user) are left as they are: the
+    allowed source states are read from the transition table and become part of the UPDATE condition. The tickets
+    are locked first and only the locked ones are updated, so that the GroupTicketStats counters, adjusted in the
+    same transaction, count the tickets actually moved whatever the concurrent changes.
+
+    :param tickets: a queryset of tickets, e.g. Ticket.objects.filter(group=group, status__name='new')
+    :param target: the name of the state, in all the workflows having one
+    :param user: the user making the change, None for the system
+    :returns: the number of tickets moved
+    """
+    table = get_transition_table()
+    targets = {}    # {source state id: target state id}, a state belonging to a single workflow
+    for target_id in table.states_named(target):
+        for source_id in table.sources_of(target_id, user):
+            targets[source_id] = target_id
+    if not targets:
+        return 0
+    tickets = tickets.filter(status_id__in=targets).order_by()
+    changes = {'status_id': Case(*(When(status_id=source, then=target) for source, target in targets.items()))}
+    changes['changed_on'] = timezone.now()
+    if user is not None and user.is_authenticated:
+        changes['changed_by'] = user
+    locked = tickets.select_for_update()     # On the primary
+    with transaction.atomic(using=locked.db):
+        # Counted in Python, FOR UPDATE is not allowed with GROUP BY
+        rows = list(locked.values_list('pk', 'group_id', 'status_id'))
+        moved = 0
+        for start in range(0, len(rows), UPDATE_BATCH_SIZE):
+            moved += tickets.filter(pk__in=[pk for pk, *_ in rows[start:start + UPDATE_BATCH_SIZE]]).update(**changes)
+        counts = Counter((group_id, status_id) for pk, group_id, status_id in rows)
+        for (group_id, status_id), count in counts.items():
+            GroupTicketStats.objects.adjust(group_id, status_id, -count)
+            GroupTicketStats.objects.adjust(group_id, targets[status_id], count)
+    return moved